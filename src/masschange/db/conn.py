@@ -1,13 +1,18 @@
 import os
-from typing import Union
+from typing import Dict, Union
 
 import psycopg2
 
 
-def get_db_connection(database: Union[str, None]):
-    host = os.environ['TSDB_HOST']
-    port = int(os.environ['TSDB_PORT'])
-    user = os.environ['TSDB_USER']
-    password = os.environ['TSDB_PASSWORD']
+def get_db_connection_parameters(database: Union[str, None]) -> Dict:
+    return {
+        'database': database,
+        'user': os.environ['TSDB_USER'],
+        'password': os.environ['TSDB_PASSWORD'],
+        'host': os.environ['TSDB_HOST'],
+        'port': int(os.environ['TSDB_PORT']),
+    }
+
 
-    return psycopg2.connect(database=database, user=user, password=password, host=host, port=port)
+def get_db_connection(database: Union[str, None]):
+    return psycopg2.connect(**get_db_connection_parameters(database))
@@ -1,14 +1,18 @@
 import logging
 import math
 from datetime import datetime, timedelta
-from typing import Collection, Set
+from typing import Collection, List, Set, Optional
 
 from masschange.dataproducts.timeseriesdataset import TimeSeriesDataset
 from masschange.dataproducts.db.utils import get_db_connection
-from masschange.utils.timespan import TimeSpan
+from masschange.db.session import IngestSession, open_connection
+from masschange.utils.timespan import TimeSpan, merge_timespans
 
 log = logging.getLogger()
 
+# the default origin used by timescaledb's time_bucket(), to which all bucket boundaries are aligned
+_TIME_BUCKET_ORIGIN = datetime(2000, 1, 3)
+
 
 def get_extant_continuous_aggregates(dataset: TimeSeriesDataset) -> Set[str]:
     with get_db_connection() as conn, conn.cursor() as cur:
@@ -68,13 +72,21 @@ def get_continuous_aggregate_create_statements(dataset: TimeSeriesDataset, aggre
     """
 
 
-def refresh_continuous_aggregates(dataset: TimeSeriesDataset, enable_chunking: bool = False):
+def refresh_continuous_aggregates(dataset: TimeSeriesDataset, enable_chunking: bool = False,
+                                  data_span: Optional[TimeSpan] = None, session: Optional[IngestSession] = None):
     """
     Refresh all continuous aggregates for a given TimeSeriesDataset.
+    If data_span is provided, refresh only those buckets which overlap it, such that the cost of the refresh is
+    independent of the dataset's extant data span.
     Optionally, split the refresh operations into chunks, for faster runtime and improved log responsiveness.
     Unexpectedly, the refresh runtime increases superlinearly with timespan, so this is necessary when refreshing a
     large span.
+    If session is provided, its pooled connections are used.
     """
+    if data_span is not None:
+        refresh_continuous_aggregates_over_spans(dataset, [data_span], session=session)
+        return
+
     log.info(f'refreshing continuous aggregates for {dataset.get_table_name()}')
     for aggregation_level in dataset.product.get_available_aggregation_levels():
         materialized_view_name = dataset.get_table_or_view_name(aggregation_level)
@@ -90,63 +102,93 @@ def refresh_continuous_aggregates(dataset: TimeSeriesDataset, enable_chunking: b
 
             if chunking_required:
                 chunk_count = math.ceil(estimated_row_count / chunk_max_row_count)
-                chunk_duration = data_span.duration / chunk_count
-
-                chunk_span = TimeSpan(begin=data_span.begin, duration=chunk_duration)
-                while chunk_span.end < data_span.end:
-                    _refresh_continuous_aggregate(materialized_view_name, chunk_span)
-                    chunk_span = TimeSpan(chunk_span.end, duration=chunk_span.duration)
-                    _refresh_continuous_aggregate(materialized_view_name, chunk_span)
+                bucket_interval = dataset.product.get_nominal_data_interval(aggregation_level)
+                for chunk_span in get_chunked_refresh_spans(bucket_interval, data_span, chunk_count):
+                    _refresh_continuous_aggregate(materialized_view_name, chunk_span, session=session)
 
             else:
                 refresh_span = TimeSpan(begin=datetime.min, end=datetime.max)
-                _refresh_continuous_aggregate(materialized_view_name, refresh_span)
+                _refresh_continuous_aggregate(materialized_view_name, refresh_span, session=session)
         else:
             refresh_span = TimeSpan(begin=datetime.min, end=datetime.max)
-            _refresh_continuous_aggregate(materialized_view_name, refresh_span)
+            _refresh_continuous_aggregate(materialized_view_name, refresh_span, session=session)
+
+
+def refresh_continuous_aggregates_over_spans(dataset: TimeSeriesDataset, data_spans: Collection[TimeSpan],
+                                             session: Optional[IngestSession] = None):
+    """
+    Refresh all continuous aggregates for a given TimeSeriesDataset, limited to buckets overlapping the given data spans.
+    Levels are refreshed bottom-up, as each is aggregated from the level below.  At each level, the spans are widened to
+    the enclosing bucket boundaries (see get_refresh_span()), then merged, so that the number of refresh operations is
+    minimised.
+    """
+    log.info(f'refreshing continuous aggregates for {dataset.get_table_name()} over {len(data_spans)} data spans')
+    for aggregation_level in dataset.product.get_available_aggregation_levels():
+        materialized_view_name = dataset.get_table_or_view_name(aggregation_level)
+        bucket_interval = dataset.product.get_nominal_data_interval(aggregation_level)
+        refresh_spans = [get_refresh_span(bucket_interval, span) for span in data_spans]
+        for refresh_span in merge_timespans(refresh_spans):
+            _refresh_continuous_aggregate(materialized_view_name, refresh_span, session=session)
 
 
-def _refresh_continuous_aggregate(materialized_view_name: str, refresh_span: TimeSpan):
+def _refresh_continuous_aggregate(materialized_view_name: str, refresh_span: TimeSpan,
+                                  session: Optional[IngestSession] = None):
     """Refresh a single cagg over a given span"""
     log.info(f'refreshing {materialized_view_name} for {refresh_span}')
 
-    conn = get_db_connection()
-    conn.autocommit = True
-    with conn.cursor() as cur:
+    # refresh may not be performed within a transaction
+    with open_connection(session, autocommit=True) as conn, conn.cursor() as cur:
         sql = f"CALL refresh_continuous_aggregate('{materialized_view_name}', %(from_dt)s, %(to_dt)s);"
         cur.execute(sql, {'from_dt': refresh_span.begin, 'to_dt': refresh_span.end})
         log.debug(f'refreshed cont. agg. {materialized_view_name} for buckets spanning {refresh_span}')
-    conn.close()
 
 
-def get_refresh_span(view_name: str, bucket_interval: timedelta, data_span: TimeSpan) -> TimeSpan:
+def get_refresh_span(bucket_interval: timedelta, data_span: TimeSpan) -> TimeSpan:
     """
-    Get a dataspan enclosing all extant buckets which overlap a given data_span.  If no data exists in the materialized
-    view yet, instead return a safe value which will ensure timescaledb does not complain about too-small a window.
+    Get the bucket-aligned span enclosing all buckets which overlap a given data_span.  Refreshing a continuous aggregate
+    over this span incorporates all changes to data within data_span, regardless of how much other data exists, and the
+    span is always at least one bucket wide, so timescaledb will not complain about too-small a window.
 
     Parameters
     ----------
-    view_name - the name of the materialized view
     bucket_interval - the interval/size of this view's buckets
     data_span - the span of data for which to resolve a refresh span
 
     Returns
     -------
-    an inclusive bucket span over which to refresh the continuous aggregate/materialized view
+    a bucket span over which to refresh the continuous aggregate/materialized view
 
     """
+    origin = _TIME_BUCKET_ORIGIN.replace(tzinfo=data_span.begin.tzinfo)
+    begin = origin + ((data_span.begin - origin) // bucket_interval) * bucket_interval
+    end = origin + ((data_span.end - origin) // bucket_interval + 1) * bucket_interval
+    return TimeSpan(begin=begin, end=end)
 
-    sql = f"""
-    select min(bucket), max(bucket)
-    from {view_name}
-    where bucket >= ('{data_span.begin.isoformat()}'::timestamp - INTERVAL '{bucket_interval.total_seconds()} SECONDS')
-      and bucket <= ('{data_span.end.isoformat()}'::timestamp + INTERVAL '{bucket_interval.total_seconds()} SECONDS');
-      """
 
-    with get_db_connection() as conn, conn.cursor() as cur:
-        cur.execute(sql)
-        results = cur.fetchone()
-        if None not in results:
-            return TimeSpan(begin=results[0], end=results[1] + bucket_interval)
-        else:
-            return TimeSpan(begin=datetime.min, end=datetime.max)
+def get_chunked_refresh_spans(bucket_interval: timedelta, data_span: TimeSpan, chunk_count: int) -> List[TimeSpan]:
+    """
+    Split the refresh span of a data_span (see get_refresh_span()) into approximately chunk_count consecutive refresh
+    spans.  Chunk boundaries are aligned to bucket boundaries, as timescaledb refreshes only those buckets which fall
+    entirely within the refresh window, so a bucket straddling a boundary would otherwise be refreshed by neither chunk.
+
+    Parameters
+    ----------
+    bucket_interval - the interval/size of this view's buckets
+    data_span - the span of data for which to resolve refresh spans
+    chunk_count - the desired number of chunks
+
+    Returns
+    -------
+    the consecutive bucket-aligned spans over which to refresh the continuous aggregate/materialized view
+
+    """
+    refresh_span = get_refresh_span(bucket_interval, data_span)
+    chunk_duration = math.ceil(refresh_span.duration / chunk_count / bucket_interval) * bucket_interval
+
+    chunk_spans = []
+    chunk_begin = refresh_span.begin
+    while chunk_begin < refresh_span.end:
+        chunk_spans.append(TimeSpan(begin=chunk_begin, end=min(chunk_begin + chunk_duration, refresh_span.end)))
+        chunk_begin = chunk_spans[-1].end
+
+    return chunk_spans
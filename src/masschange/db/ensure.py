@@ -67,6 +67,62 @@ def ensure_metadata_tables_exist(db_name: str) -> None:
             last_updated TIMESTAMPTZ,
             PRIMARY KEY (_meta_dataproducts_versions_id, _meta_instruments_id)
             );
+
+            CREATE TABLE IF NOT EXISTS _meta_ingested_files
+            (
+            source_path VARCHAR NOT NULL,
+            dataproduct VARCHAR NOT NULL,
+            size BIGINT NOT NULL,
+            mtime TIMESTAMPTZ,
+            sha256 CHAR(64) NOT NULL,
+            table_name VARCHAR NOT NULL,
+            row_count BIGINT NOT NULL,
+            data_begin TIMESTAMPTZ NOT NULL,
+            data_end TIMESTAMPTZ NOT NULL,
+            ingested_at TIMESTAMPTZ NOT NULL,
+            PRIMARY KEY (source_path, dataproduct)
+            );
+
+            CREATE TABLE IF NOT EXISTS _meta_ingest_jobs
+            (
+            id BIGSERIAL PRIMARY KEY,
+            source_path VARCHAR NOT NULL,
+            member_name VARCHAR NOT NULL DEFAULT '',
+            dataproduct VARCHAR NOT NULL,
+            status VARCHAR NOT NULL,
+            attempts INT NOT NULL DEFAULT 0,
+            worker VARCHAR,
+            enqueued_at TIMESTAMPTZ NOT NULL,
+            claimed_at TIMESTAMPTZ,
+            lease_expires_at TIMESTAMPTZ,
+            completed_at TIMESTAMPTZ,
+            elapsed_seconds DOUBLE PRECISION,
+            error VARCHAR,
+            UNIQUE (source_path, member_name, dataproduct)
+            );
+
+            CREATE INDEX IF NOT EXISTS _meta_ingest_jobs_status_idx ON _meta_ingest_jobs (status, source_path, member_name);
+
+            CREATE TABLE IF NOT EXISTS _meta_ingest_stats
+            (
+            id BIGSERIAL PRIMARY KEY,
+            recorded_at TIMESTAMPTZ NOT NULL,
+            dataproduct VARCHAR NOT NULL,
+            table_name VARCHAR NOT NULL,
+            source_path VARCHAR NOT NULL,
+            file_count INT NOT NULL,
+            row_count BIGINT NOT NULL,
+            input_bytes BIGINT NOT NULL,
+            parse_seconds DOUBLE PRECISION NOT NULL,
+            timestamps_seconds DOUBLE PRECISION NOT NULL,
+            delete_seconds DOUBLE PRECISION NOT NULL,
+            copy_seconds DOUBLE PRECISION NOT NULL,
+            refresh_seconds DOUBLE PRECISION NOT NULL,
+            metadata_seconds DOUBLE PRECISION NOT NULL,
+            peak_rss_bytes BIGINT
+            );
+
+            CREATE INDEX IF NOT EXISTS _meta_ingest_stats_dataproduct_idx ON _meta_ingest_stats (dataproduct, recorded_at);
         """
         cur.execute(sql)
         conn.commit()
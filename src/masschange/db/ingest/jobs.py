@@ -0,0 +1,159 @@
+from datetime import timedelta
+from typing import Iterable, List, Optional, Tuple
+
+import psycopg2.extras
+
+from masschange.dataproducts.db.utils import get_db_connection
+
+
+class IngestJob:
+    """
+    A unit of distributed ingest work - the ingestion of a single source file for a single product
+
+    Attributes
+        id (int): the job's database id
+
+        source_path (str): the path of the source file, or of the tarball containing it
+
+        member_name (str): the name of the source file within its tarball, or an empty string if it is not zipped
+
+        product_id (str): the full id of the product for which the file is to be ingested
+
+        attempts (int): the number of times the job has been claimed, including the current claim
+    """
+    PENDING = 'pending'
+    RUNNING = 'running'
+    FAILED = 'failed'
+
+    def __init__(self, id: int, source_path: str, member_name: str, product_id: str, attempts: int):
+        self.id = id
+        self.source_path = source_path
+        self.member_name = member_name
+        self.product_id = product_id
+        self.attempts = attempts
+
+    @property
+    def is_zipped(self) -> bool:
+        return self.member_name != ''
+
+
+def enqueue_jobs(jobs: Iterable[Tuple[str, str, str]], requeue: bool = False) -> int:
+    """
+    Enqueue (source_path, member_name, product_id) jobs, returning the number of jobs which were newly enqueued (or
+    requeued).  Jobs which already exist are left untouched, unless requeue is True, in which case any which are not
+    currently running are reset to pending.
+    """
+    conflict_clause = 'DO NOTHING' if not requeue else f"""
+        DO UPDATE SET status = '{IngestJob.PENDING}', attempts = 0, worker = NULL, claimed_at = NULL,
+                      lease_expires_at = NULL, completed_at = NULL, elapsed_seconds = NULL, error = NULL,
+                      enqueued_at = EXCLUDED.enqueued_at
+        WHERE _meta_ingest_jobs.status != '{IngestJob.RUNNING}'"""
+
+    with get_db_connection() as conn, conn.cursor() as cur:
+        sql = f"""
+            INSERT INTO _meta_ingest_jobs (source_path, member_name, dataproduct, status, enqueued_at)
+            VALUES %s
+            ON CONFLICT (source_path, member_name, dataproduct) {conflict_clause}
+            RETURNING id;
+        """
+        rows = psycopg2.extras.execute_values(
+            cur, sql, ((source_path, member_name, product_id, IngestJob.PENDING) for source_path, member_name, product_id in jobs),
+            template="(%s, %s, %s, %s, now())", fetch=True)
+        conn.commit()
+
+    return len(rows)
+
+
+def claim_jobs(worker: str, limit: int, lease: timedelta, max_attempts: int) -> List[IngestJob]:
+    """
+    Claim up to limit jobs for a worker, for the duration of a lease.  Pending jobs are claimed, as are running jobs whose
+    lease has expired (i.e. whose worker has died).  Expired jobs which have already been attempted max_attempts times are
+    instead marked as failed.  Jobs locked by a concurrent claim are skipped, so any number of workers may claim jobs
+    concurrently without blocking one another or claiming the same job.
+    """
+    parameters = {'pending': IngestJob.PENDING, 'running': IngestJob.RUNNING, 'failed': IngestJob.FAILED,
+                  'worker': worker, 'limit': limit, 'lease': lease, 'max_attempts': max_attempts}
+    with get_db_connection() as conn, conn.cursor() as cur:
+        sql = """
+            UPDATE _meta_ingest_jobs
+            SET status = %(failed)s, completed_at = now(), lease_expires_at = NULL,
+                error = 'lease expired on final attempt by worker ' || worker
+            WHERE id IN (
+                SELECT id
+                FROM _meta_ingest_jobs
+                WHERE status = %(running)s AND lease_expires_at < now() AND attempts >= %(max_attempts)s
+                FOR UPDATE SKIP LOCKED
+            );
+        """
+        cur.execute(sql, parameters)
+
+        sql = """
+            UPDATE _meta_ingest_jobs
+            SET status = %(running)s, worker = %(worker)s, attempts = attempts + 1, claimed_at = now(),
+                lease_expires_at = now() + %(lease)s
+            WHERE id IN (
+                SELECT id
+                FROM _meta_ingest_jobs
+                WHERE status = %(pending)s OR (status = %(running)s AND lease_expires_at < now())
+                ORDER BY source_path, member_name, dataproduct
+                LIMIT %(limit)s
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING id, source_path, member_name, dataproduct, attempts;
+        """
+        cur.execute(sql, parameters)
+        rows = cur.fetchall()
+        conn.commit()
+
+    return sorted((IngestJob(*row) for row in rows), key=lambda job: (job.source_path, job.member_name))
+
+
+def renew_lease(jobs: Iterable[IngestJob], worker: str, lease: timedelta) -> None:
+    """Extend the lease on a worker's claimed jobs"""
+    with get_db_connection() as conn, conn.cursor() as cur:
+        sql = """
+            UPDATE _meta_ingest_jobs
+            SET lease_expires_at = now() + %(lease)s
+            WHERE id = ANY(%(ids)s) AND worker = %(worker)s AND status = %(running)s;
+        """
+        cur.execute(sql, {'ids': [job.id for job in jobs], 'worker': worker, 'lease': lease,
+                          'running': IngestJob.RUNNING})
+        conn.commit()
+
+
+def complete_job(job: IngestJob, worker: str, status: str, elapsed: timedelta, error: Optional[str] = None) -> None:
+    """Record the outcome of a job, provided that it is still claimed by the given worker"""
+    with get_db_connection() as conn, conn.cursor() as cur:
+        sql = """
+            UPDATE _meta_ingest_jobs
+            SET status = %(status)s, completed_at = now(), lease_expires_at = NULL, elapsed_seconds = %(elapsed)s,
+                error = %(error)s
+            WHERE id = %(id)s AND worker = %(worker)s AND status = %(running)s;
+        """
+        cur.execute(sql, {'id': job.id, 'worker': worker, 'status': status, 'elapsed': elapsed.total_seconds(),
+                          'error': error, 'running': IngestJob.RUNNING})
+        conn.commit()
+
+
+def release_jobs(jobs: Iterable[IngestJob], worker: str) -> None:
+    """Return a worker's unfinished jobs to the queue, without counting the aborted attempt"""
+    ids = [job.id for job in jobs]
+    if len(ids) == 0:
+        return
+
+    with get_db_connection() as conn, conn.cursor() as cur:
+        sql = """
+            UPDATE _meta_ingest_jobs
+            SET status = %(pending)s, worker = NULL, attempts = attempts - 1, claimed_at = NULL,
+                lease_expires_at = NULL
+            WHERE id = ANY(%(ids)s) AND worker = %(worker)s AND status = %(running)s;
+        """
+        cur.execute(sql, {'ids': ids, 'worker': worker, 'pending': IngestJob.PENDING, 'running': IngestJob.RUNNING})
+        conn.commit()
+
+
+def get_job_status_counts() -> dict:
+    """Return the number of jobs in each status"""
+    with get_db_connection() as conn, conn.cursor() as cur:
+        cur.execute('SELECT status, count(*) FROM _meta_ingest_jobs GROUP BY status;')
+        return {status: count for status, count in cur.fetchall()}
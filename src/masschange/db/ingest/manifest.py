@@ -0,0 +1,123 @@
+import hashlib
+import os
+from datetime import datetime, timezone
+from typing import Optional
+
+from masschange.db.session import IngestSession, open_connection
+from masschange.ingest.executor.datafilereaders.base import DataFileSource, InMemoryDataFile, get_data_file_name, \
+    open_data_file
+from masschange.utils.timespan import TimeSpan
+
+_HASH_READ_SIZE = 1024 * 1024
+
+
+class DataFileFingerprint:
+    """
+    The identifying properties of a data file, used to determine whether it has changed since it was last ingested
+
+    Attributes
+        path (str): the path (or virtual path) of the data file
+
+        size (int): the size of the file content, in bytes
+
+        mtime (datetime | None): the modification time of the file, if known
+
+        sha256 (str | None): the hex digest of the file content, if computed
+    """
+
+    def __init__(self, path: str, size: int, mtime: Optional[datetime], sha256: Optional[str] = None):
+        self.path = path
+        self.size = size
+        self.mtime = mtime
+        self.sha256 = sha256
+
+    @classmethod
+    def from_data_file(cls, source: DataFileSource) -> 'DataFileFingerprint':
+        """Fingerprint a data file by size and mtime, deferring the (more expensive) content hash"""
+        if isinstance(source, InMemoryDataFile):
+            size = len(source.getbuffer())
+            mtime = source.mtime
+        else:
+            stat = os.stat(source)
+            size = stat.st_size
+            mtime = stat.st_mtime
+
+        mtime = datetime.fromtimestamp(mtime, tz=timezone.utc) if mtime is not None else None
+        return cls(get_data_file_name(source), size, mtime)
+
+    def compute_sha256(self, source: DataFileSource) -> str:
+        hash = hashlib.sha256()
+        with open_data_file(source, 'rb') as f:
+            while chunk := f.read(_HASH_READ_SIZE):
+                hash.update(chunk)
+
+        self.sha256 = hash.hexdigest()
+        return self.sha256
+
+
+class IngestedFileRecord:
+    """
+    A manifest entry recording the successful ingestion of a data file for a product
+
+    Attributes
+        product_id (str): the full id of the product for which the file was ingested
+
+        fingerprint (DataFileFingerprint): the fingerprint of the file as ingested
+
+        table_name (str): the dataset table to which the file's data was written
+
+        row_count (int): the number of rows written
+
+        data_span (TimeSpan): the temporal span of the written data
+
+        ingested_at (datetime): the time at which ingestion completed
+    """
+
+    def __init__(self, product_id: str, fingerprint: DataFileFingerprint, table_name: str, row_count: int,
+                 data_span: TimeSpan, ingested_at: datetime):
+        self.product_id = product_id
+        self.fingerprint = fingerprint
+        self.table_name = table_name
+        self.row_count = row_count
+        self.data_span = data_span
+        self.ingested_at = ingested_at
+
+
+def get_ingested_file_record(product_id: str, path: str,
+                             session: Optional[IngestSession] = None) -> Optional[IngestedFileRecord]:
+    """Return the manifest entry for the most recent ingestion of a file for a product, or None if there is none"""
+    with open_connection(session) as conn, conn.cursor() as cur:
+        sql = """
+            SELECT size, mtime, sha256, table_name, row_count, data_begin, data_end, ingested_at
+            FROM _meta_ingested_files
+            WHERE source_path = %(path)s AND dataproduct = %(product_id)s;
+        """
+        cur.execute(sql, {'path': path, 'product_id': product_id})
+        row = cur.fetchone()
+
+    if row is None:
+        return None
+
+    size, mtime, sha256, table_name, row_count, data_begin, data_end, ingested_at = row
+    return IngestedFileRecord(product_id, DataFileFingerprint(path, size, mtime, sha256), table_name, row_count,
+                              TimeSpan(begin=data_begin, end=data_end), ingested_at)
+
+
+def put_ingested_file_record(record: IngestedFileRecord, session: Optional[IngestSession] = None) -> None:
+    """Insert or replace the manifest entry for a file and product"""
+    fingerprint = record.fingerprint
+    with open_connection(session) as conn, conn.cursor() as cur:
+        sql = """
+            INSERT INTO _meta_ingested_files
+            (source_path, dataproduct, size, mtime, sha256, table_name, row_count, data_begin, data_end, ingested_at)
+            VALUES (%(path)s, %(product_id)s, %(size)s, %(mtime)s, %(sha256)s, %(table_name)s, %(row_count)s,
+                    %(data_begin)s, %(data_end)s, %(ingested_at)s)
+            ON CONFLICT (source_path, dataproduct) DO UPDATE
+            SET size = EXCLUDED.size, mtime = EXCLUDED.mtime, sha256 = EXCLUDED.sha256,
+                table_name = EXCLUDED.table_name, row_count = EXCLUDED.row_count, data_begin = EXCLUDED.data_begin,
+                data_end = EXCLUDED.data_end, ingested_at = EXCLUDED.ingested_at;
+        """
+        cur.execute(sql, {'path': fingerprint.path, 'product_id': record.product_id, 'size': fingerprint.size,
+                          'mtime': fingerprint.mtime, 'sha256': fingerprint.sha256, 'table_name': record.table_name,
+                          'row_count': record.row_count, 'data_begin': record.data_span.begin,
+                          'data_end': record.data_span.end, 'ingested_at': record.ingested_at})
@@ -0,0 +1,174 @@
+import json
+import logging
+import resource
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, Optional
+
+import psycopg2
+
+from masschange.db.session import IngestSession, open_connection
+
+log = logging.getLogger()
+
+# the stats to which stages timed by time_ingest_stage() are attributed, if any
+_active_ingest_stats: ContextVar[Optional['IngestStats']] = ContextVar('active_ingest_stats', default=None)
+
+# if set, recorded stats are also appended to this file as JSON lines
+_ingest_stats_jsonl_path: Optional[str] = None
+_ingest_stats_jsonl_lock = threading.Lock()
+
+
+class IngestStats:
+    """
+    Measurements of the ingestion of a single data file, or of a batch of data files written to a dataset together
+
+    Attributes
+        product_id (str): the full id of the product to which the data belongs
+
+        table_name (str): the dataset table to which the data is written
+
+        source_path (str): the path (or virtual path) of the data file, or of the first data file of a batch
+
+        file_count (int): the number of data files measured
+
+        row_count (int): the number of rows parsed
+
+        input_bytes (int): the total size of the data files
+
+        stage_seconds (Dict[str, float]): the time spent in each of the stages named by IngestStats.stages.  The parse
+            stage includes timestamp derivation, which is additionally measured alone by the timestamps stage
+
+        peak_rss_bytes (int | None): the peak resident set size of the ingesting process at the time of recording
+
+        recorded_at (datetime | None): the time at which the stats were recorded
+    """
+
+    stages = ['parse', 'timestamps', 'delete', 'copy', 'refresh', 'metadata']
+
+    def __init__(self, product_id: str, table_name: str, source_path: str, file_count: int = 1, row_count: int = 0,
+                 input_bytes: int = 0):
+        self.product_id = product_id
+        self.table_name = table_name
+        self.source_path = source_path
+        self.file_count = file_count
+        self.row_count = row_count
+        self.input_bytes = input_bytes
+        self.stage_seconds: Dict[str, float] = {stage: 0.0 for stage in self.stages}
+        self.peak_rss_bytes: Optional[int] = None
+        self.recorded_at: Optional[datetime] = None
+
+    @classmethod
+    def combine(cls, stats: Iterable['IngestStats']) -> 'IngestStats':
+        """Sum the stats of data files written to the same dataset together"""
+        stats = list(stats)
+        combined = cls(stats[0].product_id, stats[0].table_name, stats[0].source_path, file_count=0)
+        for s in stats:
+            combined.file_count += s.file_count
+            combined.row_count += s.row_count
+            combined.input_bytes += s.input_bytes
+            for stage, seconds in s.stage_seconds.items():
+                combined.stage_seconds[stage] += seconds
+        return combined
+
+    @contextmanager
+    def time_stage(self, stage: str) -> Iterator[None]:
+        """Add the time spent in the context to the given stage"""
+        if stage not in self.stage_seconds:
+            raise ValueError(f'unrecognised ingest stage "{stage}" (expected one of {self.stages})')
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stage_seconds[stage] += time.perf_counter() - start
+
+    @contextmanager
+    def activate(self) -> Iterator[None]:
+        """Attribute stages timed by time_ingest_stage() within the context (and the current thread) to these stats"""
+        token = _active_ingest_stats.set(self)
+        try:
+            yield
+        finally:
+            _active_ingest_stats.reset(token)
+
+    def to_dict(self) -> Dict:
+        return {'product_id': self.product_id, 'table_name': self.table_name, 'source_path': self.source_path,
+                'file_count': self.file_count, 'row_count': self.row_count, 'input_bytes': self.input_bytes,
+                'stage_seconds': dict(self.stage_seconds), 'peak_rss_bytes': self.peak_rss_bytes,
+                'recorded_at': self.recorded_at.isoformat() if self.recorded_at is not None else None}
+
+
+@contextmanager
+def time_ingest_stage(stage: str) -> Iterator[None]:
+    """
+    Add the time spent in the context to the given stage of the active stats (see IngestStats.activate()), if any.
+    This allows code which has no reference to the stats (such as data file readers) to time its stages.
+    """
+    stats = _active_ingest_stats.get()
+    if stats is None:
+        yield
+    else:
+        with stats.time_stage(stage):
+            yield
+
+
+def get_peak_rss_bytes() -> int:
+    """Return the peak resident set size of the current process (ru_maxrss is reported in KiB on Linux)"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def set_ingest_stats_jsonl_path(filepath: Optional[str]) -> None:
+    """Set the file to which recorded stats are additionally appended as JSON lines, or None to disable"""
+    global _ingest_stats_jsonl_path
+    _ingest_stats_jsonl_path = filepath
+
+
+def put_ingest_stats(stats: IngestStats, session: Optional[IngestSession] = None) -> None:
+    """Insert a record of stats into the ingest stats table"""
+    with open_connection(session) as conn, conn.cursor() as cur:
+        sql = """
+            INSERT INTO _meta_ingest_stats
+            (recorded_at, dataproduct, table_name, source_path, file_count, row_count, input_bytes, parse_seconds,
+             timestamps_seconds, delete_seconds, copy_seconds, refresh_seconds, metadata_seconds, peak_rss_bytes)
+            VALUES (%(recorded_at)s, %(product_id)s, %(table_name)s, %(source_path)s, %(file_count)s, %(row_count)s,
+                    %(input_bytes)s, %(parse)s, %(timestamps)s, %(delete)s, %(copy)s, %(refresh)s, %(metadata)s,
+                    %(peak_rss_bytes)s);
+        """
+        cur.execute(sql, {'recorded_at': stats.recorded_at, 'product_id': stats.product_id,
+                          'table_name': stats.table_name, 'source_path': stats.source_path,
+                          'file_count': stats.file_count, 'row_count': stats.row_count,
+                          'input_bytes': stats.input_bytes, 'peak_rss_bytes': stats.peak_rss_bytes,
+                          **stats.stage_seconds})
+
+
+def append_ingest_stats_jsonl(stats: IngestStats, filepath: str) -> None:
+    """Append stats to a file as a single JSON line"""
+    line = json.dumps(stats.to_dict()) + '\n'
+    with _ingest_stats_jsonl_lock, open(filepath, 'a') as f:
+        f.write(line)
+
+
+def record_ingest_stats(stats: IngestStats, session: Optional[IngestSession] = None) -> None:
+    """
+    Stamp stats with the current time and peak RSS, and record them in the ingest stats table (and the JSON lines file,
+    if one is set).  As the stats are purely diagnostic, failure to record them is logged rather than raised, so that it
+    never causes the failure of an otherwise-successful ingest.
+    """
+    stats.recorded_at = datetime.now(timezone.utc)
+    stats.peak_rss_bytes = get_peak_rss_bytes()
+    log.debug(f'ingest stats for {stats.source_path}: {stats.to_dict()}')
+
+    try:
+        put_ingest_stats(stats, session=session)
+    except psycopg2.Error as err:
+        log.warning(f'failed to record ingest stats for {stats.source_path}: {err}')
+
+    if _ingest_stats_jsonl_path is not None:
+        try:
+            append_ingest_stats_jsonl(stats, _ingest_stats_jsonl_path)
+        except OSError as err:
+            log.warning(f'failed to append ingest stats for {stats.source_path} to {_ingest_stats_jsonl_path}: {err}')
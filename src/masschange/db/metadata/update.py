@@ -1,87 +1,101 @@
 from datetime import datetime
-from typing import Union
+from typing import Optional, Union
+
+import psycopg2
 
 from masschange.dataproducts.timeseriesdataset import TimeSeriesDataset
-from masschange.dataproducts.db.utils import get_db_connection
+from masschange.db.session import IngestSession, execute_statement, open_connection
 from masschange.utils.timespan import TimeSpan
 
 
 def update_metadata(dataset: TimeSeriesDataset,
-                    data_span: Union[TimeSpan, None] = None, populate_versions = False):
+                    data_span: Union[TimeSpan, None] = None, populate_versions = False,
+                    session: Optional[IngestSession] = None, conn: Optional[psycopg2.extensions.connection] = None,
+                    extend_data_span: bool = False):
+    """
+    Ensure the metadata records describing a dataset exist, updating its recorded data span if one is provided.  If
+    extend_data_span is True, the recorded span is extended to include data_span, rather than being replaced by it.
+
+    All statements are executed in a single transaction (conn's transaction, if provided), as prepared statements if a
+    session is provided.
+    """
     if populate_versions:
         raise NotImplementedError(f'update_metadata() does not yet support populate_versions - go ahead and implement population of queries from available table names')
 
-    with get_db_connection() as conn, conn.cursor() as cur:
-
+    with open_connection(session, conn=conn) as conn, conn.cursor() as cur:
         sql = """
             INSERT INTO _meta_dataproducts
-            VALUES (DEFAULT, %(name)s, %(label)s)
+            VALUES (DEFAULT, %s, %s)
             ON CONFLICT DO NOTHING;
             """
-        cur.execute(sql, {'name': dataset.product.get_full_id(), 'label': dataset.product.get_full_id()})
-        conn.commit()
+        execute_statement(cur, 'meta_insert_dataproduct', sql,
+                          [dataset.product.get_full_id(), dataset.product.get_full_id()], session)
 
-    with get_db_connection() as conn, conn.cursor() as cur:
         sql = """
             INSERT INTO _meta_instruments
-            VALUES (DEFAULT, %(name)s, %(label)s)
+            VALUES (DEFAULT, %s, %s)
             ON CONFLICT DO NOTHING;
             """
-        cur.execute(sql, {'name': dataset.instrument_id, 'label': dataset.instrument_id})
-        conn.commit()
+        execute_statement(cur, 'meta_insert_instrument', sql, [dataset.instrument_id, dataset.instrument_id], session)
 
-    with get_db_connection() as conn, conn.cursor() as cur:
         sql = """
             SELECT id
             FROM _meta_dataproducts
-            WHERE name = %(name)s;
+            WHERE name = %s;
         """
-        cur.execute(sql, {'name': dataset.product.get_full_id()})
+        execute_statement(cur, 'meta_select_dataproduct_id', sql, [dataset.product.get_full_id()], session)
         data_product_db_id = cur.fetchone()[0]
 
-    with get_db_connection() as conn, conn.cursor() as cur:
         sql = """
             SELECT id
             FROM _meta_instruments
-            WHERE name = %(name)s;
+            WHERE name = %s;
         """
-        cur.execute(sql, {'name': dataset.instrument_id})
+        execute_statement(cur, 'meta_select_instrument_id', sql, [dataset.instrument_id], session)
         instrument_db_id = cur.fetchone()[0]
 
-    with get_db_connection() as conn, conn.cursor() as cur:
         sql = """
             INSERT INTO _meta_dataproducts_versions
-            VALUES (DEFAULT, %(dataproduct)s, %(name)s, %(label)s)
+            VALUES (DEFAULT, %s, %s, %s)
             ON CONFLICT DO NOTHING;
             """
-        cur.execute(sql, {'dataproduct': data_product_db_id, 'name': str(dataset.version), 'label': str(dataset.version)})
+        execute_statement(cur, 'meta_insert_dataproduct_version', sql,
+                          [data_product_db_id, str(dataset.version), str(dataset.version)], session)
 
-    with get_db_connection() as conn, conn.cursor() as cur:
         sql = """
             SELECT id
             FROM _meta_dataproducts_versions
-            WHERE _meta_dataproducts_id= %(dataproduct)s AND name = %(name)s;
+            WHERE _meta_dataproducts_id= %s AND name = %s;
         """
-        cur.execute(sql, {'dataproduct': data_product_db_id, 'name': str(dataset.version)})
+        execute_statement(cur, 'meta_select_dataproduct_version_id', sql, [data_product_db_id, str(dataset.version)],
+                          session)
         dataproducts_versions_id = cur.fetchone()[0]
 
-    with get_db_connection() as conn, conn.cursor() as cur:
         sql = """
             INSERT INTO _meta_dataproducts_versions_instruments
             (_meta_dataproducts_versions_id, _meta_instruments_id)
-            VALUES (%(dataproduct_version)s, %(instrument)s)
+            VALUES (%s, %s)
             ON CONFLICT DO NOTHING;
         """
-        cur.execute(sql,
-                    {'dataproduct_version': dataproducts_versions_id, 'instrument': instrument_db_id})
-        conn.commit()
+        execute_statement(cur, 'meta_insert_dataproduct_version_instrument', sql,
+                          [dataproducts_versions_id, instrument_db_id], session)
 
-    if data_span is not None:
-        with get_db_connection() as conn, conn.cursor() as cur:
+        if data_span is not None and extend_data_span:
+            # LEAST()/GREATEST() ignore NULLs, so an unset span is replaced
+            sql = """
+                UPDATE _meta_dataproducts_versions_instruments
+                SET data_begin = LEAST(data_begin, %s), data_end = GREATEST(data_end, %s), last_updated = %s
+                WHERE _meta_dataproducts_versions_id = %s AND _meta_instruments_id = %s;
+            """
+            execute_statement(cur, 'meta_extend_data_span', sql,
+                              [data_span.begin, data_span.end, datetime.now(), dataproducts_versions_id,
+                               instrument_db_id], session)
+        elif data_span is not None:
             sql = """
                 UPDATE _meta_dataproducts_versions_instruments
-                SET data_begin = %(data_begin)s, data_end = %(data_end)s, last_updated = %(last_updated)s
-                WHERE _meta_dataproducts_versions_id = %(dataproduct)s AND _meta_instruments_id = %(instrument)s;
+                SET data_begin = %s, data_end = %s, last_updated = %s
+                WHERE _meta_dataproducts_versions_id = %s AND _meta_instruments_id = %s;
             """
-            cur.execute(sql, {'dataproduct': data_product_db_id, 'instrument': instrument_db_id, 'data_begin': data_span.begin, 'data_end': data_span.end, 'last_updated': datetime.now()})
-            conn.commit()
\ No newline at end of file
+            execute_statement(cur, 'meta_update_data_span', sql,
+                              [data_span.begin, data_span.end, datetime.now(), dataproducts_versions_id,
+                               instrument_db_id], session)
@@ -0,0 +1,154 @@
+import logging
+import os
+import re
+import threading
+import weakref
+from contextlib import contextmanager
+from typing import Iterator, Optional, Sequence, Set
+
+import psycopg2
+from psycopg2.pool import ThreadedConnectionPool
+
+from masschange.dataproducts.db.utils import get_db_connection
+from masschange.db.conn import get_db_connection_parameters
+
+log = logging.getLogger()
+
+
+class IngestSession:
+    """
+    Database state shared by the ingestion of many files, to avoid per-file connection and schema-check overhead.
+
+    Connections are drawn from a lazily-created pool, so may be used concurrently by several threads (for example, the
+    stages of an IngestPipeline), each holding at most one connection at a time.  Statements executed through
+    execute_prepared() are prepared once per pooled connection, then reused.  A session may not be shared between
+    processes.
+
+    Attributes
+        database (str | None): the name of the database, or None to use the TSDB_DATABASE environment variable
+
+        max_connections (int): the maximum number of connections held by the pool
+
+        ensured_table_names (Set[str]): the tables of datasets whose table and continuous aggregates have been ensured
+            during this session
+    """
+
+    def __init__(self, database: Optional[str] = None, max_connections: int = 4):
+        self.database = database
+        self.max_connections = max_connections
+        self.ensured_table_names: Set[str] = set()
+
+        self._pool: Optional[ThreadedConnectionPool] = None
+        self._pool_lock = threading.Lock()
+        # keyed by connection object rather than by id(), so that a connection's entry is discarded with it, and never
+        # inherited by a later connection which happens to be allocated the same id
+        self._prepared_statement_names: weakref.WeakKeyDictionary[
+            psycopg2.extensions.connection, Set[str]] = weakref.WeakKeyDictionary()
+
+    def __enter__(self) -> 'IngestSession':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    @contextmanager
+    def connection(self, autocommit: bool = False) -> Iterator[psycopg2.extensions.connection]:
+        """
+        Borrow a connection from the pool for the duration of the context.  The transaction is committed on exit, or
+        rolled back if an exception is raised.  If autocommit is True, each statement is committed as it is executed,
+        as is required by some statements (for example, refresh of continuous aggregates).
+        """
+        with self._pool_lock:
+            if self._pool is None:
+                database = self.database or os.environ['TSDB_DATABASE']
+                self._pool = ThreadedConnectionPool(1, self.max_connections, **get_db_connection_parameters(database))
+            pool = self._pool
+
+        conn = pool.getconn()
+        conn.autocommit = autocommit
+        try:
+            yield conn
+            if not autocommit:
+                conn.commit()
+        except BaseException:
+            self._reset_connection(conn)
+            raise
+        finally:
+            if not conn.closed:
+                conn.autocommit = False
+            pool.putconn(conn, close=bool(conn.closed))
+
+    def execute_prepared(self, cur: psycopg2.extensions.cursor, statement_name: str, sql: str,
+                         params: Sequence) -> None:
+        """
+        Execute sql (having positional %s placeholders) as the named prepared statement, preparing it on first use with
+        cur's connection.  statement_name must uniquely identify sql.
+        """
+        prepared_statement_names = self._prepared_statement_names.setdefault(cur.connection, set())
+        if statement_name not in prepared_statement_names:
+            placeholder_numbers = iter(range(1, len(params) + 1))
+            cur.execute(f'PREPARE {statement_name} AS {re.sub("%s", lambda _: f"${next(placeholder_numbers)}", sql)}')
+            prepared_statement_names.add(statement_name)
+
+        cur.execute(f'EXECUTE {statement_name} ({", ".join(["%s"] * len(params))})' if len(params) > 0
+                    else f'EXECUTE {statement_name}', params)
+
+    def close(self) -> None:
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.closeall()
+                self._pool = None
+            self._prepared_statement_names.clear()
+
+    def _reset_connection(self, conn: psycopg2.extensions.connection) -> None:
+        """Roll back a failed transaction, discarding the connection's prepared statements, or close the connection"""
+        # a failed transaction may or may not have prepared its statements, so start afresh
+        self._prepared_statement_names.pop(conn, None)
+        if conn.closed:
+            return
+        try:
+            conn.rollback()
+            conn.autocommit = True
+            with conn.cursor() as cur:
+                cur.execute('DEALLOCATE ALL;')
+        except psycopg2.Error as e:
+            log.warning(f'discarding unusable pooled connection: {e}')
+            conn.close()
+
+
+@contextmanager
+def open_connection(session: Optional[IngestSession] = None, autocommit: bool = False,
+                    conn: Optional[psycopg2.extensions.connection] = None) -> Iterator[psycopg2.extensions.connection]:
+    """
+    Borrow a connection from session (see IngestSession.connection()), or if no session is provided, open a new
+    connection which is closed on exit.  In either case, the transaction is committed on exit, or rolled back if an
+    exception is raised.
+
+    If conn is provided, it is used as-is, and control of its transaction is left to the caller, so that statements
+    from several functions may be executed within a single transaction.
+    """
+    if conn is not None:
+        yield conn
+        return
+
+    if session is not None:
+        with session.connection(autocommit=autocommit) as conn:
+            yield conn
+        return
+
+    conn = get_db_connection()
+    conn.autocommit = autocommit
+    try:
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def execute_statement(cur: psycopg2.extensions.cursor, statement_name: str, sql: str, params: Sequence,
+                      session: Optional[IngestSession] = None) -> None:
+    """Execute sql (having positional %s placeholders), as a prepared statement if a session is provided"""
+    if session is not None:
+        session.execute_prepared(cur, statement_name, sql, params)
+    else:
+        cur.execute(sql, params)
@@ -0,0 +1,99 @@
+import re
+from typing import Dict, Generic, Iterable, List, Pattern, Tuple, TypeVar
+
+T = TypeVar('T')
+
+_REGEX_METACHARACTERS = frozenset('.^$*+?{}[]\\|()')
+_REGEX_QUANTIFIERS = frozenset('*+?{')
+
+
+class FilenameDispatchTable(Generic[T]):
+    """
+    Routes filenames to the values (typically products) whose regex patterns match them.
+
+    Patterns are indexed by their literal prefix (see get_literal_prefix()), so that each filename is only matched
+    against the patterns which could possibly match it, and identical patterns are only matched once.  The cost of
+    routing a filename is therefore independent of the number of values in the table, provided that their patterns begin
+    with distinct literals.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, T]]):
+        """
+        Parameters
+        ----------
+        entries - (pattern, value) pairs, where the pattern is applied to filenames with re.match()
+        """
+        values_by_pattern: Dict[str, List[Tuple[int, T]]] = {}
+        for order, (pattern, value) in enumerate(entries):
+            values_by_pattern.setdefault(pattern, []).append((order, value))
+
+        self._patterns_by_prefix: Dict[str, List[Tuple[Pattern, List[Tuple[int, T]]]]] = {}
+        for pattern, values in values_by_pattern.items():
+            self._patterns_by_prefix.setdefault(get_literal_prefix(pattern), []).append((re.compile(pattern), values))
+        self._prefix_lengths = sorted({len(prefix) for prefix in self._patterns_by_prefix})
+
+    def match(self, filename: str) -> List[T]:
+        """Return the values whose patterns match filename, in the order in which they were provided"""
+        matched: List[Tuple[int, T]] = []
+        for length in self._prefix_lengths:
+            if length > len(filename):
+                break
+            for pattern, values in self._patterns_by_prefix.get(filename[:length], []):
+                if pattern.match(filename):
+                    matched.extend(values)
+
+        if len(matched) > 1:
+            matched.sort(key=lambda order_and_value: order_and_value[0])
+        return [value for _, value in matched]
+
+
+def get_literal_prefix(pattern: str) -> str:
+    """
+    Return a literal string with which every string matched by re.match(pattern) must begin.  The prefix is determined
+    conservatively, and is empty for patterns which do not begin with a plain literal (or which contain a top-level
+    alternation).
+    """
+    if _has_top_level_alternation(pattern):
+        return ''
+
+    i = 1 if pattern.startswith('^') else 0
+    prefix = []
+    while i < len(pattern) and pattern[i] not in _REGEX_METACHARACTERS:
+        prefix.append(pattern[i])
+        i += 1
+
+    # a quantifier applies to the preceding character, which is therefore not necessarily present
+    if i < len(pattern) and pattern[i] in _REGEX_QUANTIFIERS and len(prefix) > 0:
+        prefix.pop()
+
+    return ''.join(prefix)
+
+
+def _has_top_level_alternation(pattern: str) -> bool:
+    depth = 0
+    in_character_class = False
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if c == '\\':
+            i += 2
+            continue
+
+        if in_character_class:
+            in_character_class = c != ']'
+        elif c == '[':
+            in_character_class = True
+            # a closing bracket immediately following the opening bracket (or its negation) is literal
+            if pattern[i + 1:i + 2] == '^':
+                i += 1
+            if pattern[i + 1:i + 2] == ']':
+                i += 1
+        elif c == '(':
+            depth += 1
+        elif c == ')':
+            depth -= 1
+        elif c == '|' and depth == 0:
+            return True
+        i += 1
+
+    return False
@@ -1,6 +1,20 @@
 import os
 import re
-from typing import Iterable
+from typing import Iterable, List, Optional, Tuple, TypeVar
+
+from masschange.ingest.crawler.dispatch import FilenameDispatchTable
+from masschange.ingest.crawler.index import CrawlerIndex
+
+T = TypeVar('T')
+
+# if set, directory trees are enumerated incrementally using the crawler index at this path
+_crawler_index_path: Optional[str] = None
+
+
+def set_crawler_index_path(index_path: Optional[str]) -> None:
+    """Set the crawler index with which directory trees are enumerated, or None to walk them in full every time"""
+    global _crawler_index_path
+    _crawler_index_path = index_path
 
 
 def enumerate_files_in_dir_tree(root_dir: str, match_regex: str | None = None, match_filename_only: bool = False,
@@ -13,20 +27,39 @@ def enumerate_files_in_dir_tree(root_dir: str, match_regex: str | None = None, m
     root_dir - the root directory path under which to search
     match_regex - the match pattern applied to each filepath/filename
     match_filename_only - apply the match pattern to the filename only, rather than the full filepath
+    followlinks - descend into symlinked directories
 
     Returns
     -------
     an iterable collection of matching filepaths within the directory tree rooted at root_dir
 
     """
+    pattern = re.compile(match_regex) if match_regex is not None else None
 
-    for path, subdirs, filenames in os.walk(root_dir, followlinks=followlinks):
-        for filename in filenames:
-            filepath = os.path.join(path, filename)
-            match_target = filename if match_filename_only else filepath
+    if _crawler_index_path is not None:
+        with CrawlerIndex(_crawler_index_path) as index:
+            filepaths = index.scan(root_dir, followlinks=followlinks)
+    else:
+        filepaths = (os.path.join(path, filename) for path, subdirs, filenames in
+                     os.walk(root_dir, followlinks=followlinks) for filename in filenames)
 
-            if match_regex is None or re.match(match_regex, match_target):
-                yield filepath
+    for filepath in filepaths:
+        match_target = os.path.basename(filepath) if match_filename_only else filepath
+
+        if pattern is None or pattern.match(match_target):
+            yield filepath
+
+
+def dispatch_files_in_dir_tree(root_dir: str, dispatch_table: FilenameDispatchTable[T]) -> Iterable[
+    Tuple[str, List[T]]]:
+    """
+    Given a directory root and a dispatch table, provide a (filepath, matched values) pair for each file under it whose
+    filename is matched by any of the table's patterns.  The tree is walked once, however many patterns the table holds.
+    """
+    for filepath in enumerate_files_in_dir_tree(root_dir):
+        matched_values = dispatch_table.match(os.path.basename(filepath))
+        if len(matched_values) > 0:
+            yield filepath, matched_values
 
 
 def order_filepaths_by_filename(filepaths: Iterable[str]) -> Iterable[str]:
@@ -0,0 +1,215 @@
+import argparse
+import logging
+import os
+import sqlite3
+import time
+from datetime import datetime, timezone
+from typing import List, Optional, Set, Tuple
+
+log = logging.getLogger()
+
+
+class CrawlerIndex:
+    """
+    A persistent index of the directories and files within crawled directory trees, stored in a sqlite database.
+
+    Each scan of a tree stats every directory, but only lists (and stats the files of) those directories whose mtime
+    has changed since the previous scan, taking the contents of the others from the index.  As the mtime of a directory
+    only changes when entries are added to, removed from or renamed within it, files modified in place are detected
+    only once their directory is next re-listed.
+
+    A directory whose mtime is too recent to be trusted (as it may be modified again within the timestamp resolution
+    of the filesystem) is always re-listed on the next scan.
+
+    Attributes
+        index_path (str): the path of the sqlite database
+    """
+
+    # directories modified less than this long before a scan began are re-listed by the next scan
+    racy_mtime_ns = 2 * 10 ** 9
+
+    def __init__(self, index_path: str):
+        self.index_path = index_path
+        self._conn = sqlite3.connect(index_path, timeout=60)
+        self._conn.executescript("""
+            PRAGMA journal_mode = WAL;
+
+            CREATE TABLE IF NOT EXISTS scans
+            (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            root_dir TEXT NOT NULL,
+            started_at TEXT NOT NULL
+            );
+
+            CREATE INDEX IF NOT EXISTS scans_root_dir_idx ON scans (root_dir, id);
+
+            CREATE TABLE IF NOT EXISTS dirs
+            (
+            path TEXT PRIMARY KEY,
+            parent TEXT,
+            is_link INTEGER NOT NULL,
+            mtime_ns INTEGER
+            );
+
+            CREATE INDEX IF NOT EXISTS dirs_parent_idx ON dirs (parent);
+
+            CREATE TABLE IF NOT EXISTS files
+            (
+            path TEXT PRIMARY KEY,
+            dir TEXT NOT NULL,
+            name TEXT NOT NULL,
+            size INTEGER,
+            mtime_ns INTEGER,
+            changed_scan INTEGER NOT NULL
+            );
+
+            CREATE INDEX IF NOT EXISTS files_dir_idx ON files (dir);
+            CREATE INDEX IF NOT EXISTS files_changed_scan_idx ON files (changed_scan);
+        """)
+
+    def __enter__(self) -> 'CrawlerIndex':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def scan(self, root_dir: str, followlinks: bool = True) -> List[str]:
+        """
+        Bring the index of the tree rooted at root_dir up to date, returning the paths of all files within it, as they
+        would be enumerated by os.walk(root_dir).
+
+        Parameters
+        ----------
+        root_dir - the root directory path of the tree
+        followlinks - descend into symlinked directories
+
+        Returns
+        -------
+        the paths of all files within the tree
+
+        """
+        scan_started_ns = time.time_ns()
+        filepaths = []
+        listed_dir_count = 0
+        with self._conn:
+            scan_id = self._conn.execute('INSERT INTO scans (root_dir, started_at) VALUES (?, ?)',
+                                         [root_dir, datetime.now(timezone.utc).isoformat()]).lastrowid
+
+            pending_dirs: List[Tuple[str, Optional[str], bool]] = [(root_dir, None, False)]
+            while len(pending_dirs) > 0:
+                dir_path, parent, is_link = pending_dirs.pop()
+                try:
+                    mtime_ns = os.stat(dir_path).st_mtime_ns
+                except OSError:
+                    self._forget_tree(dir_path)
+                    continue
+
+                row = self._conn.execute('SELECT mtime_ns FROM dirs WHERE path = ?', [dir_path]).fetchone()
+                if row is not None and row[0] == mtime_ns:
+                    filepaths.extend(fp for fp, in self._conn.execute('SELECT path FROM files WHERE dir = ?',
+                                                                      [dir_path]))
+                    subdirs = self._conn.execute('SELECT path, is_link FROM dirs WHERE parent = ?',
+                                                 [dir_path]).fetchall()
+                else:
+                    listed_dir_count += 1
+                    dir_filepaths, subdirs, listed = self._relist_dir(dir_path, scan_id)
+                    filepaths.extend(dir_filepaths)
+                    if not listed or mtime_ns >= scan_started_ns - self.racy_mtime_ns:
+                        mtime_ns = None
+                    self._conn.execute('INSERT INTO dirs (path, parent, is_link, mtime_ns) VALUES (?, ?, ?, ?) '
+                                       'ON CONFLICT (path) DO UPDATE SET parent = excluded.parent, '
+                                       'is_link = excluded.is_link, mtime_ns = excluded.mtime_ns',
+                                       [dir_path, parent, int(is_link), mtime_ns])
+
+                pending_dirs.extend((subdir_path, dir_path, bool(subdir_is_link)) for subdir_path, subdir_is_link in
+                                    reversed(subdirs) if followlinks or not subdir_is_link)
+
+        log.debug(f'scanned {root_dir} ({len(filepaths)} files), re-listing {listed_dir_count} directories in '
+                  f'{(time.time_ns() - scan_started_ns) / 10 ** 9:.3f}s')
+        return filepaths
+
+    def get_new_files(self, root_dir: str) -> List[str]:
+        """
+        Return the paths of the files within the tree rooted at root_dir which were found to be new (or changed) by the
+        most recent scan of it.  Every file is new to the first scan of a tree.
+        """
+        return [fp for fp, in self._conn.execute(
+            'SELECT path FROM files WHERE changed_scan = (SELECT max(id) FROM scans WHERE root_dir = ?) ORDER BY path',
+            [root_dir])]
+
+    def _relist_dir(self, dir_path: str, scan_id: int) -> Tuple[List[str], List[Tuple[str, bool]], bool]:
+        """
+        Update the indexed files and subdirectories of a directory from its current listing, returning its filepaths,
+        its (subdirectory path, is symlink) pairs, and whether it could be listed
+        """
+        try:
+            entries = list(os.scandir(dir_path))
+            listed = True
+        except OSError:
+            entries = []
+            listed = False
+
+        indexed_files = {path: (size, mtime_ns) for path, size, mtime_ns in self._conn.execute(
+            'SELECT path, size, mtime_ns FROM files WHERE dir = ?', [dir_path])}
+
+        filepaths = []
+        subdirs = []
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+
+            if is_dir:
+                subdirs.append((entry.path, entry.is_symlink()))
+                continue
+
+            filepaths.append(entry.path)
+            try:
+                stat = entry.stat()
+            except OSError:
+                stat = entry.stat(follow_symlinks=False)
+            if indexed_files.get(entry.path) != (stat.st_size, stat.st_mtime_ns):
+                self._conn.execute('INSERT INTO files (path, dir, name, size, mtime_ns, changed_scan) '
+                                   'VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (path) DO UPDATE SET size = excluded.size, '
+                                   'mtime_ns = excluded.mtime_ns, changed_scan = excluded.changed_scan',
+                                   [entry.path, dir_path, entry.name, stat.st_size, stat.st_mtime_ns, scan_id])
+
+        removed_filepaths = set(indexed_files).difference(filepaths)
+        self._conn.executemany('DELETE FROM files WHERE path = ?', [[fp] for fp in removed_filepaths])
+
+        subdir_paths: Set[str] = {path for path, _ in subdirs}
+        for removed_subdir_path, in self._conn.execute('SELECT path FROM dirs WHERE parent = ?', [dir_path]).fetchall():
+            if removed_subdir_path not in subdir_paths:
+                self._forget_tree(removed_subdir_path)
+
+        return filepaths, subdirs, listed
+
+    def _forget_tree(self, dir_path: str) -> None:
+        """Remove a directory and everything beneath it from the index"""
+        # everything beneath the directory sorts between its path + separator and its path + (separator + 1)
+        lower, upper = dir_path + os.sep, dir_path + chr(ord(os.sep) + 1)
+        self._conn.execute('DELETE FROM dirs WHERE path = ? OR (path >= ? AND path < ?)', [dir_path, lower, upper])
+        self._conn.execute('DELETE FROM files WHERE dir = ? OR (dir >= ? AND dir < ?)', [dir_path, lower, upper])
+
+
+def get_args() -> argparse.Namespace:
+    ap = argparse.ArgumentParser(
+        prog='MassChange Crawler Index',
+        description='Update the crawler index of a directory tree, printing the files which are new since the tree was '
+                    'last scanned'
+    )
+    ap.add_argument('--index', required=True, dest='index_path', help='the path of the crawler index database')
+    ap.add_argument('--src', required=True, dest='src', help='the root directory to scan')
+    return ap.parse_args()
+
+
+if __name__ == '__main__':
+    args = get_args()
+    with CrawlerIndex(args.index_path) as index:
+        index.scan(args.src)
+        for fp in index.get_new_files(args.src):
+            print(fp)
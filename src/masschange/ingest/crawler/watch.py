@@ -0,0 +1,167 @@
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import sys
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+from masschange.ingest.crawler.enumeration import enumerate_files_in_dir_tree
+
+log = logging.getLogger()
+
+
+class FileWatcher(ABC):
+    """Watches a directory tree, reporting files which are created or modified within it once they are complete"""
+
+    def __init__(self, root_dir: str):
+        self.root_dir = root_dir
+
+    @abstractmethod
+    def get_changed_files(self, timeout: timedelta) -> List[str]:
+        """
+        Wait up to timeout for files to be created or modified, returning the paths of those which have been completely
+        written since the previous call (or since the watcher was created).  May return an empty list.
+        """
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyFileWatcher(FileWatcher):
+    """
+    Watches a directory tree using the Linux inotify API, reporting files once they are closed after writing, or moved
+    into the tree.  Directories created within the tree are watched as they appear.
+    """
+    _IN_CLOSE_WRITE = 0x00000008
+    _IN_MOVED_TO = 0x00000080
+    _IN_CREATE = 0x00000100
+    _IN_Q_OVERFLOW = 0x00004000
+    _IN_IGNORED = 0x00008000
+    _IN_ISDIR = 0x40000000
+    _WATCH_MASK = _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+
+    _EVENT_HEADER = struct.Struct('iIII')
+    _READ_SIZE = 64 * 1024
+
+    def __init__(self, root_dir: str):
+        super().__init__(root_dir)
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), f'inotify_init1() failed: {os.strerror(ctypes.get_errno())}')
+
+        self._dirs_by_watch_descriptor: Dict[int, str] = {}
+        self._watch_tree(root_dir)
+
+    @staticmethod
+    def is_available() -> bool:
+        return sys.platform.startswith('linux') and ctypes.util.find_library('c') is not None
+
+    def get_changed_files(self, timeout: timedelta) -> List[str]:
+        readable, _, _ = select.select([self._fd], [], [], timeout.total_seconds())
+        if len(readable) == 0:
+            return []
+
+        changed_filepaths = []
+        buffer = os.read(self._fd, self._READ_SIZE)
+        offset = 0
+        while offset < len(buffer):
+            watch_descriptor, mask, _, name_length = self._EVENT_HEADER.unpack_from(buffer, offset)
+            offset += self._EVENT_HEADER.size
+            name = buffer[offset:offset + name_length].rstrip(b'\0').decode()
+            offset += name_length
+
+            if mask & self._IN_Q_OVERFLOW:
+                log.warning(f'inotify event queue overflowed - rescanning {self.root_dir}')
+                changed_filepaths.extend(enumerate_files_in_dir_tree(self.root_dir))
+                continue
+
+            if mask & self._IN_IGNORED:
+                self._dirs_by_watch_descriptor.pop(watch_descriptor, None)
+                continue
+
+            dir_path = self._dirs_by_watch_descriptor.get(watch_descriptor)
+            if dir_path is None:
+                continue
+
+            path = os.path.join(dir_path, name)
+            if mask & self._IN_ISDIR:
+                if mask & (self._IN_CREATE | self._IN_MOVED_TO):
+                    # files may have been written to the directory before its watch was added
+                    self._watch_tree(path)
+                    changed_filepaths.extend(enumerate_files_in_dir_tree(path))
+            elif mask & (self._IN_CLOSE_WRITE | self._IN_MOVED_TO):
+                changed_filepaths.append(path)
+
+        return list(dict.fromkeys(changed_filepaths))
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+    def _watch_tree(self, root_dir: str) -> None:
+        for dir_path, _, _ in os.walk(root_dir, followlinks=True):
+            watch_descriptor = self._libc.inotify_add_watch(self._fd, dir_path.encode(), self._WATCH_MASK)
+            if watch_descriptor < 0:
+                log.warning(f'failed to watch {dir_path}: {os.strerror(ctypes.get_errno())}')
+                continue
+            self._dirs_by_watch_descriptor[watch_descriptor] = dir_path
+
+
+class PollingFileWatcher(FileWatcher):
+    """
+    Watches a directory tree by periodically comparing the size and mtime of each file it contains.  A new or modified
+    file is reported once its size and mtime are unchanged between two consecutive polls, indicating that it is no longer
+    being written.
+    """
+
+    def __init__(self, root_dir: str, poll_interval: timedelta = timedelta(seconds=10)):
+        super().__init__(root_dir)
+        self.poll_interval = poll_interval
+        self._snapshot = self._get_snapshot()
+        self._unsettled_filepaths = set()
+        self._next_poll = datetime.now() + poll_interval
+
+    def get_changed_files(self, timeout: timedelta) -> List[str]:
+        wait = min(timeout, self._next_poll - datetime.now())
+        if wait > timedelta(0):
+            time.sleep(wait.total_seconds())
+        if datetime.now() < self._next_poll:
+            return []
+
+        self._next_poll = datetime.now() + self.poll_interval
+        previous_snapshot = self._snapshot
+        self._snapshot = self._get_snapshot()
+
+        settled_filepaths = [fp for fp in sorted(self._unsettled_filepaths)
+                             if fp in self._snapshot and self._snapshot[fp] == previous_snapshot.get(fp)]
+        self._unsettled_filepaths = {fp for fp, stat in self._snapshot.items() if previous_snapshot.get(fp) != stat}
+        return settled_filepaths
+
+    def _get_snapshot(self) -> Dict[str, Tuple[int, float]]:
+        snapshot = {}
+        for fp in enumerate_files_in_dir_tree(self.root_dir):
+            try:
+                stat = os.stat(fp)
+            except FileNotFoundError:
+                continue
+            snapshot[fp] = (stat.st_size, stat.st_mtime)
+        return snapshot
+
+
+def get_file_watcher(root_dir: str, poll_interval: timedelta = timedelta(seconds=10),
+                     force_polling: bool = False) -> FileWatcher:
+    """Return an inotify-based watcher for root_dir where supported, falling back to a polling watcher otherwise"""
+    if not force_polling and InotifyFileWatcher.is_available():
+        try:
+            return InotifyFileWatcher(root_dir)
+        except OSError as e:
+            log.warning(f'inotify unavailable ({e}) - falling back to polling')
+
+    log.info(f'polling {root_dir} for changes every {poll_interval.total_seconds()} seconds')
+    return PollingFileWatcher(root_dir, poll_interval=poll_interval)
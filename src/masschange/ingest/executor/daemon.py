@@ -0,0 +1,202 @@
+import argparse
+import logging
+import os
+import signal
+import tarfile
+import tempfile
+from datetime import datetime, timedelta
+from typing import Collection, Dict, Iterable, List, Optional, Tuple
+
+from masschange.dataproducts.timeseriesdataproduct import TimeSeriesDataProduct
+from masschange.db.ensure import ensure_database_exists, ensure_metadata_tables_exist
+from masschange.db.session import IngestSession
+from masschange.ingest.crawler.enumeration import enumerate_files_in_dir_tree, order_filepaths_by_filename
+from masschange.ingest.crawler.watch import FileWatcher, get_file_watcher
+from masschange.ingest.executor.datafilereaders.base import DataFileSource
+from masschange.ingest.executor.ingest import IngestResult, group_by_dataset_table, resolve_datasets, \
+    get_input_file_dispatch_table, get_zipped_input_file_dispatch_table, ingest_file_group, \
+    get_tarball_product_data_files
+from masschange.ingest.executor.refresh import DeferredRefresher
+from masschange.utils.logging import configure_root_logger
+
+log = logging.getLogger()
+
+
+class IngestDaemon:
+    """
+    Continuously ingests new or modified input files (or tarballs) as they arrive in a watched directory tree.
+
+    Files arriving in quick succession are collected into a batch, which is ingested once no further files have arrived
+    for batch_delay (or once it holds max_batch_size files).  Files which are unchanged since they were last ingested
+    are skipped.  Continuous aggregate refreshes are deferred, and each dataset is refreshed at most once
+    per refresh_interval, over the merged spans of all files ingested for it since its previous refresh.
+
+    Attributes
+        watcher (FileWatcher): the watcher reporting new or modified files
+
+        batch_delay (timedelta): the period without new arrivals after which pending files are ingested
+
+        max_batch_size (int): the number of pending files at which they are ingested regardless of further arrivals
+
+        refresh_interval (timedelta): the minimum interval between refreshes of a dataset
+    """
+
+    def __init__(self, products: Collection[TimeSeriesDataProduct], watcher: FileWatcher,
+                 batch_delay: timedelta = timedelta(seconds=5), max_batch_size: int = 100,
+                 refresh_interval: timedelta = timedelta(minutes=1)):
+        self.watcher = watcher
+        self.batch_delay = batch_delay
+        self.max_batch_size = max_batch_size
+        self.refresh_interval = refresh_interval
+
+        self._input_file_dispatch_table = get_input_file_dispatch_table(products)
+        self._zipped_input_file_dispatch_table = get_zipped_input_file_dispatch_table(products)
+        self._refresher = DeferredRefresher()
+        self._session = IngestSession()
+        self._last_refreshed: Dict[str, datetime] = {}
+
+    def run(self, catch_up: bool = False) -> None:
+        """
+        Watch for and ingest files until stopped.  If catch_up is True, first ingest any files already present which are
+        not yet ingested.
+        """
+        pending_filepaths: Dict[str, None] = {}  # used as an insertion-ordered set
+        if catch_up:
+            pending_filepaths.update(dict.fromkeys(enumerate_files_in_dir_tree(self.watcher.root_dir)))
+        last_arrival = datetime.min
+
+        log.info(f'watching {self.watcher.root_dir} for new input files')
+        try:
+            while True:
+                changed_filepaths = self.watcher.get_changed_files(timeout=min(self.batch_delay, self.refresh_interval))
+                if len(changed_filepaths) > 0:
+                    log.debug(f'observed {len(changed_filepaths)} new or modified files')
+                    pending_filepaths.update(dict.fromkeys(changed_filepaths))
+                    last_arrival = datetime.now()
+
+                batch_is_due = datetime.now() - last_arrival >= self.batch_delay
+                if len(pending_filepaths) > 0 and (batch_is_due or len(pending_filepaths) >= self.max_batch_size):
+                    try:
+                        self.ingest_filepaths(list(pending_filepaths))
+                    except Exception as e:
+                        # the daemon must outlive any one batch, so report the failure and continue watching
+                        log.error(f'failed to ingest batch of {len(pending_filepaths)} files: {e}')
+                    pending_filepaths.clear()
+
+                self._refresh_due_datasets()
+        finally:
+            log.info('ingest daemon stopping - refreshing datasets with pending data')
+            self._refresher.flush()
+            self._session.close()
+            self.watcher.close()
+
+    def ingest_filepaths(self, filepaths: Collection[str]) -> List[IngestResult]:
+        """
+        Ingest a batch of input files and/or tarballs, deferring refreshes of their datasets.  Tarballs which cannot be
+        read, and files whose dataset cannot be determined, are recorded as failed.
+        """
+        results = []
+        for group in group_by_dataset_table(self.get_product_data_files(filepaths, failed_results=results),
+                                            failed_results=results):
+            results.extend(ingest_file_group(group, refresher=self._refresher, session=self._session))
+
+        ingested_count = len([r for r in results if r.status == IngestResult.SUCCEEDED])
+        if ingested_count > 0:
+            log.info(f'ingested {ingested_count} of {len(results)} matching files')
+        return results
+
+    def get_product_data_files(self, filepaths: Collection[str],
+                               failed_results: Optional[List[IngestResult]] = None) -> Iterable[
+        Tuple[TimeSeriesDataProduct, DataFileSource]]:
+        """
+        Route input files and tarballs to the products whose readers match them, in temporal order.  If a tarball cannot
+        be read, the remaining files are routed regardless, and a failed result for the tarball is appended to
+        failed_results (if provided) for each product it is matched by.
+        """
+        for fp in order_filepaths_by_filename(filepaths):
+            filename = os.path.split(fp)[-1]
+            tar_products = self._zipped_input_file_dispatch_table.match(filename)
+            if len(tar_products) > 0:
+                try:
+                    yield from get_tarball_product_data_files(fp, get_input_file_dispatch_table(tar_products))
+                except (OSError, tarfile.TarError) as e:
+                    log.error(f'failed to read {fp}: {e}')
+                    if failed_results is not None:
+                        failed_results.extend(IngestResult(product.get_full_id(), fp, IngestResult.FAILED,
+                                                           error=f'{type(e).__name__}: {e}')
+                                              for product in tar_products)
+
+            for product in self._input_file_dispatch_table.match(filename):
+                yield product, fp
+
+    def _refresh_due_datasets(self) -> None:
+        now = datetime.now()
+        due_table_names = [table_name for table_name in self._refresher.pending_table_names
+                           if now - self._last_refreshed.get(table_name, datetime.min) >= self.refresh_interval]
+        if len(due_table_names) == 0:
+            return
+
+        try:
+            self._refresher.flush(due_table_names)
+        except Exception as e:
+            # pending data is retained by the refresher, so the refresh will be retried
+            log.error(f'failed to refresh {due_table_names}: {e}')
+
+        for table_name in due_table_names:
+            self._last_refreshed[table_name] = now
+
+
+def get_args() -> argparse.Namespace:
+    ap = argparse.ArgumentParser(
+        prog='MassChange Ingest Daemon',
+        description='Watch a local directory, ingesting product data to the database as it arrives'
+    )
+    ap.add_argument('--dataset', required=True, dest='datasets', nargs='+',
+                    help='the id(s) of the dataset(s) to ingest, or "all" to ingest every available dataset')
+    ap.add_argument('--src', required=True, dest='src', help='the root directory to watch for input files/tarballs')
+    ap.add_argument('--catch-up', dest='catch_up', action='store_true',
+                    help='on startup, ingest any files already present which are not yet ingested')
+    ap.add_argument('--batch-seconds', dest='batch_seconds', type=float, default=5,
+                    help='ingest pending files once none have arrived for this long (default: 5)')
+    ap.add_argument('--max-batch-size', dest='max_batch_size', type=int, default=100,
+                    help='ingest pending files once this many have arrived, regardless of further arrivals '
+                         '(default: 100)')
+    ap.add_argument('--refresh-seconds', dest='refresh_seconds', type=float, default=60,
+                    help='the minimum interval between aggregate refreshes of each dataset (default: 60)')
+    ap.add_argument('--poll', dest='force_polling', action='store_true',
+                    help='poll for changes rather than using inotify')
+    ap.add_argument('--poll-seconds', dest='poll_seconds', type=float, default=10,
+                    help='the polling interval, when polling for changes (default: 10)')
+
+    args = ap.parse_args()
+    try:
+        args.datasets = resolve_datasets(args.datasets)
+    except ValueError as e:
+        ap.error(str(e))
+
+    return args
+
+
+def _raise_system_exit(signum, frame):
+    raise SystemExit(f'received signal {signum}')
+
+
+if __name__ == '__main__':
+    args = get_args()
+
+    logs_root = os.environ.get('MASSCHANGE_INGEST_LOGS_ROOT') or tempfile.mkdtemp()
+    log_filepath = os.path.join(logs_root, f'ingest_daemon_{datetime.now().isoformat()}.log')
+    configure_root_logger(log_filepath=log_filepath)
+
+    database_name = os.environ['TSDB_DATABASE']
+    ensure_database_exists(database_name)
+    ensure_metadata_tables_exist(database_name)
+
+    # stop cleanly on termination, refreshing datasets with pending data
+    signal.signal(signal.SIGTERM, _raise_system_exit)
+
+    watcher = get_file_watcher(args.src, poll_interval=timedelta(seconds=args.poll_seconds),
+                               force_polling=args.force_polling)
+    daemon = IngestDaemon(args.datasets, watcher, batch_delay=timedelta(seconds=args.batch_seconds),
+                          max_batch_size=args.max_batch_size, refresh_interval=timedelta(seconds=args.refresh_seconds))
+    daemon.run(catch_up=args.catch_up)
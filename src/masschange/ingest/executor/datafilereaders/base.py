@@ -1,11 +1,15 @@
 from __future__ import annotations
 
+import io
+import itertools
 import os
 import re
 from abc import ABC, abstractmethod
 from collections.abc import Collection
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from typing import Any, Union, Type, Callable, Optional
+from typing import Any, Union, Type, Callable, Optional, IO, Iterator, List, Tuple
 
 import numpy as np
 import pandas as pd
@@ -14,6 +18,211 @@ from masschange.ingest.executor.errors import EmptyProductException
 from masschange.dataproducts.timeseriesdataproductfield import TimeSeriesDataProductField
 from masschange.dataproducts.timeseriesdatasetversion import TimeSeriesDatasetVersion
 from masschange.db.data.aggregations import Aggregation
+from masschange.db.ingest.stats import time_ingest_stage
+
+# A data file may be provided to a reader either as a filepath, or as a binary file-like object having a name attribute
+# (for example, an InMemoryDataFile read from a tarball member)
+DataFileSource = Union[str, IO]
+
+
+class InMemoryDataFile(io.BytesIO):
+    """
+    A binary buffer holding the contents of a data file, which may be provided to a DataFileReader in place of a
+    filepath.  The name should be the (possibly virtual) path of the data file, as its filename is used to identify the
+    dataset to which the data belongs.  The mtime (seconds since epoch), if known, is the modification time of the
+    original file.
+    """
+
+    def __init__(self, name: str, content: bytes, mtime: Optional[float] = None):
+        super().__init__(content)
+        self.name = name
+        self.mtime = mtime
+
+
+def get_data_file_name(source: DataFileSource) -> str:
+    """Return the path (or virtual path) of a data file source"""
+    return source if isinstance(source, (str, os.PathLike)) else source.name
+
+
+def get_data_file_size(source: DataFileSource) -> int:
+    """Return the size of a data file source's content, in bytes"""
+    if isinstance(source, (str, os.PathLike)):
+        return os.path.getsize(source)
+    if isinstance(source, io.BytesIO):
+        return len(source.getbuffer())
+    position = source.seek(0, io.SEEK_END)
+    source.seek(0)
+    return position
+
+
+@contextmanager
+def open_data_file(source: DataFileSource, mode: str = 'r', encoding: Optional[str] = None,
+                   newline: Optional[str] = None) -> Iterator[IO]:
+    """
+    Open a data file source for reading from its beginning, in text ('r') or binary ('rb') mode.  File-like sources are
+    rewound rather than reopened, and are left open on exit so that they may be read multiple times.  The encoding and
+    newline arguments apply to text mode, as for open().
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, mode, encoding=encoding, newline=newline) as f:
+            yield f
+        return
+
+    source.seek(0)
+    if 'b' in mode:
+        yield source
+    else:
+        text_stream = io.TextIOWrapper(source, encoding=encoding, newline=newline)
+        try:
+            yield text_stream
+        finally:
+            text_stream.detach()
+
+
+# the prefixes of the last line of the header of an ASCII data file
+_last_header_line_prefixes = ['# End of YAML header', 'END OF HEADER']
+
+# the number of processes used to parse the data section of a single large file (see set_parse_workers())
+_parse_workers = 1
+_parse_pool: Optional[ProcessPoolExecutor] = None
+
+
+def set_parse_workers(workers: int) -> None:
+    """
+    Set the number of processes used to parse the data section of a single large ASCII data file (see
+    AsciiDataFileReader.parallel_parse_min_bytes).  A value of 1 parses every file in the calling process.
+    """
+    global _parse_workers, _parse_pool
+    if workers < 1:
+        raise ValueError(f'parse workers must be at least 1 (got {workers})')
+
+    if _parse_pool is not None:
+        _parse_pool.shutdown()
+        _parse_pool = None
+    _parse_workers = workers
+
+
+# the engine with which the data sections of ASCII data files are parsed, unless set by the reader (see
+# set_parse_engine())
+parse_engines = ['loadtxt', 'pandas', 'pyarrow']
+_parse_engine = 'loadtxt'
+
+
+def set_parse_engine(engine: str) -> None:
+    """
+    Set the engine with which the data sections of ASCII data files are parsed into typed columns, one of
+    - loadtxt: numpy.loadtxt()
+    - pandas: the C engine of pandas.read_csv(), splitting rows by whitespace
+    - pyarrow: pyarrow.csv.read_csv(), splitting rows by single spaces, which requires that pyarrow is installed
+
+    All engines produce identical data.  Readers which set AsciiDataFileReader.parse_engine, or which parse their data
+    sections by other means, are unaffected.
+    """
+    global _parse_engine, _parse_pool
+    if engine not in parse_engines:
+        raise ValueError(f'unrecognised parse engine "{engine}" (expected one of {parse_engines})')
+
+    # parse workers inherit the engine when they are started
+    if _parse_pool is not None:
+        _parse_pool.shutdown()
+        _parse_pool = None
+    _parse_engine = engine
+
+
+def _get_parse_pool() -> ProcessPoolExecutor:
+    global _parse_pool
+    if _parse_pool is None:
+        _parse_pool = ProcessPoolExecutor(max_workers=_parse_workers)
+    return _parse_pool
+
+
+def _parse_data_byte_range(reader_cls: Type[AsciiDataFileReader], source: Union[str, bytes], begin: int,
+                           end: int) -> Optional[np.ndarray]:
+    """
+    Parse a newline-aligned byte range of a data section, read from the file at path source, or provided as bytes.
+    Return None if the range contains no data.
+    """
+    if isinstance(source, str):
+        with open(source, 'rb') as f:
+            f.seek(begin)
+            content = f.read(end - begin)
+    else:
+        content = source[begin:end]
+
+    if len(content.strip()) == 0:
+        return None
+
+    text_stream = io.TextIOWrapper(io.BytesIO(content))
+    return reader_cls._parse_data_section(text_stream)
+
+
+class TimestampColumns:
+    """
+    Declares the columns from which a reader derives each row's timestamp, as an offset from its reference epoch, so
+    that the timestamps of all rows may be derived at once rather than row by row.  Timestamps are rounded to the
+    nearest microsecond exactly as they would be by adding timedelta(seconds=..., microseconds=...) to the epoch.
+
+    Attributes
+        seconds_column (str): the column holding the (whole or fractional) number of seconds since the epoch
+
+        fraction_column (str | None): the column holding the sub-second part of the offset, if any
+
+        fraction_unit (str): the unit of the fraction column - "us" (microseconds) or "ns" (nanoseconds)
+    """
+
+    fraction_unit_divisors = {'us': 1, 'ns': 1000}
+
+    def __init__(self, seconds_column: str, fraction_column: Optional[str] = None, fraction_unit: str = 'us'):
+        if fraction_unit not in self.fraction_unit_divisors:
+            raise ValueError(f'unrecognised fraction unit "{fraction_unit}" (expected one of '
+                             f'{list(self.fraction_unit_divisors)})')
+
+        self.seconds_column = seconds_column
+        self.fraction_column = fraction_column
+        self.fraction_unit = fraction_unit
+
+    def can_derive(self, df: pd.DataFrame) -> bool:
+        """Return whether every row's offset is finite (timedelta rejects non-finite offsets, which are left to it)"""
+        columns = [self.seconds_column] + ([self.fraction_column] if self.fraction_column is not None else [])
+        return all(not np.issubdtype(df[column].dtype, np.floating) or np.isfinite(df[column].to_numpy()).all()
+                   for column in columns)
+
+    def derive(self, df: pd.DataFrame, epoch: datetime) -> pd.Series:
+        """Return the timestamp of each row of df as a datetime64[ns] series"""
+        # As timedelta does, split the offset into whole microseconds (summed exactly as integers) and a leftover
+        # fraction of a microsecond from each float component, then round the summed leftover half-to-even
+        whole_us, leftover_us = self._split_microseconds(df[self.seconds_column].to_numpy(), 1_000_000)
+        if self.fraction_column is not None:
+            fraction = df[self.fraction_column].to_numpy()
+            divisor = self.fraction_unit_divisors[self.fraction_unit]
+            if divisor != 1:
+                fraction = fraction.astype(np.float64) / divisor
+            fraction_whole_us, fraction_leftover_us = self._split_microseconds(fraction, 1)
+            whole_us = whole_us + fraction_whole_us
+            leftover_us = fraction_leftover_us + leftover_us
+
+        rounded_leftover_us = np.rint(leftover_us)
+        is_tie = np.abs(leftover_us - np.trunc(leftover_us)) == 0.5
+        if is_tie.any():
+            lower = np.floor(leftover_us)
+            rounded_leftover_us = np.where(is_tie & ((whole_us + lower.astype(np.int64)) % 2 != 0), lower + 1,
+                                           np.where(is_tie, lower, rounded_leftover_us))
+        offset_us = whole_us + rounded_leftover_us.astype(np.int64)
+
+        timestamps = np.datetime64(epoch, 'us') + offset_us.astype('timedelta64[us]')
+        return pd.Series(timestamps.astype('datetime64[ns]'), index=df.index)
+
+    @staticmethod
+    def _split_microseconds(values: np.ndarray, us_per_unit: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Split values in some unit into whole microseconds and a leftover fraction of a microsecond"""
+        if np.issubdtype(values.dtype, np.integer):
+            return values.astype(np.int64) * us_per_unit, np.zeros(len(values))
+
+        values = values.astype(np.float64)
+        whole_units = np.trunc(values)
+        us = (values - whole_units) * us_per_unit
+        whole_us = np.trunc(us)
+        return whole_units.astype(np.int64) * us_per_unit + whole_us.astype(np.int64), us - whole_us
 
 
 class DataFileReader(ABC):
@@ -41,31 +250,44 @@ class DataFileReader(ABC):
         pass
 
     @classmethod
-    def extract_instrument_id(cls, filepath: str) -> str:
+    def extract_instrument_id(cls, filepath: DataFileSource) -> str:
         """Extract instruments id from unzipped input file"""
-        filename = os.path.split(filepath)[-1]
+        filename = os.path.split(get_data_file_name(filepath))[-1]
         satellite_id_char = re.search(cls.get_input_file_default_regex(), filename).group('instrument_id')
         return satellite_id_char
 
     @classmethod
-    def extract_dataset_version(cls, filepath: str) -> TimeSeriesDatasetVersion:
+    def extract_dataset_version(cls, filepath: DataFileSource) -> TimeSeriesDatasetVersion:
         """Extract version id from unzipped input file"""
-        filename = os.path.split(filepath)[-1]
+        filename = os.path.split(get_data_file_name(filepath))[-1]
         dataset_version_id = re.search(cls.get_input_file_default_regex(), filename).group('dataset_version')
         return TimeSeriesDatasetVersion(dataset_version_id)
 
     @classmethod
     @abstractmethod
-    def load_data_from_file(cls, filepath: str) -> pd.DataFrame:
-        """Given a path to a source file, return a pandas dataframe containing fully-prepared/transformed data, ready
-        for insertion to the database."""
+    def load_data_from_file(cls, filepath: DataFileSource) -> pd.DataFrame:
+        """Given a path to a source file (or a file-like object containing its contents), return a pandas dataframe
+        containing fully-prepared/transformed data, ready for insertion to the database."""
         # TODO: if rcvtime/timestamp columns are consistent across data products, it may be appropriate to provide a
         #  default implementation here
         pass
 
+    @classmethod
+    def load_data_chunks(cls, filepath: DataFileSource, max_rows: int) -> Iterator[pd.DataFrame]:
+        """
+        Given a path to a source file (or a file-like object containing its contents), yield its fully-prepared data as
+        consecutive dataframes, each prepared from at most max_rows data rows of the file, so that arbitrarily large
+        files may be processed within bounded memory.  The concatenated dataframes are equal to the dataframe returned
+        by load_data_from_file().
+
+        This default implementation yields the whole file as a single dataframe, for readers which cannot parse files
+        incrementally.
+        """
+        yield cls.load_data_from_file(filepath)
+
     @classmethod
     @abstractmethod
-    def _load_raw_data_from_file(cls, filepath: str) -> np.ndarray:
+    def _load_raw_data_from_file(cls, filepath: DataFileSource) -> np.ndarray:
         """Given a path to a source file, extract data from the desired columns as a numpy ndarray"""
         pass
 
@@ -78,6 +300,26 @@ class DataFileReader(ABC):
 
 class AsciiDataFileReader(DataFileReader):
 
+    # data sections of at least this many bytes are split into newline-aligned byte ranges, which are parsed
+    # concurrently and concatenated in order, if more than one parse worker is configured (see set_parse_workers())
+    parallel_parse_min_bytes: int = 16 * 1024 ** 2
+
+    # whether the data section may be parsed incrementally by load_data_chunks(), which requires that the raw data is
+    # loaded by _parse_data_section() alone
+    supports_chunked_parse: bool = True
+
+    # the number of neighbouring rows on each side of a row which must be present when preparing its derived fields (for
+    # example, those which depend on the difference between consecutive rows), so that chunks are prepared as the whole
+    # file would be
+    chunk_context_rows: int = 0
+
+    # the columns from which timestamps are derived, or None to derive them row by row with populate_timestamp()
+    timestamp_columns: Optional[TimestampColumns] = None
+
+    # the engine with which _parse_data_section() parses the data section (see set_parse_engine()), or None to use the
+    # engine set for the process
+    parse_engine: Optional[str] = None
+
     @classmethod
     @abstractmethod
     def get_input_column_defs(cls) -> Collection[AsciiDataFileReaderColumn]:
@@ -93,32 +335,82 @@ class AsciiDataFileReader(DataFileReader):
         pass
 
     @classmethod
-    def get_header_line_count(cls, filename: str) -> int:
-        last_header_line_prefixes = ['# End of YAML header', 'END OF HEADER']
-
+    def get_header_line_count(cls, filename: DataFileSource) -> int:
         header_rows = 0
-        with open(filename) as f:
+        with open_data_file(filename) as f:
             for line in f:  # iterates lazily
                 header_rows += 1
-                for hdr_end_prefix in last_header_line_prefixes:
+                for hdr_end_prefix in _last_header_line_prefixes:
                     if line.startswith(hdr_end_prefix):
                         return header_rows
-        raise ValueError(f'Can not find the end of header in {filename}')
+        raise ValueError(f'Can not find the end of header in {get_data_file_name(filename)}')
 
     @classmethod
-    def load_data_from_file(cls, filepath: str) -> pd.DataFrame:
-        # It is currently assumed that rcvtime_intg and rcvtime_frac are common across most dataproducts.
-        # If this is not the case, refactoring will be necessary.
+    def load_data_from_file(cls, filepath: DataFileSource) -> pd.DataFrame:
         raw_data = cls._load_raw_data_from_file(filepath)
         if raw_data.size == 0:
-            raise EmptyProductException(f'{filepath} seems to have no data...')
+            raise EmptyProductException(f'{get_data_file_name(filepath)} seems to have no data...')
+
+        return cls._prepare_data(raw_data, filepath)
+
+    @classmethod
+    def load_data_chunks(cls, filepath: DataFileSource, max_rows: int) -> Iterator[pd.DataFrame]:
+        if not cls.supports_chunked_parse:
+            yield from super().load_data_chunks(filepath, max_rows)
+            return
+
+        # at least one row beyond the following context rows must be consumed by each chunk
+        max_rows = max(max_rows, cls.chunk_context_rows + 1)
+        header_line_count = cls.get_header_line_count(filepath)
+        yielded_data = False
+        with open_data_file(filepath) as f:
+            for _ in range(header_line_count):
+                f.readline()
+
+            # context lines are parsed with the chunks adjacent to them, but their rows are only yielded with their own
+            # chunk.  The following context lines of each chunk begin the next chunk
+            preceding_lines: List[str] = []
+            carried_lines: List[str] = []
+            while True:
+                lines = carried_lines + list(itertools.islice(f, max_rows - len(carried_lines)))
+                if len(lines) == 0:
+                    break
+
+                following_lines = []
+                while len(following_lines) < cls.chunk_context_rows and (line := f.readline()):
+                    if line.strip() != '':
+                        following_lines.append(line)
+                carried_lines = following_lines
+
+                raw_data = cls._parse_data_section(io.StringIO(''.join(preceding_lines + lines + following_lines)))
+                preceding_row_count = len(preceding_lines)
+                following_row_count = len(following_lines)
+                if cls.chunk_context_rows > 0:
+                    preceding_lines = (preceding_lines + [line for line in lines if line.strip() != ''])[
+                                      -cls.chunk_context_rows:]
+                if raw_data.size == 0 or len(raw_data) <= preceding_row_count + following_row_count:
+                    continue
+
+                df = cls._prepare_data(raw_data, filepath)
+                if preceding_row_count + following_row_count > 0:
+                    df = df.iloc[preceding_row_count:len(df) - following_row_count]
+                yield df
+                yielded_data = True
+
+        if not yielded_data:
+            raise EmptyProductException(f'{get_data_file_name(filepath)} seems to have no data...')
 
+    @classmethod
+    def _prepare_data(cls, raw_data: np.ndarray, filepath: DataFileSource) -> pd.DataFrame:
+        """Prepare a dataframe from the (non-empty) raw data parsed from some or all of a file's data section"""
+        # It is currently assumed that rcvtime_intg and rcvtime_frac are common across most dataproducts.
+        # If this is not the case, refactoring will be necessary.
         try:
             constant_columns = [column for column in cls.get_input_column_defs() if column.is_constant]
             for column in constant_columns:
                 cls._ensure_constant_column_value(column.name, column.const_value, raw_data)
         except ValueError as err:
-            raise ValueError(f'Const-valued column check failed for {filepath}: {err}')
+            raise ValueError(f'Const-valued column check failed for {get_data_file_name(filepath)}: {err}')
 
         # TODO: investigate whether dropping/excluding const columns prior to pd df construction improves performance
         #  at all
@@ -127,7 +419,8 @@ class AsciiDataFileReader(DataFileReader):
         # Append custom fields to the dataframe, if needed
         cls.append_derived_fields(df)
 
-        df['timestamp'] = df.apply(cls.populate_timestamp, axis=1)
+        with time_ingest_stage('timestamps'):
+            df['timestamp'] = cls.derive_timestamps(df)
 
         # Drop extraneous columns
         df = df.drop([col.name for col in cls.get_input_column_defs() if col.is_constant], axis=1)
@@ -135,9 +428,32 @@ class AsciiDataFileReader(DataFileReader):
         return df
 
     @classmethod
-    @abstractmethod
+    def derive_timestamps(cls, df: pd.DataFrame) -> pd.Series:
+        """
+        Derive the timestamp of each row of df, from the declared timestamp_columns where possible, or otherwise by
+        applying populate_timestamp() to each row
+        """
+        if cls.timestamp_columns is not None and cls.timestamp_columns.can_derive(df):
+            return cls.timestamp_columns.derive(df, cls.get_reference_epoch())
+
+        return df.apply(cls.populate_timestamp, axis=1)
+
+    @classmethod
     def populate_timestamp(cls, row) -> datetime:
-        pass
+        """
+        Return the timestamp of a single row.  Readers should declare their timestamp_columns instead where possible,
+        and only override this for timestamps which cannot be so declared.
+        """
+        if cls.timestamp_columns is None:
+            raise NotImplementedError(f'{cls.__name__} declares neither timestamp_columns nor populate_timestamp()')
+
+        columns = cls.timestamp_columns
+        fraction = 0
+        if columns.fraction_column is not None:
+            fraction = row[columns.fraction_column]
+            if columns.fraction_unit_divisors[columns.fraction_unit] != 1:
+                fraction = fraction / columns.fraction_unit_divisors[columns.fraction_unit]
+        return cls.get_reference_epoch() + timedelta(seconds=row[columns.seconds_column], microseconds=fraction)
 
     @classmethod
     def append_derived_fields(cls, df):
@@ -153,22 +469,118 @@ class AsciiDataFileReader(DataFileReader):
         pass
 
     @classmethod
-    def _load_raw_data_from_file(cls, filename: str) -> np.ndarray:
+    def _load_raw_data_from_file(cls, filename: DataFileSource) -> np.ndarray:
         header_line_count = cls.get_header_line_count(filename)
         # TODO: extract indices, descriptions, units dynamically from the header?
         # TODO: use prodflag and/or QC for filtering measurements?
 
-        column_defs = cls.get_input_column_defs()
-        data = np.loadtxt(
-            fname=filename,
-            skiprows=header_line_count,
+        if _parse_workers > 1:
+            data = cls._parse_data_section_in_parallel(filename, header_line_count)
+            if data is not None:
+                return data
+
+        with open_data_file(filename) as f:
+            for _ in range(header_line_count):
+                f.readline()
+            return cls._parse_data_section(f)
+
+    @classmethod
+    def get_parse_engine(cls) -> str:
+        """Return the engine with which _parse_data_section() parses the data section"""
+        return cls.parse_engine or _parse_engine
+
+    @classmethod
+    def _parse_data_section(cls, f: IO[str]) -> np.ndarray:
+        """Parse the data rows read from a text stream positioned after the header"""
+        column_defs = [col for col in cls.get_input_column_defs() if col.index is not None]
+        engine = cls.get_parse_engine()
+        if engine == 'pandas':
+            return cls._parse_data_section_with_pandas(f, column_defs)
+        elif engine == 'pyarrow':
+            return cls._parse_data_section_with_pyarrow(f, column_defs)
+
+        return np.loadtxt(
+            fname=f,
             delimiter=None,  # split rows by whitespace chunks
-            usecols=([col.index for col in column_defs if col.index is not None ]),
-            dtype=[(col.name, col.np_dtype) for col in column_defs if col.index is not None],
+            usecols=([col.index for col in column_defs]),
+            dtype=[(col.name, col.np_dtype) for col in column_defs],
             ndmin = 1 # set to 1 to prevent returning a single row as a list instead of array
         )
 
-        return data
+    @classmethod
+    def _parse_data_section_with_pandas(cls, f: IO[str], column_defs: List[AsciiDataFileReaderColumn]) -> np.ndarray:
+        """Parse the data section with the C engine of pandas.read_csv(), splitting rows by whitespace"""
+        # textual columns are read as str and converted along with the others, so that they are truncated as by loadtxt
+        read_dtypes = {col.index: str if _is_textual_dtype(col.np_dtype) else col.np_dtype for col in column_defs}
+        try:
+            # the default float parser of the C engine is inexact, so the round-trip parser is required to match loadtxt
+            df = pd.read_csv(f, sep=r'\s+', header=None, comment='#', usecols=list(read_dtypes), dtype=read_dtypes,
+                             engine='c', float_precision='round_trip')
+        except pd.errors.EmptyDataError:
+            return np.empty(0, dtype=_get_structured_dtype(column_defs))
+
+        return _to_structured_array([df[col.index].to_numpy() for col in column_defs], len(df), column_defs)
+
+    @classmethod
+    def _parse_data_section_with_pyarrow(cls, f: IO[str], column_defs: List[AsciiDataFileReaderColumn]) -> np.ndarray:
+        """Parse the data section with pyarrow.csv.read_csv(), splitting rows by single spaces"""
+        try:
+            import pyarrow
+            import pyarrow.csv
+        except ImportError:
+            raise ImportError('the pyarrow parse engine requires that pyarrow is installed')
+
+        data_section = _collapse_whitespace(f.read().encode())
+        if data_section.strip() == b'':
+            return np.empty(0, dtype=_get_structured_dtype(column_defs))
+
+        read_types = {f'f{col.index}': pyarrow.string() if _is_textual_dtype(col.np_dtype)
+                      else pyarrow.from_numpy_dtype(col.np_dtype) for col in column_defs}
+        read_csv_kwargs = dict(
+            read_options=pyarrow.csv.ReadOptions(autogenerate_column_names=True),
+            parse_options=pyarrow.csv.ParseOptions(delimiter=' '),
+            convert_options=pyarrow.csv.ConvertOptions(include_columns=list(read_types), column_types=read_types))
+        try:
+            table = pyarrow.csv.read_csv(io.BytesIO(data_section), **read_csv_kwargs)
+        except pyarrow.ArrowInvalid:
+            # pyarrow requires that all rows have the same number of fields, so the rows of files with a variable number
+            # of trailing fields are truncated to the fields which are used
+            used_field_count = max(col.index for col in column_defs) + 1
+            truncated_row_pattern = re.compile(rb'(?m)^((?:[^ \n]+ ){%d}[^ \n]+)[^\n]*' % (used_field_count - 1))
+            table = pyarrow.csv.read_csv(io.BytesIO(truncated_row_pattern.sub(rb'\1', data_section)), **read_csv_kwargs)
+        return _to_structured_array([table.column(f'f{col.index}').to_numpy() for col in column_defs],
+                                    table.num_rows, column_defs)
+
+    @classmethod
+    def _parse_data_section_in_parallel(cls, filename: DataFileSource, header_line_count: int) -> Optional[np.ndarray]:
+        """
+        Split the data section into one newline-aligned byte range per parse worker, parse the ranges concurrently with
+        _parse_data_section(), and concatenate the results in order.  Return None if the data section is smaller than
+        parallel_parse_min_bytes, or contains no data.
+        """
+        with open_data_file(filename, 'rb') as f:
+            for _ in range(header_line_count):
+                f.readline()
+            data_begin = f.tell()
+            data_end = f.seek(0, io.SEEK_END)
+            if data_end - data_begin < cls.parallel_parse_min_bytes:
+                return None
+
+            boundaries = [data_begin]
+            for i in range(1, _parse_workers):
+                f.seek(max(data_begin + (data_end - data_begin) * i // _parse_workers - 1, boundaries[-1]))
+                f.readline()  # advance to the start of the next line
+                boundaries.append(f.tell())
+            boundaries.append(data_end)
+
+            # in-memory sources are passed to the workers by value, while files are read by the workers themselves
+            source = filename if isinstance(filename, (str, os.PathLike)) else f.getvalue()
+
+        byte_ranges = [(begin, end) for begin, end in zip(boundaries[:-1], boundaries[1:]) if end > begin]
+        futures = [_get_parse_pool().submit(_parse_data_byte_range, cls, str(source) if isinstance(source, os.PathLike)
+                                            else source, begin, end) for begin, end in byte_ranges]
+        parts = [part for part in (future.result() for future in futures) if part is not None]
+        return np.concatenate(parts) if len(parts) > 0 else None
 
     @classmethod
     def _ensure_constant_column_value(cls, column_name: str, expected_value: Any, data: np.ndarray):
@@ -191,15 +603,77 @@ class AsciiDataFileReader(DataFileReader):
         return cls.get_input_column_defs()
 
 
+def _is_textual_dtype(dtype: np.dtype) -> bool:
+    return dtype.kind in 'OSU'
+
+
+def _collapse_whitespace(data: bytes) -> bytes:
+    """
+    Collapse each run of spaces and tabs within data to a single space, and remove them from the beginning and end of
+    each line, so that rows may be split by single spaces
+    """
+    # repeated replacement (which at least halves the length of every run) is far faster than regex substitution
+    data = data.replace(b'\t', b' ')
+    while b'  ' in data:
+        data = data.replace(b'  ', b' ')
+    return data.replace(b' \n', b'\n').replace(b'\n ', b'\n').strip(b' ')
+
+
+def _get_structured_dtype(column_defs: Collection[AsciiDataFileReaderColumn]) -> np.dtype:
+    return np.dtype([(col.name, col.np_dtype) for col in column_defs])
+
+
+def _to_structured_array(columns: List[np.ndarray], row_count: int,
+                         column_defs: List[AsciiDataFileReaderColumn]) -> np.ndarray:
+    """Assemble parsed columns into a structured array of the columns' dtypes, as produced by np.loadtxt()"""
+    data = np.empty(row_count, dtype=_get_structured_dtype(column_defs))
+    for col, values in zip(column_defs, columns):
+        data[col.name] = values
+    return data
+
+
+def _get_max_field_count(data_section: bytes) -> int:
+    """
+    Return an upper bound on the number of whitespace-separated fields in any line of a data section, being one more
+    than the greatest number of spaces and tabs in a line
+    """
+    chars = np.frombuffer(data_section, dtype=np.uint8)
+    line_starts = np.concatenate([[0], np.flatnonzero(chars[:-1] == ord('\n')) + 1])
+    is_separator = (chars == ord(' ')) | (chars == ord('\t'))
+    return int(np.max(np.add.reduceat(is_separator, line_starts, dtype=np.uint32))) + 1
+
+
+def _scatter_to_nullable_array(values: np.ndarray, rows: np.ndarray, row_count: int,
+                               dtype: Union[np.dtype, pd.api.extensions.ExtensionDtype]
+                               ) -> Union[np.ndarray, pd.api.extensions.ExtensionArray]:
+    """
+    Return an array of row_count elements of dtype, in which the given rows hold the given values (converted from
+    strings), and the others are missing.  Missing values are NaN in float arrays and pd.NA in extension (nullable)
+    arrays, and arrays of other dtypes are held as objects, with NaN for missing values.
+    """
+    if isinstance(dtype, pd.api.extensions.ExtensionDtype):
+        data = np.zeros(row_count, dtype=dtype.numpy_dtype)
+        data[rows] = values.astype(dtype.numpy_dtype)
+        missing = np.ones(row_count, dtype=bool)
+        missing[rows] = False
+        array = pd.array(data, dtype=dtype)
+        array[missing] = pd.NA
+        return array
+    elif dtype.kind == 'f':
+        data = np.full(row_count, np.nan, dtype=dtype)
+        data[rows] = values.astype(dtype)
+        return data
+    else:
+        data = np.full(row_count, np.nan, dtype=object)
+        data[rows] = values if _is_textual_dtype(dtype) else values.astype(dtype)
+        return data
+
+
 class DataFileWithProdFlagReader(AsciiDataFileReader):
 
     @classmethod
-    def load_data_from_file(cls, filepath: str) -> pd.DataFrame:
-
-        # get raw data as 2D array of strings
-        raw_data_as_str = cls._load_raw_data_from_file(filepath)
-        if raw_data_as_str.size == 0:
-            raise EmptyProductException(f'{filepath} seems to have no data...')
+    def _prepare_data(cls, raw_data_as_str: np.ndarray, filepath: DataFileSource) -> pd.DataFrame:
+        # raw data is a 2D array of strings
 
         # create an empty data frame
         df = pd.DataFrame()
@@ -214,11 +688,12 @@ class DataFileWithProdFlagReader(AsciiDataFileReader):
                 try:
                     cls._ensure_constant_array_value(column.name, column.const_value, values)
                 except ValueError as err:
-                    raise ValueError(f'Const-valued column check failed for {filepath}: {err}')
+                    raise ValueError(f'Const-valued column check failed for {get_data_file_name(filepath)}: {err}')
             else:
                 df[column.name] = values
         # add timestamp
-        df['timestamp'] = df.apply(cls.populate_timestamp, axis=1)
+        with time_ingest_stage('timestamps'):
+            df['timestamp'] = cls.derive_timestamps(df)
 
         # append variable schema data at the end of the frame
         cls.append_variable_schema_data(raw_data_as_str, df)
@@ -226,31 +701,28 @@ class DataFileWithProdFlagReader(AsciiDataFileReader):
         return df
 
     @classmethod
-    def _load_raw_data_from_file(cls, filename: str) -> np.ndarray:
-        header_line_count = cls.get_header_line_count(filename)
+    def _parse_data_section(cls, f: IO[str]) -> np.ndarray:
         # get data as arrays of strings, because data types for input
-        # columns are not known in advance
+        # columns are not known in advance.  Fields missing from the end of a row are None
 
         #  Provide read_csv with array of dummy column names,
         #  so the number of columns in the output data frame would be equal to the
         #  length of the name list
         dummy_column_names = [i for i in range(len(cls.get_input_column_defs()))]
-        df = pd.read_csv(filename, skiprows=header_line_count, header=None, sep=" +", dtype=str, engine='python',
-                         names=dummy_column_names)
-        return df.values
+        df = pd.read_csv(f, header=None, sep=r'\s+', dtype=str, engine='c', names=dummy_column_names)
+        return df.to_numpy(dtype=object, na_value=None)
 
     @classmethod
     def append_variable_schema_data(cls, raw_data_as_str: np.array, df: pd.DataFrame) -> pd.DataFrame:
-        # prepare data for variables defined in the prod_flag, with np.nan for missing data
+        # prepare data for variables defined in the prod_flag, with missing values for missing data
         prod_flag_data_expanded = cls._get_expanded_prod_flag_data(raw_data_as_str)
 
         # append prod_flag columns at the end
         prod_flag_col = [col for col in cls.get_input_column_defs() \
                          if isinstance(col, VariableSchemaAsciiDataFileReaderColumn)]
 
-        for i, col in enumerate(prod_flag_col):
-            # Use pd.array here to handle nullable int datatype pd.Int64Dtype
-            df[col.name] = pd.array(prod_flag_data_expanded[:, i], dtype=col.np_dtype)
+        for col, values in zip(prod_flag_col, prod_flag_data_expanded):
+            df[col.name] = values
 
     @classmethod
     def _get_prod_flag_column_position(cls) -> int:
@@ -274,14 +746,19 @@ class DataFileWithProdFlagReader(AsciiDataFileReader):
     @classmethod
     def _get_prod_flag_for_defined_columns(cls, orig_prod_flag: np.array) -> np.array:
         """
-        Get prod_flag as 2D numpy array of integer, drop columns of bits that are not defined
+        Get prod_flag as 2D numpy array of bool, drop columns of bits that are not defined
 
         orig_prod_flag: prod_flag data from the input file as 1D np.array of strings
         """
-        # convert original prod_flag into 2D array of int
-        prod_flag = np.array(list(map(list, orig_prod_flag))).astype(int)
+        # view the fixed-width bit strings as a 2D array of their ASCII character codes
+        prod_flag_bytes = np.array(orig_prod_flag, dtype=bytes)
+        prod_flag_chars = prod_flag_bytes.view(np.uint8).reshape(len(prod_flag_bytes), prod_flag_bytes.dtype.itemsize)
+        if not np.isin(prod_flag_chars, [ord('0'), ord('1')]).all():
+            first_bad = orig_prod_flag[np.flatnonzero(~np.isin(prod_flag_chars, [ord('0'), ord('1')]).all(axis=1))[0]]
+            raise ValueError(f'prod_flag "{first_bad}" is not a fixed-width string of binary digits')
+
         # flip left to right, to correspond the order of VariableSchemaAsciiDataFileReaderColumn
-        prod_flag = np.fliplr(prod_flag)
+        prod_flag = prod_flag_chars[:, ::-1] == ord('1')
 
         # drop columns for which  VariableSchemaAsciiDataFileReaderColumn is not defined
         bit_idx = [col.prod_flag_bit_index for col in cls.get_input_column_defs() \
@@ -289,23 +766,36 @@ class DataFileWithProdFlagReader(AsciiDataFileReader):
         return prod_flag[:, bit_idx]
 
     @classmethod
-    def _get_expanded_prod_flag_data(cls, raw_data):
+    def _get_expanded_prod_flag_data(cls, raw_data) -> List[Union[np.ndarray, pd.api.extensions.ExtensionArray]]:
+        """
+        Return the data of each VariableSchemaAsciiDataFileReaderColumn (in order of definition) as an array of its
+        values_dtype, with missing values in rows whose prod_flag does not set its bit.  The data fields of each row are
+        taken by its set bits in order.
+        """
         prod_flag_orig = raw_data[:, cls._get_prod_flag_column_position()]
         prod_flag = cls._get_prod_flag_for_defined_columns(prod_flag_orig)
 
         start_of_prod_flag_data = cls._get_first_prod_flag_data_column_position()
         prod_flag_data = raw_data[:, start_of_prod_flag_data:]
 
-        # drop all None from prod_flag_data
-        prod_flag_data = prod_flag_data[np.not_equal(prod_flag_data, None)]
+        # every data field must be taken by a defined bit, and vice versa
+        field_counts = np.count_nonzero(pd.notna(prod_flag_data), axis=1)
+        mismatched_rows = np.flatnonzero(field_counts != np.count_nonzero(prod_flag, axis=1))
+        if mismatched_rows.size > 0:
+            raise ValueError(f'prod_flag "{prod_flag_orig[mismatched_rows[0]]}" does not match the number of data '
+                             f'fields ({field_counts[mismatched_rows[0]]}) in row {mismatched_rows[0]}')
 
-        # init 2D np array of objects with np.nan
-        prod_flag_expanded_data = np.full(prod_flag.shape, np.nan, dtype=object)
+        # the data field of each set bit is given by the number of set bits preceding it
+        field_idx = np.cumsum(prod_flag, axis=1) - 1
 
-        # populate array with data from input file according to prod_flag
-
-        prod_flag_expanded_data[np.where(prod_flag == 1)] = prod_flag_data
-        return prod_flag_expanded_data
+        prod_flag_col = [col for col in cls.get_input_column_defs()
+                         if isinstance(col, VariableSchemaAsciiDataFileReaderColumn)]
+        expanded_data = []
+        for i, col in enumerate(prod_flag_col):
+            rows = np.flatnonzero(prod_flag[:, i])
+            expanded_data.append(_scatter_to_nullable_array(prod_flag_data[rows, field_idx[rows, i]], rows,
+                                                            len(raw_data), col.values_dtype))
+        return expanded_data
 
 class ReportFileReader(AsciiDataFileReader):
     """
@@ -354,12 +844,10 @@ class ReportFileReader(AsciiDataFileReader):
         """
         return []
 
-    @classmethod
-    def populate_timestamp(cls, row) -> datetime:
-        return cls.get_reference_epoch() + timedelta(seconds=row.first_data_point_t_tag)
+    timestamp_columns = TimestampColumns('first_data_point_t_tag')
 
     @classmethod
-    def get_header_line_count(cls, filename: str) -> int:
+    def get_header_line_count(cls, filename: DataFileSource) -> int:
         return 0
 
 
@@ -371,78 +859,45 @@ class VariableDataClustersPerRowReader(AsciiDataFileReader):
     """
 
     @classmethod
-    def _get_max_num_of_clusters_per_row(cls, filename):
-        header_line_count = cls.get_header_line_count(filename)
-
-        # Read clusters-per-row counter from the data file to calculate max number of columns
-        counter_col_name = cls._get_clusters_counter_col_name()
-        column_defs = cls.get_input_column_defs()
-        data = np.loadtxt(
-            fname=filename,
-            skiprows=header_line_count,
-            delimiter=None,  # split rows by whitespace chunks
-            usecols=([col.index for col in column_defs if col.name == counter_col_name]),
-            dtype=[(col.name, col.np_dtype) for col in column_defs if col.name == counter_col_name]
-        )
-        return int(np.max(data[counter_col_name]))
-
-    @classmethod
-    def _columns_idx_to_drop(cls, n_cols):
-        column_defs = cls.get_input_column_defs()
-        idx_to_keep = [col.index for col in column_defs if not isinstance(col, DerivedAsciiDataFileReaderColumn)]
-        clusters_start_pos = cls._get_first_cluster_column_position()
-        return  [i for i in range(n_cols) if i not in idx_to_keep and i < clusters_start_pos]
-
-    @classmethod
-    def _load_raw_data_from_file(cls, filename: str) -> np.ndarray:
-
+    def _parse_data_section(cls, f: IO[str]) -> np.ndarray:
+        column_defs = list(cls.get_input_column_defs())
         clusters_start_pos = cls._get_first_cluster_column_position()
         cluster_size = cls._get_num_variables_in_cluster()
 
-        # calculate number of columns we need to read the data
-        n_cols = clusters_start_pos + cls._get_max_num_of_clusters_per_row(filename) * cluster_size
+        data_section = f.read()
+        if data_section.strip() == '':
+            return np.empty(0, dtype=np.dtype([(col.name, col.np_dtype) for col in column_defs]))
 
-        # read all data to a data frame
-        dummy_column_names = [i for i in range(n_cols)]
-        df = pd.read_csv(filename, skiprows=cls.get_header_line_count(filename),
-                         header=None, sep=" +", dtype=str, engine='python', names=dummy_column_names)
+        # read all data to a 2D array of strings, padded with NaN, which is wide enough for the longest row
+        dummy_column_names = [i for i in range(_get_max_field_count(data_section.encode()))]
+        data = pd.read_csv(io.StringIO(data_section), header=None, sep=r'\s+', dtype=str, engine='c',
+                           names=dummy_column_names).to_numpy(dtype=object)
+        del data_section
 
-        # drop columns that we don't need
-        df = df.drop(df.columns[cls._columns_idx_to_drop(n_cols)], axis=1)
-
-        # calculate number of rows in the reformatted frame, where we will have one cluster per row
-        column_defs = cls.get_input_column_defs()
         counter_idx = [col.index for col in column_defs if \
                        col.name == cls._get_clusters_counter_col_name()][0]
         # TODO: check if idx is found
-
-        n_reformat_rows = np.sum(df[counter_idx].astype('int'))
-        n_reformat_col = len(column_defs)
-        # create 2D array to hold reformatted data
-        reformat_array = np.full((n_reformat_rows, n_reformat_col), np.nan, dtype=object)
-
-        # create 1D array to hold data for a row in the reformatted array
-        reformat_row = np.full(n_reformat_col, np.nan, dtype=object)
-
-        reformat_array_idx = 0
-
-        # iterate over each row in the raw data array and populate the reformatted array
-        df = df.reset_index()  # make sure indexes pair with number of rows
-        num_prefix_col = len([col.index for col in column_defs if not isinstance(col, DerivedAsciiDataFileReaderColumn)])
-        for index, row in df.iterrows():
-            n_clusters_in_row = int(row[counter_idx])
-            row = row[1:]
-            for i in range(n_clusters_in_row):
-                reformat_row[0:num_prefix_col] = row.values[:num_prefix_col]
-                reformat_row[num_prefix_col:] = \
-                    row.values[num_prefix_col + i*cluster_size: num_prefix_col + (i+1) * cluster_size]
-
-                reformat_array[reformat_array_idx] = reformat_row
-                reformat_array_idx = reformat_array_idx + 1
-
-        # convert to structured array, so we can use load_data_from_file from the parent class
-        return np.core.records.fromarrays(reformat_array.transpose(),
-                                          dtype=np.dtype([(col.name, col.np_dtype) for col in column_defs]))
+        clusters_per_row = data[:, counter_idx].astype('int')
+        max_clusters_per_row = int(np.max(clusters_per_row))
+
+        # view the clusters of each row as a (row, cluster, variable) array, keeping those within each row's count
+        clusters_end_pos = clusters_start_pos + max_clusters_per_row * cluster_size
+        if clusters_end_pos > data.shape[1]:
+            data = np.pad(data, [(0, 0), (0, clusters_end_pos - data.shape[1])], constant_values=np.nan)
+        clusters = data[:, clusters_start_pos:clusters_end_pos].reshape(len(data), max_clusters_per_row, cluster_size)
+        clusters = clusters[np.arange(max_clusters_per_row) < clusters_per_row[:, np.newaxis]]
+
+        # populate a structured array (so we can use load_data_from_file from the parent class) with one cluster per
+        # row, repeating the columns preceding the clusters of each row once per cluster (after conversion, which is
+        # therefore performed once per row)
+        reformatted = np.empty(len(clusters), dtype=np.dtype([(col.name, col.np_dtype) for col in column_defs]))
+        idx_to_keep = [col.index for col in column_defs if not isinstance(col, DerivedAsciiDataFileReaderColumn)]
+        prefix_idx = [i for i in range(clusters_start_pos) if i in idx_to_keep]
+        for col, idx in zip(column_defs, prefix_idx):
+            reformatted[col.name] = np.repeat(data[:, idx].astype(col.np_dtype), clusters_per_row)
+        for col, i in zip(column_defs[len(prefix_idx):], range(cluster_size)):
+            reformatted[col.name] = clusters[:, i]
+        return reformatted
 
     @classmethod
     @abstractmethod
@@ -473,48 +928,63 @@ class LogFileReader(AsciiDataFileReader):
     Data reader for log files.
     Log files have log messages in free format after '>' delimiter
     """
-    @classmethod
-    def _load_raw_data_from_file(cls, filename: str) -> np.ndarray:
-
-        header_line_count = cls.get_header_line_count(filename)
-        column_defs = cls.get_input_column_defs()
-
-        # read fixed format columns
-        data = np.loadtxt(
-            fname=filename,
-            skiprows=header_line_count,
-            delimiter=None,  # split rows by whitespace chunks
-            usecols=([col.index for col in column_defs if col.index is not None]),
-            dtype=[(col.name, col.np_dtype) for col in column_defs if col.index is not None],
-            ndmin=1  # set to 1 to prevent returning a single row as a list instead of array
-        )
 
-        # read log data after '>' delimiter
-        log_col_name = cls.log_msg_column_name()
-        logs = np.loadtxt(
-            fname=filename,
-            skiprows=header_line_count,
-            delimiter=">",
-            usecols=[1],
-            dtype=[(log_col_name, f'U{cls.log_msg_max_size()}')],
-            ndmin=1
-        )
+    # the raw data is loaded from the whole file, rather than by _parse_data_section()
+    supports_chunked_parse = False
 
-        # replace commas with semicolons, because commas break conversion to csv during ingestion
-        # TODO: another option is to update ingestion code to use escape char for commas:
-        #  df.to_csv(buffer, header=False, index=False, quoting=csv.QUOTE_NONE, escapechar='\\'))
-        #  In this case, commas will be replaced with '\,' in the record
+    # the text encoding of the log file
+    log_file_encoding: str = 'utf-8'
 
-        clean_logs = np.char.replace(logs[log_col_name], ',', ';')
+    # whether rows having an empty log message are dropped
+    drop_empty_log_messages: bool = False
 
-        # convert to data frame, because it is easier to append a column to a dataframe
-        df = pd.DataFrame(data)
-        # append log messages to the dataframe
-        df[log_col_name] = clean_logs
-
-        # convert back to structured array, so we can use load_data_from_file from the parent class
-        return np.core.records.fromarrays(df.values.transpose(),
-                                          dtype=np.dtype([(col.name, col.np_dtype) for col in column_defs]))
+    @classmethod
+    def _load_raw_data_from_file(cls, filename: DataFileSource) -> np.ndarray:
+        column_defs = cls.get_input_column_defs()
+        fixed_column_defs = [col for col in column_defs if col.index is not None]
+        max_field_index = max(col.index for col in fixed_column_defs)
+
+        # read the fixed format columns and the log message after the '>' delimiter in a single pass, into one buffer
+        # per column
+        fixed_columns: List[List[str]] = [[] for _ in fixed_column_defs]
+        logs: List[str] = []
+        # lines are terminated by '\n' alone, as stray carriage returns within lines are discarded
+        with open_data_file(filename, encoding=cls.log_file_encoding, newline='\n') as f:
+            for line in f:
+                if line.startswith(tuple(_last_header_line_prefixes)):
+                    break
+            else:
+                raise ValueError(f'Can not find the end of header in {get_data_file_name(filename)}')
+
+            for line in f:
+                line = line.replace('\r', '')
+                fields, delimiter, log_msg = line.partition('>')
+                if not delimiter:
+                    if fields.strip() == '' or fields.lstrip().startswith('#'):
+                        continue
+                    raise ValueError(f'missing ">" log message delimiter in line "{line.strip()}" of '
+                                     f'{get_data_file_name(filename)}')
+
+                log_msg = log_msg.rstrip()
+                if log_msg == '' and cls.drop_empty_log_messages:
+                    continue
+
+                fields = fields.split(maxsplit=max_field_index + 1)
+                for values, col in zip(fixed_columns, fixed_column_defs):
+                    values.append(fields[col.index])
+                # replace commas with semicolons, because commas break conversion to csv during ingestion
+                # TODO: another option is to update ingestion code to use escape char for commas:
+                #  df.to_csv(buffer, header=False, index=False, quoting=csv.QUOTE_NONE, escapechar='\\'))
+                #  In this case, commas will be replaced with '\,' in the record
+                logs.append(log_msg.replace(',', ';'))
+
+        # log messages longer than log_msg_max_size() are truncated by the conversion to the column's dtype
+        log_col_name = cls.log_msg_column_name()
+        data = np.empty(len(logs), dtype=np.dtype([(col.name, col.np_dtype) for col in column_defs]))
+        for values, col in zip(fixed_columns, fixed_column_defs):
+            data[col.name] = np.array(values, dtype=str)
+        data[log_col_name] = np.array(logs, dtype=str)
+        return data
 
     @classmethod
     @abstractmethod
@@ -618,8 +1088,12 @@ class VariableSchemaAsciiDataFileReaderColumn(AsciiDataFileReaderColumn):
 
     Attributes
         prod_flag_bit_index (int): the index of the bit for this variable in the prod_flag, right to left, 0-based
+
+        values_dtype (np.dtype | ExtensionDtype): the dtype of the column's values in parsed data.  Unlike np_dtype,
+         this retains pandas nullable types (such as pd.Int64Dtype), so that such columns are not held as objects
     """
     prod_flag_bit_index: int
+    values_dtype: Union[np.dtype, pd.api.extensions.ExtensionDtype]
 
     def __init__(self, prod_flag_bit_index: int, name: str, np_type: Union[Type, str], unit: Union[str, None], description='',
                  aggregations: Collection[str] = None, transform: Union[Callable[[Any], Any], None] = None,
@@ -627,6 +1101,9 @@ class VariableSchemaAsciiDataFileReaderColumn(AsciiDataFileReaderColumn):
         super().__init__(None, name, np_type, unit, description=description, aggregations=aggregations, transform=transform,
                          const_value=const_value, is_time_series_id_column=is_time_series_id_column)
         self.prod_flag_bit_index = prod_flag_bit_index
+        if isinstance(np_type, type) and issubclass(np_type, pd.api.extensions.ExtensionDtype):
+            np_type = np_type()
+        self.values_dtype = pd.api.types.pandas_dtype(np_type)
 
 
 class DerivedAsciiDataFileReaderColumn(AsciiDataFileReaderColumn):
@@ -1,12 +1,14 @@
 from collections.abc import Collection
-from datetime import datetime, timedelta
+from datetime import datetime
 
 import numpy as np
 
-from masschange.ingest.executor.datafilereaders.base import AsciiDataFileReader, AsciiDataFileReaderColumn
+from masschange.ingest.executor.datafilereaders.base import AsciiDataFileReader, AsciiDataFileReaderColumn, TimestampColumns
 
 
 class GraceFOAct1ADataFileReader(AsciiDataFileReader):
+    timestamp_columns = TimestampColumns('rcvtime_intg', 'rcvtime_frac')
+
     @classmethod
     def get_reference_epoch(cls) -> datetime:
         return datetime(2000, 1, 1, 12)
@@ -44,7 +46,3 @@ class GraceFOAct1ADataFileReader(AsciiDataFileReader):
                                       aggregations=['min', 'max']),
             AsciiDataFileReaderColumn(index=12, name='icu_blk_nr', np_type=int, unit=None)
         ]
-
-    @classmethod
-    def populate_timestamp(cls, row) -> datetime:
-        return cls.get_reference_epoch() + timedelta(seconds=row.rcvtime_intg, microseconds=row.rcvtime_frac)
@@ -1,12 +1,14 @@
 from collections.abc import Collection
-from datetime import datetime, timedelta
+from datetime import datetime
 
 import numpy as np
 
-from masschange.ingest.executor.datafilereaders.base import AsciiDataFileReader, AsciiDataFileReaderColumn
+from masschange.ingest.executor.datafilereaders.base import AsciiDataFileReader, AsciiDataFileReaderColumn, TimestampColumns
 
 
 class GraceFOAct1BDataFileReader(AsciiDataFileReader):
+    timestamp_columns = TimestampColumns('gps_time')
+
     @classmethod
     def get_reference_epoch(cls) -> datetime:
         return datetime(2000, 1, 1, 12)
@@ -41,7 +43,3 @@ class GraceFOAct1BDataFileReader(AsciiDataFileReader):
             AsciiDataFileReaderColumn(index=10, name='acl_z_res', np_type=np.double, unit='m/s2'),
             AsciiDataFileReaderColumn(index=11, name='qualflg', np_type='U8', unit=None)
         ]
-
-    @classmethod
-    def populate_timestamp(cls, row) -> datetime:
-        return cls.get_reference_epoch() + timedelta(seconds=row.gps_time)
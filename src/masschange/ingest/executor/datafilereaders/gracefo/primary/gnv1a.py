@@ -1,12 +1,17 @@
 from collections.abc import Collection
-from datetime import datetime, timedelta
+from datetime import datetime
 
 import numpy as np
-from masschange.ingest.executor.datafilereaders.base import AsciiDataFileReader, AsciiDataFileReaderColumn, DerivedAsciiDataFileReaderColumn
+from masschange.ingest.executor.datafilereaders.base import AsciiDataFileReader, AsciiDataFileReaderColumn, DerivedAsciiDataFileReaderColumn, TimestampColumns
 from masschange.db.data.aggregations import NestedAggregation
 from masschange.db.data.geolocation import Geolocation
 
 class GraceFOGnv1ADataFileReader(AsciiDataFileReader):
+    timestamp_columns = TimestampColumns('rcv_time')
+
+    # the orbit direction of each row is derived from the following row (or for the last row, the preceding row)
+    chunk_context_rows = 1
+
     @classmethod
     def get_reference_epoch(cls) -> datetime:
         return datetime(2000, 1, 1, 12)
@@ -57,11 +62,6 @@ class GraceFOGnv1ADataFileReader(AsciiDataFileReader):
             DerivedAsciiDataFileReaderColumn(name='orbit_direction', np_type='U1', unit=None)
         ]
 
-    @classmethod
-    def populate_timestamp(cls, row) -> datetime:
-        return cls.get_reference_epoch() + timedelta(seconds=row.rcv_time)
-
     @classmethod
     def append_derived_fields(cls, df):
         Geolocation.append_location_fields(df)
-
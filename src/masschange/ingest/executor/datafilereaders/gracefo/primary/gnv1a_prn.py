@@ -1,12 +1,14 @@
 from collections.abc import Collection
-from datetime import datetime, timedelta
+from datetime import datetime
 
 import numpy as np
 
-from masschange.ingest.executor.datafilereaders.base import VariableDataClustersPerRowReader, AsciiDataFileReaderColumn, DerivedAsciiDataFileReaderColumn
+from masschange.ingest.executor.datafilereaders.base import VariableDataClustersPerRowReader, AsciiDataFileReaderColumn, DerivedAsciiDataFileReaderColumn, TimestampColumns
 
 
 class GraceFOGnv1APrnDataFileReader(VariableDataClustersPerRowReader):
+    timestamp_columns = TimestampColumns('rcv_time')
+
     @classmethod
     def get_reference_epoch(cls) -> datetime:
         return datetime(2000, 1, 1, 12)
@@ -31,10 +33,6 @@ class GraceFOGnv1APrnDataFileReader(VariableDataClustersPerRowReader):
             DerivedAsciiDataFileReaderColumn(name='az_prn', np_type=np.double, unit='degrees_E')
         ]
 
-    @classmethod
-    def populate_timestamp(cls, row) -> datetime:
-        return cls.get_reference_epoch() + timedelta(seconds=row.rcv_time)
-
     @classmethod
     def _get_first_cluster_column_position(cls) -> int:
         return 23
@@ -1,14 +1,16 @@
 from collections.abc import Collection
-from datetime import datetime, timedelta
+from datetime import datetime
 
 import numpy as np
 import pandas as pd
 
 from masschange.ingest.executor.datafilereaders.base import  DataFileWithProdFlagReader, \
-    AsciiDataFileReaderColumn, VariableSchemaAsciiDataFileReaderColumn
+    AsciiDataFileReaderColumn, VariableSchemaAsciiDataFileReaderColumn, TimestampColumns
 
 
 class GraceFOGps1ADataFileReader(DataFileWithProdFlagReader):
+    timestamp_columns = TimestampColumns('rcvtime_intg', 'rcvtime_frac')
+
     @classmethod
     def get_reference_epoch(cls) -> datetime:
         return datetime(2000, 1, 1, 12)
@@ -68,10 +70,6 @@ class GraceFOGps1ADataFileReader(DataFileWithProdFlagReader):
                                                     unit='V/V')
         ]
 
-    @classmethod
-    def populate_timestamp(cls, row) -> datetime:
-        return cls.get_reference_epoch() + timedelta(seconds=row.rcvtime_intg, microseconds=row.rcvtime_frac)
-
     @classmethod
     def _get_first_prod_flag_data_column_position(cls) -> int:
         return 7
\ No newline at end of file
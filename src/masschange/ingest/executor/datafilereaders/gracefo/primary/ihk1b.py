@@ -1,12 +1,14 @@
 from collections.abc import Collection
-from datetime import datetime, timedelta
+from datetime import datetime
 
 import numpy as np
 
-from masschange.ingest.executor.datafilereaders.base import AsciiDataFileReader, AsciiDataFileReaderColumn
+from masschange.ingest.executor.datafilereaders.base import AsciiDataFileReader, AsciiDataFileReaderColumn, TimestampColumns
 
 
 class GraceFOIhk1BDataFileReader(AsciiDataFileReader):
+    timestamp_columns = TimestampColumns('rcvtime_intg', 'rcvtime_frac')
+
     @classmethod
     def get_reference_epoch(cls) -> datetime:
         return datetime(2000, 1, 1, 12)
@@ -32,7 +34,3 @@ class GraceFOIhk1BDataFileReader(AsciiDataFileReader):
             AsciiDataFileReaderColumn(index=6, name='sensorvalue', np_type=np.double, unit="V (sensortype='V'), degK (sensortype='T'), A (sensortype='A')"),
             AsciiDataFileReaderColumn(index=7, name='sensorname', np_type='U2', unit=None, is_time_series_id_column=True),
         ]
-
-    @classmethod
-    def populate_timestamp(cls, row) -> datetime:
-        return cls.get_reference_epoch() + timedelta(seconds=row.rcvtime_intg, microseconds=row.rcvtime_frac)
@@ -1,12 +1,18 @@
 from collections.abc import Collection
-from datetime import datetime, timedelta
+from datetime import datetime
 
 import numpy as np
 
 from masschange.ingest.executor.datafilereaders.base import LogFileReader, AsciiDataFileReaderColumn, \
-    DerivedAsciiDataFileReaderColumn
+    DerivedAsciiDataFileReaderColumn, TimestampColumns
 
 class GraceFOIlg1ADataFileReader(LogFileReader):
+    timestamp_columns = TimestampColumns('rcv_time')
+
+    # The ILG files seems to be encoded with 'windows-1252'
+    log_file_encoding = 'windows-1252'
+    drop_empty_log_messages = True
+
     @classmethod
     def get_reference_epoch(cls) -> datetime:
         return datetime(2000, 1, 1, 12)
@@ -28,32 +34,6 @@ class GraceFOIlg1ADataFileReader(LogFileReader):
             DerivedAsciiDataFileReaderColumn(name='logpacket', np_type='U1000', unit=None)
         ]
 
-    @classmethod
-    def populate_timestamp(cls, row) -> datetime:
-        return cls.get_reference_epoch() + timedelta(seconds=row.rcv_time)
-
     @classmethod
     def log_msg_column_name(cls):
         return 'logpacket'
-
-    @classmethod
-    def _load_raw_data_from_file(cls, filename: str) -> np.ndarray:
-        # The ILG files seems to be encoded with 'windows-1252'
-        # Replace carriage return characters and decode with 'windows-1252'
-
-        contents = ''
-        with open(filename, "rb") as input_file:
-            while True:
-                line = input_file.readline().replace(b"\r", b"").decode('windows-1252').strip()
-                if not line:
-                    break
-                if line[-1] != ">":  # Remove rows with empty log message
-                    contents += line + '\n'
-
-        # create a tmp file for updated input data
-        import tempfile
-        with tempfile.NamedTemporaryFile(mode="w") as tmp:
-            tmp.write(contents)
-            tmp.seek(0)  # go back to the beginning to read data from the file
-            # read from tmp file
-            return super()._load_raw_data_from_file(tmp.name)
@@ -1,12 +1,14 @@
 from collections.abc import Collection
-from datetime import datetime, timedelta
+from datetime import datetime
 
 import numpy as np
 
 from masschange.ingest.executor.datafilereaders.base import LogFileReader, AsciiDataFileReaderColumn, \
-    DerivedAsciiDataFileReaderColumn
+    DerivedAsciiDataFileReaderColumn, TimestampColumns
 
 class GraceFOLlg1ADataFileReader(LogFileReader):
+    timestamp_columns = TimestampColumns('rcv_time')
+
     @classmethod
     def get_reference_epoch(cls) -> datetime:
         return datetime(2000, 1, 1, 12)
@@ -28,11 +30,6 @@ class GraceFOLlg1ADataFileReader(LogFileReader):
             DerivedAsciiDataFileReaderColumn(name='logpacket', np_type='U1000', unit=None)
         ]
 
-    @classmethod
-    def populate_timestamp(cls, row) -> datetime:
-        return cls.get_reference_epoch() + timedelta(seconds=row.rcv_time)
-
     @classmethod
     def log_msg_column_name(cls):
         return 'logpacket'
-
@@ -1,11 +1,13 @@
 from collections.abc import Collection
-from datetime import datetime, timedelta
+from datetime import datetime
 
 import numpy as np
 
-from masschange.ingest.executor.datafilereaders.base import AsciiDataFileReader, AsciiDataFileReaderColumn
+from masschange.ingest.executor.datafilereaders.base import AsciiDataFileReader, AsciiDataFileReaderColumn, TimestampColumns
 
 class GraceFOLlt1ADataFileReader(AsciiDataFileReader):
+    timestamp_columns = TimestampColumns('gps_time')
+
     @classmethod
     def get_reference_epoch(cls) -> datetime:
         return datetime(2000, 1, 1, 12)
@@ -44,8 +46,3 @@ class GraceFOLlt1ADataFileReader(AsciiDataFileReader):
 
             AsciiDataFileReaderColumn(index=10, name='qualflg', np_type='U8', unit=None),
         ]
-
-    @classmethod
-    def populate_timestamp(cls, row) -> datetime:
-        return cls.get_reference_epoch() + timedelta(seconds=row.gps_time)
-
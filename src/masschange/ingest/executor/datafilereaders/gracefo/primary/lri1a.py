@@ -1,14 +1,18 @@
 from collections.abc import Collection
-from datetime import datetime, timedelta
+from datetime import datetime
 
 import numpy as np
 import pandas as pd
 
 from masschange.ingest.executor.datafilereaders.base import DataFileWithProdFlagReader, \
-    AsciiDataFileReaderColumn, VariableSchemaAsciiDataFileReaderColumn
+    AsciiDataFileReaderColumn, VariableSchemaAsciiDataFileReaderColumn, TimestampColumns
 
 
 class GraceFOLri1ADataFileReader(DataFileWithProdFlagReader):
+    # TODO: Pandas has timedelta that supports nanoseconds, but
+    # Postgres does not supports nanoseconds timestamp, so the timestamps will have microseconds precision
+    timestamp_columns = TimestampColumns('rcvtime_intg', 'rcvtime_frac', fraction_unit='ns')
+
     @classmethod
     def get_reference_epoch(cls) -> datetime:
         return datetime(2000, 1, 1, 12)
@@ -48,12 +52,6 @@ class GraceFOLri1ADataFileReader(DataFileWithProdFlagReader):
             # prod_flag_bit_index 12-15 are undefined
         ]
 
-    @classmethod
-    def populate_timestamp(cls, row) -> datetime:
-        # TODO: Pandas has timedelta that supports nanoseconds, but
-        # Postgres does not supports nanoseconds timestamp, so the timestamps will have microseconds precision
-        return cls.get_reference_epoch() + timedelta(seconds=row.rcvtime_intg, microseconds=row.rcvtime_frac/1000)
-
     @classmethod
     def _get_first_prod_flag_data_column_position(cls) -> int:
         return 5
\ No newline at end of file
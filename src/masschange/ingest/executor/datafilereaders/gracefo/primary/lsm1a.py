@@ -1,11 +1,15 @@
 from collections.abc import Collection
-from datetime import datetime, timedelta
+from datetime import datetime
 
 import numpy as np
 
-from masschange.ingest.executor.datafilereaders.base import AsciiDataFileReader, AsciiDataFileReaderColumn
+from masschange.ingest.executor.datafilereaders.base import AsciiDataFileReader, AsciiDataFileReaderColumn, TimestampColumns
 
 class GraceFOLsm1ADataFileReader(AsciiDataFileReader):
+    # TODO: Pandas has timedelta that supports nanoseconds, but
+    # Postgres does not supports nanoseconds timestamp, so the timestamps will have microseconds precision
+    timestamp_columns = TimestampColumns('time_intg', 'time_frac', fraction_unit='ns')
+
     @classmethod
     def get_reference_epoch(cls) -> datetime:
         return datetime(2000, 1, 1, 12)
@@ -31,10 +35,3 @@ class GraceFOLsm1ADataFileReader(AsciiDataFileReader):
             AsciiDataFileReaderColumn(index=7, name='commanded1', np_type=int, unit=None),
             AsciiDataFileReaderColumn(index=8, name='qualflg', np_type='U8', unit=None),
         ]
-
-    @classmethod
-    def populate_timestamp(cls, row) -> datetime:
-        # TODO: Pandas has timedelta that supports nanoseconds, but
-        # Postgres does not supports nanoseconds timestamp, so the timestamps will have microseconds precision
-        return cls.get_reference_epoch() + timedelta(seconds=row.time_intg, microseconds=row.time_frac/1000)
-
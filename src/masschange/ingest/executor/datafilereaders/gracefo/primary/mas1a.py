@@ -1,13 +1,15 @@
 from collections.abc import Collection
-from datetime import datetime, timedelta
+from datetime import datetime
 
 import numpy as np
 
 from masschange.ingest.executor.datafilereaders.base import  DataFileWithProdFlagReader, \
-    AsciiDataFileReaderColumn, VariableSchemaAsciiDataFileReaderColumn
+    AsciiDataFileReaderColumn, VariableSchemaAsciiDataFileReaderColumn, TimestampColumns
 
 
 class GraceFOMas1ADataFileReader(DataFileWithProdFlagReader):
+    timestamp_columns = TimestampColumns('time_intg', 'time_frac')
+
     @classmethod
     def get_reference_epoch(cls) -> datetime:
         return datetime(2000, 1, 1, 12)
@@ -50,10 +52,6 @@ class GraceFOMas1ADataFileReader(DataFileWithProdFlagReader):
                                                     unit='kg')
         ]
 
-    @classmethod
-    def populate_timestamp(cls, row) -> datetime:
-        return cls.get_reference_epoch() + timedelta(seconds=row.time_intg, microseconds=row.time_frac)
-
     @classmethod
     def _get_first_prod_flag_data_column_position(cls) -> int:
         return 6
\ No newline at end of file
@@ -1,13 +1,15 @@
 from collections.abc import Collection
-from datetime import datetime, timedelta
+from datetime import datetime
 
 import numpy as np
 
-from masschange.ingest.executor.datafilereaders.base import AsciiDataFileReader, AsciiDataFileReaderColumn
+from masschange.ingest.executor.datafilereaders.base import AsciiDataFileReader, AsciiDataFileReaderColumn, TimestampColumns
 
 
 # 0.1-Hz GPS-derived onboard navigation measurements
 class GraceFOPci1ADataFileReader(AsciiDataFileReader):
+    timestamp_columns = TimestampColumns('gps_time')
+
     @classmethod
     def get_reference_epoch(cls) -> datetime:
         return datetime(2000, 1, 1, 12)
@@ -30,7 +32,3 @@ class GraceFOPci1ADataFileReader(AsciiDataFileReader):
             AsciiDataFileReaderColumn(index=4, name='ant_centr_accl', np_type=np.double, unit='m/s2'),
             AsciiDataFileReaderColumn(index=5, name='qualflg', np_type='U8', unit=None)
         ]
-
-    @classmethod
-    def populate_timestamp(cls, row) -> datetime:
-        return cls.get_reference_epoch() + timedelta(seconds=row.gps_time)
@@ -1,14 +1,16 @@
 from collections.abc import Collection
-from datetime import datetime, timedelta
+from datetime import datetime
 
 import numpy as np
 
-from masschange.ingest.executor.datafilereaders.base import AsciiDataFileReader, AsciiDataFileReaderColumn
+from masschange.ingest.executor.datafilereaders.base import AsciiDataFileReader, AsciiDataFileReaderColumn, TimestampColumns
 
 
 # Star Camera Assembly data
 # 2-Hz SCA attitude measurements in the form of quaternions expressed in each of the three SCFs
 class GraceFOSca1BDataFileReader(AsciiDataFileReader):
+    timestamp_columns = TimestampColumns('gps_time')
+
     @classmethod
     def get_reference_epoch(cls) -> datetime:
         return datetime(2000, 1, 1, 12)
@@ -35,7 +37,3 @@ class GraceFOSca1BDataFileReader(AsciiDataFileReader):
             AsciiDataFileReaderColumn(index=7, name='qual_rss', np_type=np.double, unit=None),
             AsciiDataFileReaderColumn(index=8, name='qualflg', np_type='U8', unit=None)
         ]
-
-    @classmethod
-    def populate_timestamp(cls, row) -> datetime:
-        return cls.get_reference_epoch() + timedelta(seconds=row.gps_time)
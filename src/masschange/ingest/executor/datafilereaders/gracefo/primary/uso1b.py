@@ -1,13 +1,15 @@
 from collections.abc import Collection
-from datetime import datetime, timedelta
+from datetime import datetime
 
 import numpy as np
 
 from masschange.ingest.executor.datafilereaders.base import AsciiDataFileReader, \
-    AsciiDataFileReaderColumn
+    AsciiDataFileReaderColumn, TimestampColumns
 
 
 class GraceFOUso1BDataFileReader(AsciiDataFileReader):
+    timestamp_columns = TimestampColumns('gps_time')
+
     @classmethod
     def get_reference_epoch(cls) -> datetime:
         return datetime(2000, 1, 1, 12)
@@ -33,10 +35,6 @@ class GraceFOUso1BDataFileReader(AsciiDataFileReader):
             AsciiDataFileReaderColumn(index=6, name='qualflg', np_type='U8', unit=None),
         ]
 
-    @classmethod
-    def populate_timestamp(cls, row) -> datetime:
-        return cls.get_reference_epoch() + timedelta(seconds=row.gps_time)
-
     @classmethod
     def _get_first_prod_flag_data_column_position(cls) -> int:
         return 7
\ No newline at end of file
@@ -1,3 +1,8 @@
 class EmptyProductException(Exception):
     """Exception to throw when a data file does not have any data"""
-    pass
\ No newline at end of file
+    pass
+
+
+class AlreadyIngestedException(Exception):
+    """Exception to throw when a data file is unchanged since it was last ingested"""
+    pass
@@ -1,12 +1,15 @@
 import argparse
+import itertools
 import logging
 import os
-import shutil
+import re
 import tarfile
 import tempfile
-from datetime import datetime
+from collections.abc import Collection
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
 from io import StringIO
-from typing import Iterable
+from typing import Dict, Iterable, Iterator, Tuple, List, Optional, Sequence, Type
 
 import pandas
 import pandas as pd
@@ -14,54 +17,419 @@ import psycopg2
 
 from masschange.dataproducts.timeseriesdataproduct import TimeSeriesDataProduct
 from masschange.dataproducts.timeseriesdataset import TimeSeriesDataset
-from masschange.dataproducts.utils import resolve_dataset
-from masschange.dataproducts.db.utils import get_db_connection
-from masschange.utils.misc import get_human_readable_elapsed_since
-from masschange.db.data.caggs import refresh_continuous_aggregates
+from masschange.dataproducts.utils import resolve_dataset, get_time_series_dataproducts
+from masschange.utils.misc import get_human_readable_elapsed_since, get_human_readable_timedelta, iterate_ahead
+from masschange.db.data.caggs import refresh_continuous_aggregates, refresh_continuous_aggregates_over_spans
 from masschange.db.ensure import ensure_table_exists, ensure_continuous_aggregates, ensure_database_exists, ensure_metadata_tables_exist
-from masschange.ingest.crawler.enumeration import enumerate_files_in_dir_tree, order_filepaths_by_filename
+from masschange.ingest.crawler.dispatch import FilenameDispatchTable
+from masschange.ingest.crawler.enumeration import dispatch_files_in_dir_tree, enumerate_files_in_dir_tree, \
+    order_filepaths_by_filename, set_crawler_index_path
+from masschange.db.ingest.manifest import DataFileFingerprint, IngestedFileRecord, get_ingested_file_record, \
+    put_ingested_file_record
+from masschange.db.ingest.stats import IngestStats, record_ingest_stats, set_ingest_stats_jsonl_path
 from masschange.db.metadata.update import update_metadata
+from masschange.db.session import IngestSession, execute_statement, open_connection
 from masschange.utils.logging import configure_root_logger
-from masschange.utils.timespan import TimeSpan
-from masschange.ingest.executor.errors import EmptyProductException
+from masschange.utils.timespan import TimeSpan, merge_timespans, subtract_timespans
+from masschange.ingest.executor.errors import EmptyProductException, AlreadyIngestedException
+from masschange.ingest.executor.refresh import BackfillRefresher, DeferredRefresher
+from masschange.ingest.executor.datafilereaders.base import DataFileSource, InMemoryDataFile, get_data_file_name, \
+    get_data_file_size, parse_engines, set_parse_engine, set_parse_workers
 
 log = logging.getLogger()
 
+# the default thresholds at which pending files are written by a ParsedDataFileBatcher
+DEFAULT_COPY_BATCH_ROWS = 100_000
+DEFAULT_COPY_BATCH_BYTES = 256 * 1024 ** 2
 
-def run(product: TimeSeriesDataProduct, src: str, data_is_zipped: bool = True):
+
+class IngestResult:
+    """
+    The outcome of an attempt to ingest a single file
+
+    Attributes
+        product_id (str): the full id of the product for which the file was ingested
+
+        filepath (str): the path of the ingested file
+
+        status (str): one of "succeeded", "skipped" (if the file contained no data, or was unchanged since it was last
+            ingested) or "failed"
+
+        error (str | None): a description of the error which caused ingestion to fail or be skipped, if any
+
+        elapsed (timedelta): the time taken to ingest the file
+    """
+    SUCCEEDED = 'succeeded'
+    SKIPPED = 'skipped'
+    FAILED = 'failed'
+
+    def __init__(self, product_id: str, filepath: str, status: str, error: Optional[str] = None,
+                 elapsed: timedelta = timedelta(0)):
+        self.product_id = product_id
+        self.filepath = filepath
+        self.status = status
+        self.error = error
+        self.elapsed = elapsed
+
+
+def run(product: TimeSeriesDataProduct, src: str, data_is_zipped: bool = True, workers: int = 1,
+        pipeline_queue_size: Optional[int] = None, force: bool = False,
+        refresh_every: Optional[int] = None, backfill: bool = False, copy_batch_rows: int = DEFAULT_COPY_BATCH_ROWS,
+        copy_batch_bytes: int = DEFAULT_COPY_BATCH_BYTES, max_chunk_rows: Optional[int] = None) -> List[IngestResult]:
     """
 
     Parameters
     ----------
     src - the directory containing input files, identified by ACC1A_{YYYY-MM-DD}_{satellite_id}_04.txt
-    dest - the destination parquet root directory
+    data_is_zipped - whether to look in tarballs for source data
+    workers - the number of processes used to ingest files concurrently (see ingest_batches())
+    pipeline_queue_size - if provided, ingest files through a staged pipeline with queues of this size (see ingest_batches())
+    force - whether to re-ingest files which are unchanged since they were last ingested
+    refresh_every - if provided, defer and coalesce aggregate refreshes, performing them every refresh_every files (see ingest_batches())
+    backfill - whether to suspend per-file database maintenance for a bulk load (see ingest_batches())
+    copy_batch_rows - the row count at which files of the same dataset are written together (see ingest_batches())
+    copy_batch_bytes - the in-memory size at which batched files are written (see ingest_batches())
+    max_chunk_rows - if provided, parse and write files in chunks of at most this many data rows (see ingest_batches())
 
     Returns
     -------
+    the results of ingestion of each targeted file
 
     """
 
     log.info(f'ingesting {product.get_full_id()} data from {src}')
     log.info(f'targeting {"zipped" if data_is_zipped else "non-zipped"} data')
-    reader = product.get_reader()
-    zipped_regex = reader.get_zipped_input_file_default_regex()
-    unzipped_regex = reader.get_input_file_default_regex()
-    target_filepaths = get_zipped_input_iterable(src, zipped_regex, unzipped_regex) if data_is_zipped \
-        else order_filepaths_by_filename(enumerate_files_in_dir_tree(src, unzipped_regex, match_filename_only=True))
-    for fp in target_filepaths:
+    if data_is_zipped:
+        batches = get_multiproduct_zipped_input_batches(src, [product])
+    else:
+        batches = get_multiproduct_unzipped_input_batches(src, [product])
+
+    return ingest_batches(batches, workers=workers, pipeline_queue_size=pipeline_queue_size, force=force,
+                          refresh_every=refresh_every, backfill=backfill, copy_batch_rows=copy_batch_rows,
+                          copy_batch_bytes=copy_batch_bytes, max_chunk_rows=max_chunk_rows)
+
+
+def run_multiproduct(products: Collection[TimeSeriesDataProduct], src: str, data_is_zipped: bool = True,
+                     workers: int = 1, pipeline_queue_size: Optional[int] = None,
+                     force: bool = False, refresh_every: Optional[int] = None,
+                     backfill: bool = False, copy_batch_rows: int = DEFAULT_COPY_BATCH_ROWS,
+                     copy_batch_bytes: int = DEFAULT_COPY_BATCH_BYTES,
+                     max_chunk_rows: Optional[int] = None) -> List[IngestResult]:
+    """
+    Ingest data for several products from a common source directory.
+
+    The source directory is crawled once, with each file routed to every product whose reader matches it.  When
+    targeting zipped data, each tarball is likewise extracted only once, and each extracted file is ingested for every
+    product whose reader matches it, rather than re-extracting every tarball once per product.
+
+    Parameters
+    ----------
+    products - the products to ingest
+    src - the directory containing input files or tarballs
+    data_is_zipped - whether to look in tarballs for source data
+    workers - the number of processes used to ingest files concurrently (see ingest_batches())
+    pipeline_queue_size - if provided, ingest files through a staged pipeline with queues of this size (see ingest_batches())
+    force - whether to re-ingest files which are unchanged since they were last ingested
+    refresh_every - if provided, defer and coalesce aggregate refreshes, performing them every refresh_every files (see ingest_batches())
+    backfill - whether to suspend per-file database maintenance for a bulk load (see ingest_batches())
+    copy_batch_rows - the row count at which files of the same dataset are written together (see ingest_batches())
+    copy_batch_bytes - the in-memory size at which batched files are written (see ingest_batches())
+    max_chunk_rows - if provided, parse and write files in chunks of at most this many data rows (see ingest_batches())
+
+    Returns
+    -------
+    the results of ingestion of each targeted file
+
+    """
+    log.info(f'ingesting {len(products)} products from {"zipped" if data_is_zipped else "non-zipped"} data in {src}')
+    if data_is_zipped:
+        batches = get_multiproduct_zipped_input_batches(src, products)
+    else:
+        batches = get_multiproduct_unzipped_input_batches(src, products)
+
+    return ingest_batches(batches, workers=workers, pipeline_queue_size=pipeline_queue_size, force=force,
+                          refresh_every=refresh_every, backfill=backfill, copy_batch_rows=copy_batch_rows,
+                          copy_batch_bytes=copy_batch_bytes, max_chunk_rows=max_chunk_rows)
+
+
+def ingest_batches(batches: Iterable[Iterable[Tuple[TimeSeriesDataProduct, DataFileSource]]],
+                   workers: int = 1, pipeline_queue_size: Optional[int] = None,
+                   force: bool = False, refresh_every: Optional[int] = None,
+                   backfill: bool = False, session: Optional[IngestSession] = None,
+                   copy_batch_rows: int = DEFAULT_COPY_BATCH_ROWS,
+                   copy_batch_bytes: int = DEFAULT_COPY_BATCH_BYTES,
+                   max_chunk_rows: Optional[int] = None) -> List[IngestResult]:
+    """
+    Ingest batches of (product, data file) pairs, logging a consolidated report of the results once all are complete.
+    Each batch is fully ingested before the next batch is requested.
+
+    Files which are unchanged since they were last ingested (per the ingest manifest) are skipped, unless force is True.
+
+    If workers is greater than 1, files are ingested concurrently by a pool of that many processes.  Files targeting
+    different dataset tables are ingested concurrently, while files targeting the same table are ingested sequentially
+    in batch order, which should be temporal order (see order_filepaths_by_filename()).  Failures are recorded and do
+    not abort ingestion of the remaining files.  Each batch is read in full before its files are distributed to the
+    pool, so in-memory data files (from tarballs) are held in memory for the duration of their batch.
+
+    If pipeline_queue_size is provided, files are ingested in the current process by an IngestPipeline, which overlaps
+    extraction, parsing, database writes and continuous aggregate refreshes of consecutive files, holding at most
+    pipeline_queue_size files between each pair of stages.  Failures are recorded and do not abort ingestion of the
+    remaining files.  This may not be combined with workers > 1.
+
+    Otherwise, if workers is 1, files are ingested sequentially in the current process, and any failure aborts ingestion.
+
+    If refresh_every is provided, continuous aggregate refreshes are deferred and coalesced (see
+    DeferredRefresher), being performed once every refresh_every files and once all files are ingested.  A refresh_every
+    of 0 defers all refreshes until all files are ingested.  Otherwise, each file's dataset is refreshed after the file
+    is written.
+
+    If backfill is True, per-file database maintenance is suspended for a bulk load (see BackfillRefresher).  Each
+    dataset's table and continuous aggregates are ensured once, deletion of existing data is skipped for files whose
+    span is known to contain none, and refreshes are deferred until all files are ingested, whereupon each dataset's
+    continuous aggregates are rebuilt in full, in chunks, and its metadata is updated once.  refresh_every is ignored.
+
+    Except when pipelined, parsed files targeting the same dataset are written together, by a single transaction and
+    COPY, until their row count reaches copy_batch_rows or the total in-memory size of all pending files reaches
+    copy_batch_bytes (see ParsedDataFileBatcher).  A copy_batch_rows of 0 writes each file individually.  Sequentially
+    ingested files are batched across input batches, while pooled files are batched within each group.
+
+    If max_chunk_rows is provided, files are parsed in chunks of at most that many data rows, and files larger than a
+    single chunk are written chunk by chunk as they are parsed, so that each process holds a bounded amount of data in
+    memory regardless of file size (see write_parsed_data_file_chunks()).  This may not be combined with
+    pipeline_queue_size.
+
+    Database connections, ensured datasets and prepared statements are shared by all files ingested in each process via
+    an IngestSession.  If session is not provided, one is created for the duration of the call.
+
+    Returns
+    -------
+    the results of ingestion of each file
+
+    """
+    if pipeline_queue_size is not None and workers > 1:
+        raise ValueError('pipelined ingestion may not be combined with multiple workers')
+    if pipeline_queue_size is not None and max_chunk_rows is not None:
+        raise ValueError('pipelined ingestion may not be combined with chunked parsing')
+
+    if backfill:
+        refresher = BackfillRefresher()
+    elif refresh_every is not None:
+        refresher = DeferredRefresher(flush_every=refresh_every or None)
+    else:
+        refresher = None
+
+    owns_session = session is None
+    session = session or IngestSession()
+
+    results = []
+    try:
+        if pipeline_queue_size is not None:
+            from masschange.ingest.executor.pipeline import IngestPipeline  # deferred, as pipeline imports this module
+            results = IngestPipeline(queue_size=pipeline_queue_size, force=force, refresher=refresher,
+                                     session=session).run(batches)
+        elif workers <= 1:
+            batcher = ParsedDataFileBatcher(max_rows=copy_batch_rows, max_bytes=copy_batch_bytes,
+                                            raise_on_failure=True, refresher=refresher, session=session)
+            for batch in batches:
+                results.extend(ingest_file_group(batch, raise_on_failure=True, force=force, refresher=refresher,
+                                                 session=session, batcher=batcher, max_chunk_rows=max_chunk_rows))
+            results.extend(batcher.flush())
+        else:
+            results = _ingest_batches_in_pool(batches, workers, force, refresher, copy_batch_rows, copy_batch_bytes,
+                                              max_chunk_rows=max_chunk_rows)
+
+        if refresher is not None:
+            refresher.flush()
+    finally:
+        if owns_session:
+            session.close()
+
+    log_ingest_report(results)
+    return results
+
+
+def _ingest_batches_in_pool(batches: Iterable[Iterable[Tuple[TimeSeriesDataProduct, DataFileSource]]], workers: int,
+                            force: bool, refresher: Optional[DeferredRefresher], copy_batch_rows: int,
+                            copy_batch_bytes: int, max_chunk_rows: Optional[int] = None) -> List[IngestResult]:
+    """
+    Ingest batches using a pool of worker processes (see ingest_batches()), merging their deferred refreshes.  If a
+    group fails as a whole (for example, if its worker process dies), each of its files is recorded as failed, and the
+    remaining groups are ingested regardless.
+    """
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker_session) as executor:
+        for batch in batches:
+            refresher_type = type(refresher) if refresher is not None else None
+            groups_by_future = {}
+            for group in group_by_dataset_table(batch, failed_results=results):
+                try:
+                    future = executor.submit(_ingest_file_group_in_worker, group, force, refresher_type,
+                                             copy_batch_rows, copy_batch_bytes, max_chunk_rows)
+                except Exception as e:  # for example, BrokenProcessPool once a worker process has died
+                    results.extend(_get_failed_group_results(group, e))
+                    continue
+                groups_by_future[future] = group
+
+            for future in as_completed(groups_by_future):
+                try:
+                    group_results, group_refresher = future.result()
+                except Exception as e:
+                    results.extend(_get_failed_group_results(groups_by_future[future], e))
+                    continue
+
+                results.extend(group_results)
+                if refresher is not None:
+                    refresher.merge(group_refresher)
+
+    return results
+
+
+def _get_failed_group_results(product_filepaths: Collection[Tuple[TimeSeriesDataProduct, DataFileSource]],
+                              error: Exception) -> List[IngestResult]:
+    """Return a failed result for each file of a group which could not be ingested as a whole"""
+    log.error(f'failed to ingest group of {len(product_filepaths)} files: {error}')
+    return [IngestResult(product.get_full_id(), get_data_file_name(data_file), IngestResult.FAILED,
+                         error=f'{type(error).__name__}: {error}') for product, data_file in product_filepaths]
+
+
+def group_by_dataset_table(product_filepaths: Iterable[Tuple[TimeSeriesDataProduct, DataFileSource]],
+                           failed_results: Optional[List[IngestResult]] = None) -> List[
+    List[Tuple[TimeSeriesDataProduct, DataFileSource]]]:
+    """
+    Group (product, data file) pairs by the table they target, preserving input order within each group.  If
+    failed_results is provided, a failed result is appended to it for each file whose dataset cannot be determined,
+    rather than raising.
+    """
+    groups = {}
+    for product, fp in product_filepaths:
+        reader = product.get_reader()
+        try:
+            dataset = TimeSeriesDataset(product, reader.extract_dataset_version(fp), reader.extract_instrument_id(fp))
+        except Exception as e:
+            if failed_results is None:
+                raise
+            failed_results.extend(_get_failed_group_results([(product, fp)], e))
+            continue
+        groups.setdefault(dataset.get_table_name(), []).append((product, fp))
+
+    return list(groups.values())
+
+
+def _ingest_file_group_in_worker(product_filepaths: Iterable[Tuple[TimeSeriesDataProduct, DataFileSource]],
+                                 force: bool, refresher_type: Optional[Type[DeferredRefresher]],
+                                 copy_batch_rows: int = DEFAULT_COPY_BATCH_ROWS,
+                                 copy_batch_bytes: int = DEFAULT_COPY_BATCH_BYTES,
+                                 max_chunk_rows: Optional[int] = None) -> Tuple[
+    List[IngestResult], Optional[DeferredRefresher]]:
+    """
+    Ingest a group of files in a worker process.  If refresher_type is provided, refreshes are deferred to a refresher
+    of that type, which is returned to the parent process for merging, rather than being performed in the worker.
+    """
+    refresher = refresher_type() if refresher_type is not None else None
+    batcher = ParsedDataFileBatcher(max_rows=copy_batch_rows, max_bytes=copy_batch_bytes, refresher=refresher,
+                                    session=_worker_session)
+    results = ingest_file_group(product_filepaths, force=force, refresher=refresher, session=_worker_session,
+                                batcher=batcher, max_chunk_rows=max_chunk_rows)
+    results.extend(batcher.flush())
+    return results, refresher
+
+
+# the session used by all files ingested by a pool worker process, created by _init_worker_session()
+_worker_session: Optional[IngestSession] = None
+
+
+def _init_worker_session() -> None:
+    global _worker_session
+    _worker_session = IngestSession()
+
+
+def ingest_file_group(product_filepaths: Iterable[Tuple[TimeSeriesDataProduct, DataFileSource]],
+                      raise_on_failure: bool = False, force: bool = False,
+                      refresher: Optional[DeferredRefresher] = None,
+                      session: Optional[IngestSession] = None,
+                      batcher: Optional['ParsedDataFileBatcher'] = None,
+                      max_chunk_rows: Optional[int] = None) -> List[IngestResult]:
+    """
+    Sequentially ingest a group of files, returning a result for each.  Parsed files are written via batcher, which
+    is flushed by the caller, so that files may be batched across groups.  If batcher is not provided, one is created
+    with the default thresholds and flushed once the group is parsed.
+
+    If max_chunk_rows is provided, files are parsed in chunks of at most that many data rows.  Files comprising a single
+    chunk are batched as usual, while larger files are written chunk by chunk as they are parsed.
+    """
+    owns_batcher = batcher is None
+    if owns_batcher:
+        batcher = ParsedDataFileBatcher(raise_on_failure=raise_on_failure, refresher=refresher, session=session)
+
+    results = []
+    for product, data_file in product_filepaths:
+        fp = get_data_file_name(data_file)
+        start = datetime.now()
         try:
-            ingest_file_to_db(product, fp)
+            if max_chunk_rows is None:
+                parsed, fingerprint = load_changed_data_file(product, data_file, skip_if_unchanged=not force,
+                                                             session=session)
+                remaining_chunks = None
+            else:
+                chunks, fingerprint = load_changed_data_file_chunks(product, data_file, max_chunk_rows,
+                                                                    skip_if_unchanged=not force, session=session)
+                parsed = next(chunks)
+                second_chunk = next(chunks, None)
+                remaining_chunks = itertools.chain([second_chunk], chunks) if second_chunk is not None else None
+        except AlreadyIngestedException as e:
+            log.info(f'{e} Skipping ingestion of the file...')
+            results.append(IngestResult(product.get_full_id(), fp, IngestResult.SKIPPED, error=str(e),
+                                        elapsed=datetime.now() - start))
+            continue
         except EmptyProductException as e:
             log.warning(f'{e} Skipping ingestion of the file...')
+            results.append(IngestResult(product.get_full_id(), fp, IngestResult.SKIPPED, error=str(e),
+                                        elapsed=datetime.now() - start))
+            continue
+        except Exception as e:
+            if raise_on_failure:
+                raise
+            log.error(f'failed to ingest {fp} for {product.get_full_id()}: {e}')
+            results.append(IngestResult(product.get_full_id(), fp, IngestResult.FAILED,
+                                        error=f'{type(e).__name__}: {e}', elapsed=datetime.now() - start))
+            continue
+
+        if remaining_chunks is None:
+            results.extend(batcher.add(parsed, fingerprint, elapsed=datetime.now() - start))
+        else:
+            results.extend(batcher.add_chunks(itertools.chain([parsed], remaining_chunks), fingerprint,
+                                              elapsed=datetime.now() - start))
+
+    if owns_batcher:
+        results.extend(batcher.flush())
+
+    return results
+
+
+def log_ingest_report(results: Collection[IngestResult]) -> None:
+    """Log a consolidated summary of the results of an ingest run"""
+    counts_by_status = {status: len([r for r in results if r.status == status]) for status in
+                        [IngestResult.SUCCEEDED, IngestResult.SKIPPED, IngestResult.FAILED]}
+    total_elapsed = sum((r.elapsed for r in results), timedelta(0))
+    status_summary = ', '.join(f'{count} {status}' for status, count in counts_by_status.items())
+    log.info(f'ingest report: {len(results)} files processed ({status_summary}), '
+             f'cumulative file ingest time {get_human_readable_timedelta(total_elapsed)}')
+
+    for result in results:
+        if result.status == IngestResult.FAILED:
+            log.error(f'ingest failed for {result.product_id} file {result.filepath}: {result.error}')
+
 
 def get_zipped_input_iterable(root_dir: str,
                               enclosing_filename_match_regex: str,
-                              filename_match_regex: str) -> Iterable[str]:
+                              filename_match_regex: str) -> Iterable[InMemoryDataFile]:
     """
     Given a root_dir containing data tarballs, provide a transparently-iterable collection of data files matching
     filename_match_regex
 
-    N.B. THIS APPROACH MINIMIZES ADDITIONAL DISK USE BUT CANNOT BE USED WITH CONCURRENCY
+    Tarballs are streamed rather than extracted to disk - only members matching filename_match_regex are read, and each
+    is provided as an in-memory file-like object which may be passed directly to a DataFileReader.  Members are provided
+    in the order in which they occur in each tarball.
 
     Parameters
     ----------
@@ -76,78 +444,782 @@ def get_zipped_input_iterable(root_dir: str,
 
     for tar_fp in order_filepaths_by_filename(
             enumerate_files_in_dir_tree(root_dir, enclosing_filename_match_regex, match_filename_only=True)):
-        temp_dir = tempfile.mkdtemp(prefix='masschange-gracefo-ingest-')
-        log.debug(f'extracting contents of {tar_fp} to {temp_dir}')
-        with tarfile.open(tar_fp) as tf:
-            tf.extractall(temp_dir)
+        log.debug(f'reading contents of {tar_fp}')
+        with tarfile.open(tar_fp, mode='r|*') as tf:
+            for member in tf:
+                if member.isfile() and re.match(filename_match_regex, os.path.split(member.name)[-1]):
+                    yield read_tar_member(tf, tar_fp, member)
+
+
+def get_input_file_dispatch_table(products: Collection[TimeSeriesDataProduct]) -> FilenameDispatchTable[
+    TimeSeriesDataProduct]:
+    """Build a table routing data file names to the products whose readers match them"""
+    return FilenameDispatchTable((product.get_reader().get_input_file_default_regex(), product) for product in products)
+
+
+def get_zipped_input_file_dispatch_table(products: Collection[TimeSeriesDataProduct]) -> FilenameDispatchTable[
+    TimeSeriesDataProduct]:
+    """Build a table routing tarball names to the products whose readers match them"""
+    return FilenameDispatchTable(
+        (product.get_reader().get_zipped_input_file_default_regex(), product) for product in products)
+
+
+def get_multiproduct_unzipped_input_batches(root_dir: str, products: Collection[TimeSeriesDataProduct]) -> List[
+    List[Tuple[TimeSeriesDataProduct, str]]]:
+    """
+    Given a root_dir containing data files, provide a single batch of (product, filepath) pairs, containing all files
+    which are matched by each product's reader, product by product, with each product's files in temporal order.  The
+    directory tree is walked once, regardless of how many products are targeted.
+
+    All products share one batch, so that their dataset tables may be ingested concurrently (see ingest_batches()).
+
+    Parameters
+    ----------
+    root_dir
+    products
+
+    Returns
+    -------
+
+    """
+    filepaths_by_product_id: Dict[str, List[str]] = {product.get_full_id(): [] for product in products}
+    for fp, fp_products in dispatch_files_in_dir_tree(root_dir, get_input_file_dispatch_table(products)):
+        for product in fp_products:
+            filepaths_by_product_id[product.get_full_id()].append(fp)
+
+    return [[(product, fp) for product in products
+             for fp in order_filepaths_by_filename(filepaths_by_product_id[product.get_full_id()])]]
+
+
+def get_multiproduct_zipped_input_iterable(root_dir: str, products: Collection[TimeSeriesDataProduct]) -> Iterable[
+    Tuple[TimeSeriesDataProduct, InMemoryDataFile]]:
+    """
+    Given a root_dir containing data tarballs, provide a transparently-iterable collection of (product, data file) pairs
+    for all files within those tarballs which are matched by the products' readers.  Each tarball is read once,
+    regardless of how many products it contains data for.
+
+    Parameters
+    ----------
+    root_dir
+    products
+
+    Returns
+    -------
+
+    """
+    for batch in get_multiproduct_zipped_input_batches(root_dir, products):
+        yield from batch
+
+
+def get_multiproduct_zipped_input_batches(root_dir: str, products: Collection[TimeSeriesDataProduct]) -> Iterable[
+    Iterable[Tuple[TimeSeriesDataProduct, InMemoryDataFile]]]:
+    """
+    Given a root_dir containing data tarballs, provide one batch of (product, data file) pairs per tarball, containing
+    all files within that tarball which are matched by the products' readers.  Each tarball is streamed once, and only
+    its matching members are read (into memory), regardless of how many products they are ingested for.
+
+    Batches are lazily evaluated - a batch's tarball is not opened until the batch is iterated.
+
+    Parameters
+    ----------
+    root_dir
+    products
+
+    Returns
+    -------
+
+    """
+    for tar_fp, member_dispatch_table in get_multiproduct_tarballs(root_dir, products):
+        yield get_tarball_product_data_files(tar_fp, member_dispatch_table)
+
+
+def get_multiproduct_zipped_input_members(root_dir: str, products: Collection[TimeSeriesDataProduct]) -> Iterable[
+    Tuple[TimeSeriesDataProduct, str, str]]:
+    """
+    Given a root_dir containing data tarballs, provide a (product, tarball path, member name) triple for each file within
+    those tarballs which is matched by a product's reader.  Member contents are not read.
+    """
+    for tar_fp, member_dispatch_table in get_multiproduct_tarballs(root_dir, products):
+        log.debug(f'listing contents of {tar_fp}')
+        with tarfile.open(tar_fp, mode='r|*') as tf:
+            for member in tf:
+                for product in get_tar_member_products(member, member_dispatch_table):
+                    yield product, tar_fp, member.name
+
+
+def get_multiproduct_tarballs(root_dir: str, products: Collection[TimeSeriesDataProduct]) -> Iterable[
+    Tuple[str, FilenameDispatchTable[TimeSeriesDataProduct]]]:
+    """
+    Provide each tarball under root_dir which is matched by any product's reader, with a table routing its members to
+    the products whose readers match both the tarball and the member
+    """
+    tar_fps_and_products = sorted(dispatch_files_in_dir_tree(root_dir, get_zipped_input_file_dispatch_table(products)),
+                                  key=lambda fp_and_products: os.path.split(fp_and_products[0])[-1])
+
+    # tarballs of the same kind contain the same products, so share a member dispatch table
+    member_dispatch_tables: Dict[Tuple[str, ...], FilenameDispatchTable[TimeSeriesDataProduct]] = {}
+    for tar_fp, tar_products in tar_fps_and_products:
+        key = tuple(product.get_full_id() for product in tar_products)
+        if key not in member_dispatch_tables:
+            member_dispatch_tables[key] = get_input_file_dispatch_table(tar_products)
+        yield tar_fp, member_dispatch_tables[key]
+
+
+def get_tar_member_products(member: tarfile.TarInfo, dispatch_table: FilenameDispatchTable[
+    TimeSeriesDataProduct]) -> List[TimeSeriesDataProduct]:
+    """Return the products whose readers match a tarball member"""
+    if not member.isfile():
+        return []
+
+    return dispatch_table.match(os.path.split(member.name)[-1])
+
 
-        for fp in order_filepaths_by_filename(
-                enumerate_files_in_dir_tree(temp_dir, filename_match_regex, match_filename_only=True)):
-            yield fp
+def get_tarball_product_data_files(tar_fp: str, dispatch_table: FilenameDispatchTable[
+    TimeSeriesDataProduct]) -> Iterable[Tuple[TimeSeriesDataProduct, InMemoryDataFile]]:
+    """Stream a tarball, providing a (product, data file) pair for each member matched by each product's reader"""
+    log.debug(f'reading contents of {tar_fp}')
+    with tarfile.open(tar_fp, mode='r|*') as tf:
+        for member in tf:
+            member_products = get_tar_member_products(member, dispatch_table)
+            if len(member_products) == 0:
+                continue
 
-        log.debug(f'cleaning up {temp_dir}')
-        shutil.rmtree(temp_dir)
+            data_file = read_tar_member(tf, tar_fp, member)
+            for product in member_products:
+                yield product, data_file
 
 
-def delete_overlapping_data(dataset: TimeSeriesDataset, data_temporal_span: TimeSpan):
+def read_tar_member(tf: tarfile.TarFile, tar_fp: str, member: tarfile.TarInfo) -> InMemoryDataFile:
+    """Read a tarball member into memory, naming it with its virtual path within the tarball"""
+    with tf.extractfile(member) as f:
+        return InMemoryDataFile(os.path.join(tar_fp, member.name), f.read(), mtime=member.mtime)
+
+
+def lock_dataset_table(conn: psycopg2.extensions.connection, table_name: str,
+                       session: Optional[IngestSession] = None) -> None:
+    """
+    Acquire a transaction-level advisory lock on a dataset table, serializing writes to that table by all ingesters until
+    conn's transaction ends.
+    """
+    with conn.cursor() as cur:
+        execute_statement(cur, 'lock_dataset_table', 'SELECT pg_advisory_xact_lock(hashtext(%s));',
+                          [f'ingest:{table_name}'], session)
+
+
+def delete_overlapping_data(dataset: TimeSeriesDataset, data_temporal_spans: Collection[TimeSpan],
+                            session: Optional[IngestSession] = None,
+                            conn: Optional[psycopg2.extensions.connection] = None):
+    """Delete existing data within any of a collection of spans, in a single statement"""
     table_name = dataset.get_table_name()
-    with get_db_connection() as conn, conn.cursor() as cur:
+    condition, params = get_timespans_condition(dataset.product.TIMESTAMP_COLUMN_NAME, data_temporal_spans)
+    with open_connection(session, conn=conn) as conn, conn.cursor() as cur:
         sql = f"""
             DELETE 
             FROM {table_name}
-                WHERE   {dataset.product.TIMESTAMP_COLUMN_NAME} >= %(from_dt)s
-                    AND {dataset.product.TIMESTAMP_COLUMN_NAME} <= %(to_dt)s
+                WHERE   {condition}
                 """
-        cur.execute(sql, {'from_dt': data_temporal_span.begin, 'to_dt': data_temporal_span.end})
-        conn.commit()
-        log.debug(f'purged data from {table_name} for span {data_temporal_span}')
+        # not prepared, as the bounds must be constants when the statement is planned (see get_timespans_condition())
+        cur.execute(sql, params)
+        log.debug(f'purged data from {table_name} for {len(data_temporal_spans)} spans')
+
+
+def get_timespans_condition(timestamp_column_name: str, spans: Collection[TimeSpan]) -> Tuple[str, List[datetime]]:
+    """
+    Return an SQL condition (and its parameters) matching timestamps within any of a collection of spans, as one range
+    per merged span.  Each range is bounded by constants, so that hypertable chunks which overlap none of the spans are
+    excluded when the statement is planned, rather than being locked and scanned.
+    """
+    merged_spans = merge_timespans(spans)
+    ranges = [f'{timestamp_column_name} >= %s AND {timestamp_column_name} <= %s' for _ in merged_spans]
+    condition = ranges[0] if len(ranges) == 1 else ' OR '.join(f'({r})' for r in ranges)
+    return condition, [bound for span in merged_spans for bound in [span.begin, span.end]]
+
+
+def drop_overlapping_chunks(dataset: TimeSeriesDataset, data_temporal_spans: Collection[TimeSpan],
+                            session: Optional[IngestSession] = None,
+                            conn: Optional[psycopg2.extensions.connection] = None) -> bool:
+    """
+    Drop the hypertable chunks overlapping a collection of spans, if doing so is equivalent to deleting the spans' data
+    (ie. if those chunks contain no data outside the spans, as when whole-day files are re-ingested).  Dropping a chunk
+    is a catalog operation, so is far cheaper than deleting its rows and leaves no dead tuples to be vacuumed.
+
+    Returns
+        True if no data remains within the spans, otherwise False (in which case nothing has been dropped)
+    """
+    table_name = dataset.get_table_name()
+    timestamp_column_name = dataset.product.TIMESTAMP_COLUMN_NAME
+    span_bounds = [[span.begin for span in data_temporal_spans], [span.end for span in data_temporal_spans]]
+    with open_connection(session, conn=conn) as conn, conn.cursor() as cur:
+        # chunk bounds are returned as naive UTC, for comparison with parsed timestamps
+        sql = """
+            SELECT DISTINCT range_start AT TIME ZONE 'UTC', range_end AT TIME ZONE 'UTC'
+            FROM timescaledb_information.chunks
+                JOIN unnest(%s::timestamptz[], %s::timestamptz[]) AS spans(span_begin, span_end)
+                    ON range_start <= spans.span_end AND range_end > spans.span_begin
+            WHERE hypertable_name = %s;
+        """
+        execute_statement(cur, 'select_overlapping_chunks', sql, span_bounds + [table_name], session)
+        chunk_spans = [TimeSpan(begin=range_start, end=range_end) for range_start, range_end in cur.fetchall()]
+        if len(chunk_spans) == 0:
+            log.debug(f'no chunks of {table_name} overlap the {len(data_temporal_spans)} spans')
+            return True
+
+        # chunk ranges exclude their upper bounds, and contiguous chunks are dropped together
+        chunk_runs = merge_timespans(chunk_spans)
+        gaps = [gap for run in chunk_runs
+                for gap in subtract_timespans(TimeSpan(begin=run.begin, end=run.end - timedelta(microseconds=1)),
+                                              data_temporal_spans)]
+        if len(gaps) > 0:
+            condition, params = get_timespans_condition(timestamp_column_name, gaps)
+            sql = f"""
+                SELECT EXISTS (
+                    SELECT 1
+                    FROM {table_name}
+                    WHERE {condition}
+                );
+            """
+            # not prepared, as the bounds must be constants when the statement is planned (see get_timespans_condition())
+            cur.execute(sql, params)
+            if cur.fetchone()[0]:
+                return False
+
+        sql = """
+            SELECT drop_chunks(%s::regclass, older_than => runs.run_end, newer_than => runs.run_begin)
+            FROM unnest(%s::timestamptz[], %s::timestamptz[]) AS runs(run_begin, run_end);
+        """
+        execute_statement(cur, 'drop_overlapping_chunks', sql,
+                          [table_name, [run.begin for run in chunk_runs], [run.end for run in chunk_runs]], session)
+        log.debug(f'dropped {len(chunk_spans)} chunks of {table_name}')
+        return True
 
 
-def ingest_df(df: pandas.DataFrame, table_name: str) -> None:
+def purge_overlapping_data(dataset: TimeSeriesDataset, data_temporal_spans: Collection[TimeSpan],
+                           session: Optional[IngestSession] = None,
+                           conn: Optional[psycopg2.extensions.connection] = None) -> None:
     """
+    Remove any existing data within a collection of spans, prior to writing its replacement.  Overlapping chunks are
+    dropped whole where possible (see drop_overlapping_chunks()), so that re-ingestion of whole-day files costs about the
+    same as their initial ingestion.  Otherwise (as when a partial-day file is re-ingested), the overlapping rows are
+    deleted.
+    """
+    with open_connection(session, conn=conn) as conn:
+        if not drop_overlapping_chunks(dataset, data_temporal_spans, session=session, conn=conn):
+            delete_overlapping_data(dataset, data_temporal_spans, session=session, conn=conn)
+
+
+def ingest_df(df: pandas.DataFrame, table_name: str, session: Optional[IngestSession] = None,
+              conn: Optional[psycopg2.extensions.connection] = None) -> None:
+    """
+    Bulk-write a dataframe to a table.  If conn is provided, the write is performed within (and without committing)
+    conn's transaction.  Errors are raised, leaving the transaction to be rolled back.
+
     see: https://naysan.ca/2020/05/09/pandas-to-postgresql-using-psycopg2-bulk-insert-performance-benchmark/
     """
     log.info(f'writing data to table {table_name}')
 
-    with get_db_connection() as conn:
-        buffer = StringIO()
-        df.to_csv(buffer, header=False, index=False)
-        buffer.seek(0)
-        with conn.cursor() as cursor:
-            try:
-                cursor.copy_from(file=buffer, table=table_name, sep=",", null="")
-                conn.commit()
-            except (Exception, psycopg2.DatabaseError) as error:
-                print("Error: %s" % error)
+    buffer = StringIO()
+    df.to_csv(buffer, header=False, index=False)
+    buffer.seek(0)
+    with open_connection(session, conn=conn) as conn, conn.cursor() as cursor:
+        cursor.copy_from(file=buffer, table=table_name, sep=",", null="")
 
 
-def ingest_file_to_db(product: TimeSeriesDataProduct, src_filepath: str):
-    if log.isEnabledFor(logging.DEBUG):
-        log.debug(f'ingesting file: {src_filepath}')
-    else:
-        log.info(f'ingesting file: {os.path.split(src_filepath)[-1]}')
+class ParsedDataFile:
+    """
+    The data parsed from a single data file, prepared for writing to the database
+
+    Attributes
+        product (TimeSeriesDataProduct): the product to which the data belongs
+
+        dataset (TimeSeriesDataset): the dataset to which the data belongs
+
+        src_filename (str): the path (or virtual path) of the source data file
+
+        df (pd.DataFrame): the fully-prepared data
+
+        data_temporal_span (TimeSpan): the span of the data's timestamps
+
+        stats (IngestStats): measurements of the file's ingestion, to which the write and refresh stages are added
+    """
+
+    def __init__(self, product: TimeSeriesDataProduct, dataset: TimeSeriesDataset, src_filename: str,
+                 df: pd.DataFrame, data_temporal_span: TimeSpan, stats: Optional[IngestStats] = None):
+        self.product = product
+        self.dataset = dataset
+        self.src_filename = src_filename
+        self.df = df
+        self.data_temporal_span = data_temporal_span
+        self.stats = stats or IngestStats(product.get_full_id(), dataset.get_table_name(), src_filename,
+                                          row_count=len(df))
+
+
+class ParsedDataFileBatcher:
+    """
+    Accumulates parsed data files per dataset, so that many small files (for example, single-row rpt files) are written
+    by a single transaction and COPY, and refreshed together, rather than each paying the per-write overhead.
+
+    A dataset's pending files are written once their row count reaches max_rows, and all pending files are written once
+    their total in-memory size reaches max_bytes, bounding memory use.  A file whose span overlaps that of a pending
+    file of the same dataset causes the pending files to be written first, so that its data replaces theirs as it would
+    if each were written individually.  If a batched write fails, its files are retried individually, so that a single
+    bad file does not cause the failure of its batch.
+
+    Attributes
+        max_rows (int): the row count at which a dataset's pending files are written.  If 0, files are written as soon
+            as they are added
+
+        max_bytes (int): the total in-memory size of pending data at which all pending files are written
+    """
+
+    def __init__(self, max_rows: int = DEFAULT_COPY_BATCH_ROWS, max_bytes: int = DEFAULT_COPY_BATCH_BYTES,
+                 raise_on_failure: bool = False, refresher: Optional[DeferredRefresher] = None,
+                 session: Optional[IngestSession] = None):
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.raise_on_failure = raise_on_failure
+        self.refresher = refresher
+        self.session = session
+
+        # pending (parsed file, fingerprint, elapsed) triples, by dataset table
+        self._pending: Dict[str, List[Tuple[ParsedDataFile, DataFileFingerprint, timedelta]]] = {}
+        self._pending_row_counts: Dict[str, int] = {}
+        self._pending_byte_count = 0
+
+    def add(self, parsed: ParsedDataFile, fingerprint: DataFileFingerprint, elapsed: timedelta = timedelta(0)) -> List[
+        IngestResult]:
+        """
+        Add a parsed file, which has taken elapsed to load, returning the results of any files written as a consequence
+        """
+        results = []
+        table_name = parsed.dataset.get_table_name()
+        if any(pending.data_temporal_span.intersects(parsed.data_temporal_span)
+               for pending, _, _ in self._pending.get(table_name, [])):
+            results.extend(self._write(table_name))
+
+        self._pending.setdefault(table_name, []).append((parsed, fingerprint, elapsed))
+        self._pending_row_counts[table_name] = self._pending_row_counts.get(table_name, 0) + len(parsed.df)
+        self._pending_byte_count += int(parsed.df.memory_usage(index=False).sum())
+
+        if self._pending_row_counts[table_name] >= self.max_rows:
+            results.extend(self._write(table_name))
+        if self._pending_byte_count >= self.max_bytes:
+            results.extend(self.flush())
 
+        return results
 
+    def add_chunks(self, chunks: Iterator[ParsedDataFile], fingerprint: DataFileFingerprint,
+                   elapsed: timedelta = timedelta(0)) -> List[IngestResult]:
+        """
+        Write a single file as it is parsed in chunks (see write_parsed_data_file_chunks()), which has so far taken
+        elapsed to load, after first writing any pending files of its dataset.  Return the results of all files written.
+        """
+        first_chunk = next(chunks)
+        table_name = first_chunk.dataset.get_table_name()
+        results = self._write(table_name) if table_name in self._pending else []
+
+        start = datetime.now()
+        try:
+            write_and_record_parsed_data_file_chunks(itertools.chain([first_chunk], chunks), fingerprint,
+                                                     refresher=self.refresher, session=self.session)
+        except Exception as e:
+            if self.raise_on_failure:
+                raise
+            log.error(f'failed to ingest {first_chunk.src_filename} for {first_chunk.product.get_full_id()}: {e}')
+            results.append(IngestResult(first_chunk.product.get_full_id(), first_chunk.src_filename,
+                                        IngestResult.FAILED, error=f'{type(e).__name__}: {e}',
+                                        elapsed=elapsed + datetime.now() - start))
+            return results
+
+        results.append(IngestResult(first_chunk.product.get_full_id(), first_chunk.src_filename,
+                                    IngestResult.SUCCEEDED, elapsed=elapsed + datetime.now() - start))
+        return results
+
+    def flush(self) -> List[IngestResult]:
+        """Write all pending files, returning their results"""
+        results = []
+        for table_name in list(self._pending.keys()):
+            results.extend(self._write(table_name))
+        return results
+
+    def _write(self, table_name: str) -> List[IngestResult]:
+        pending = self._pending.pop(table_name)
+        self._pending_row_counts.pop(table_name)
+        self._pending_byte_count -= sum(int(parsed.df.memory_usage(index=False).sum()) for parsed, _, _ in pending)
+        return self._write_files(pending)
+
+    def _write_files(self, pending: List[Tuple[ParsedDataFile, DataFileFingerprint, timedelta]]) -> List[IngestResult]:
+        if len(pending) > 1:
+            log.info(f'writing {len(pending)} files to {pending[0][0].dataset.get_table_name()} in a single batch')
+
+        start = datetime.now()
+        try:
+            write_and_record_parsed_data_files([parsed for parsed, _, _ in pending],
+                                               [fingerprint for _, fingerprint, _ in pending],
+                                               refresher=self.refresher, session=self.session)
+        except Exception as e:
+            if self.raise_on_failure:
+                raise
+            if len(pending) > 1:
+                log.warning(f'batched write of {len(pending)} files failed ({type(e).__name__}: {e}) - retrying '
+                            f'each file individually')
+                return [result for item in pending for result in self._write_files([item])]
+
+            parsed, _, elapsed = pending[0]
+            log.error(f'failed to ingest {parsed.src_filename} for {parsed.product.get_full_id()}: {e}')
+            return [IngestResult(parsed.product.get_full_id(), parsed.src_filename, IngestResult.FAILED,
+                                 error=f'{type(e).__name__}: {e}', elapsed=elapsed + datetime.now() - start)]
+
+        # the write's elapsed time is shared between its files
+        write_elapsed_share = (datetime.now() - start) / len(pending)
+        return [IngestResult(parsed.product.get_full_id(), parsed.src_filename, IngestResult.SUCCEEDED,
+                             elapsed=elapsed + write_elapsed_share) for parsed, _, elapsed in pending]
+
+
+def parse_data_file(product: TimeSeriesDataProduct, src_filepath: DataFileSource) -> ParsedDataFile:
+    """Load and prepare the data from a data file, without touching the database"""
     reader = product.get_reader()
     dataset = TimeSeriesDataset(product, reader.extract_dataset_version(src_filepath), reader.extract_instrument_id(src_filepath))
 
-    pd_df: pd.DataFrame = reader.load_data_from_file(src_filepath)
+    src_filename = get_data_file_name(src_filepath)
+    stats = IngestStats(product.get_full_id(), dataset.get_table_name(), src_filename,
+                        input_bytes=get_data_file_size(src_filepath))
+    with stats.activate(), stats.time_stage('parse'):
+        pd_df: pd.DataFrame = reader.load_data_from_file(src_filepath)
+    stats.row_count = len(pd_df)
     data_temporal_span = TimeSpan(begin=min(pd_df[product.TIMESTAMP_COLUMN_NAME]),
                                   end=max(pd_df[product.TIMESTAMP_COLUMN_NAME]))
 
-    ensure_table_exists(dataset)
-    ensure_continuous_aggregates(dataset)
+    return ParsedDataFile(product, dataset, src_filename, pd_df, data_temporal_span, stats=stats)
+
+
+def parse_data_file_chunks(product: TimeSeriesDataProduct, src_filepath: DataFileSource,
+                           max_rows: int) -> Iterator[ParsedDataFile]:
+    """
+    Load and prepare the data from a data file as consecutive chunks, each prepared from at most max_rows data rows of
+    the file (see DataFileReader.load_data_chunks()), without touching the database.  The stats of the first chunk
+    include the size of the file.
+    """
+    reader = product.get_reader()
+    dataset = TimeSeriesDataset(product, reader.extract_dataset_version(src_filepath),
+                                reader.extract_instrument_id(src_filepath))
+
+    src_filename = get_data_file_name(src_filepath)
+    input_bytes = get_data_file_size(src_filepath)
+    chunks = reader.load_data_chunks(src_filepath, max_rows)
+    while True:
+        stats = IngestStats(product.get_full_id(), dataset.get_table_name(), src_filename, input_bytes=input_bytes)
+        with stats.activate(), stats.time_stage('parse'):
+            pd_df: Optional[pd.DataFrame] = next(chunks, None)
+        if pd_df is None:
+            return
+
+        stats.row_count = len(pd_df)
+        input_bytes = 0
+        data_temporal_span = TimeSpan(begin=min(pd_df[product.TIMESTAMP_COLUMN_NAME]),
+                                      end=max(pd_df[product.TIMESTAMP_COLUMN_NAME]))
+        yield ParsedDataFile(product, dataset, src_filename, pd_df, data_temporal_span, stats=stats)
+
+
+def write_parsed_data_file(parsed: ParsedDataFile, refresher: Optional[DeferredRefresher] = None,
+                           session: Optional[IngestSession] = None) -> IngestStats:
+    """Write a single parsed data file (see write_parsed_data_files())"""
+    return write_parsed_data_files([parsed], refresher=refresher, session=session)
+
+
+def write_parsed_data_files(parsed_files: Sequence[ParsedDataFile], refresher: Optional[DeferredRefresher] = None,
+                            session: Optional[IngestSession] = None) -> IngestStats:
+    """
+    Write parsed data files belonging to the same dataset to its table, replacing any existing data within their
+    temporal spans, and extend the dataset's recorded data span to include them.  The files' data is written by a single
+    COPY, so that the per-write overhead is paid once for all files, rather than once per file.  If a session is
+    provided, the dataset's table and continuous aggregates are ensured only once per session.  If refresher is a
+    BackfillRefresher, deletion of existing data is skipped where the spans are known to contain none, and the recorded
+    data span is left to be updated by the refresher.
+
+    The deletion, write and metadata update are performed atomically, in a single transaction holding an advisory lock
+    on the dataset table, so that a failure never leaves a partially-replaced span, and concurrent ingesters writing to
+    the same table are serialized.
+
+    The spans of the files should not overlap, as the data of each file would otherwise be written in full rather than
+    replacing that of the file before it.
+
+    Returns the combined stats of the files, with the durations of the delete, COPY and metadata update stages added.
+    """
+    dataset = parsed_files[0].dataset
+    table_name = dataset.get_table_name()
+    if any(parsed.dataset.get_table_name() != table_name for parsed in parsed_files):
+        raise ValueError('parsed files may only be written together if they belong to the same dataset')
+
+    _ensure_dataset(dataset, session=session)
+    backfill = refresher if isinstance(refresher, BackfillRefresher) else None
+    if backfill is not None:
+        backfill.track_dataset(dataset)
+
+    data_temporal_spans = merge_timespans(parsed.data_temporal_span for parsed in parsed_files)
+    df = parsed_files[0].df if len(parsed_files) == 1 else pd.concat([parsed.df for parsed in parsed_files],
+                                                                       ignore_index=True)
+    stats = IngestStats.combine(parsed.stats for parsed in parsed_files)
+    with open_connection(session) as conn:
+        lock_dataset_table(conn, table_name, session=session)
+        purge_spans = [span for span in data_temporal_spans
+                       if backfill is None or backfill.may_contain_data(dataset, span)]
+        if len(purge_spans) > 0:
+            with stats.time_stage('delete'):
+                purge_overlapping_data(dataset, purge_spans, session=session, conn=conn)
+        if len(purge_spans) < len(data_temporal_spans):
+            log.debug(f'skipping purge of {table_name} for {len(data_temporal_spans) - len(purge_spans)} spans, '
+                      f'which contain no data')
+        with stats.time_stage('copy'):
+            ingest_df(df, table_name, session=session, conn=conn)
+        if backfill is None:
+            with stats.time_stage('metadata'):
+                update_metadata(dataset, TimeSpan(begin=data_temporal_spans[0].begin, end=data_temporal_spans[-1].end),
+                                session=session, conn=conn, extend_data_span=True)
+
+    if backfill is not None:
+        for span in data_temporal_spans:
+            backfill.mark_written(dataset, span)
+
+    return stats
+
+
+def write_parsed_data_file_chunks(chunks: Iterable[ParsedDataFile], refresher: Optional[DeferredRefresher] = None,
+                                  session: Optional[IngestSession] = None) -> ParsedDataFile:
+    """
+    Write the consecutive chunks of a single parsed data file (see parse_data_file_chunks()) to its dataset's table, as
+    write_parsed_data_file() would write the whole file, but holding only a bounded number of chunks in memory.  Each
+    chunk is written by its own COPY once parsed, while the next chunk is parsed concurrently.
+
+    As for write_parsed_data_file(), the chunks are written atomically, in a single transaction holding an advisory lock
+    on the dataset table.  Before each chunk is written, existing data is purged from the part of the file's span (as
+    extended by the chunk) which has not already been purged, so that data written from earlier chunks is retained,
+    and the file's data replaces existing data within the file's whole span.
+
+    Returns a ParsedDataFile describing the whole file, having no dataframe, whose stats are those of its chunks
+    combined.  As chunks are parsed concurrently with writes, the stage durations may sum to more than the time taken.
+    """
+    chunks = iterate_ahead(chunks)
+    try:
+        first_chunk = next(chunks)
+        dataset = first_chunk.dataset
+        table_name = dataset.get_table_name()
+        _ensure_dataset(dataset, session=session)
+        backfill = refresher if isinstance(refresher, BackfillRefresher) else None
+        if backfill is not None:
+            backfill.track_dataset(dataset)
+
+        purged_span: Optional[TimeSpan] = None
+        chunk_stats = []
+        with open_connection(session) as conn:
+            lock_dataset_table(conn, table_name, session=session)
+            for chunk in itertools.chain([first_chunk], chunks):
+                span = chunk.data_temporal_span
+                if purged_span is None:
+                    unpurged_spans = [span]
+                    purged_span = span
+                else:
+                    extended_span = TimeSpan(begin=min(purged_span.begin, span.begin),
+                                             end=max(purged_span.end, span.end))
+                    unpurged_spans = subtract_timespans(extended_span, [purged_span])
+                    purged_span = extended_span
+
+                purge_spans = [unpurged_span for unpurged_span in unpurged_spans
+                               if backfill is None or backfill.may_contain_data(dataset, unpurged_span)]
+                if len(purge_spans) > 0:
+                    with chunk.stats.time_stage('delete'):
+                        purge_overlapping_data(dataset, purge_spans, session=session, conn=conn)
+                with chunk.stats.time_stage('copy'):
+                    ingest_df(chunk.df, table_name, session=session, conn=conn)
+                chunk.df = None  # release the written data
+                chunk_stats.append(chunk.stats)
+
+            stats = IngestStats.combine(chunk_stats)
+            stats.file_count = 1
+            if backfill is None:
+                with stats.time_stage('metadata'):
+                    update_metadata(dataset, purged_span, session=session, conn=conn, extend_data_span=True)
+    finally:
+        chunks.close()
+
+    log.info(f'wrote {first_chunk.src_filename} to {table_name} in {len(chunk_stats)} chunks')
+    if backfill is not None:
+        backfill.mark_written(dataset, purged_span)
 
+    return ParsedDataFile(first_chunk.product, dataset, first_chunk.src_filename, None, purged_span, stats=stats)
+
+
+def _ensure_dataset(dataset: TimeSeriesDataset, session: Optional[IngestSession] = None) -> None:
+    """Ensure a dataset's table and continuous aggregates exist, once per session if a session is provided"""
     table_name = dataset.get_table_name()
-    delete_overlapping_data(dataset, data_temporal_span)
-    ingest_df(pd_df, table_name)
-    refresh_continuous_aggregates(dataset)  # TODO: Determine whether this slows down as already-ingested data span increases - may need to limit to data_temporal_span
-    update_metadata(dataset, data_temporal_span)
+    if session is None or table_name not in session.ensured_table_names:
+        ensure_table_exists(dataset)
+        ensure_continuous_aggregates(dataset)
+        if session is not None:
+            session.ensured_table_names.add(table_name)
+
+
+def refresh_dataset(dataset: TimeSeriesDataset, data_temporal_span: TimeSpan,
+                    session: Optional[IngestSession] = None) -> None:
+    """Bring a dataset's continuous aggregates up to date following a write (which itself updates the metadata)"""
+    refresh_continuous_aggregates(dataset, data_span=data_temporal_span, session=session)
+
+
+def fingerprint_changed_data_file(product: TimeSeriesDataProduct, src_filepath: DataFileSource,
+                                  session: Optional[IngestSession] = None) -> DataFileFingerprint:
+    """
+    Fingerprint a data file, raising AlreadyIngestedException if it is unchanged since it was last ingested for product.
+
+    A file is considered unchanged if its size and mtime match the manifest entry, or failing that, if its size and
+    content hash match.  In the latter case the manifest entry's mtime is updated, so that subsequent checks need not
+    hash the file.
+    """
+    fingerprint = DataFileFingerprint.from_data_file(src_filepath)
+    record = get_ingested_file_record(product.get_full_id(), fingerprint.path, session=session)
+    if record is not None and record.fingerprint.size == fingerprint.size and fingerprint.mtime is not None \
+            and record.fingerprint.mtime == fingerprint.mtime:
+        raise AlreadyIngestedException(f'{fingerprint.path} is unchanged since it was ingested at {record.ingested_at}.')
+
+    fingerprint.compute_sha256(src_filepath)
+    if record is not None and record.fingerprint.size == fingerprint.size \
+            and record.fingerprint.sha256 == fingerprint.sha256:
+        record.fingerprint = fingerprint
+        put_ingested_file_record(record, session=session)
+        raise AlreadyIngestedException(f'{fingerprint.path} content is unchanged since it was ingested at {record.ingested_at}.')
+
+    return fingerprint
+
+
+def record_ingested_file(parsed: ParsedDataFile, fingerprint: DataFileFingerprint,
+                         refresher: Optional[DeferredRefresher] = None,
+                         session: Optional[IngestSession] = None) -> None:
+    """
+    Record successful ingestion of a data file in the manifest, so that it may be skipped by subsequent runs.  If a
+    refresher is provided, the record is deferred until the refresher has refreshed the file's dataset.
+    """
+    if fingerprint.sha256 is None:
+        raise ValueError(f'fingerprint of {fingerprint.path} must include its content hash')
+
+    record = IngestedFileRecord(parsed.product.get_full_id(), fingerprint, parsed.dataset.get_table_name(),
+                                parsed.stats.row_count, parsed.data_temporal_span, datetime.now(timezone.utc))
+    if refresher is None:
+        put_ingested_file_record(record, session=session)
+    else:
+        refresher.add(parsed.dataset, parsed.data_temporal_span, manifest_record=record)
+
+
+def load_changed_data_file(product: TimeSeriesDataProduct, src_filepath: DataFileSource, skip_if_unchanged: bool = False,
+                           session: Optional[IngestSession] = None) -> Tuple[ParsedDataFile, DataFileFingerprint]:
+    """
+    Fingerprint and parse a data file, in preparation for writing it.  If skip_if_unchanged is True, raise
+    AlreadyIngestedException rather than parsing a file which is unchanged since it was last ingested.
+    """
+    fingerprint = _fingerprint_data_file(product, src_filepath, skip_if_unchanged=skip_if_unchanged, session=session)
+    return parse_data_file(product, src_filepath), fingerprint
+
 
+def load_changed_data_file_chunks(product: TimeSeriesDataProduct, src_filepath: DataFileSource, max_rows: int,
+                                  skip_if_unchanged: bool = False, session: Optional[IngestSession] = None) -> Tuple[
+    Iterator[ParsedDataFile], DataFileFingerprint]:
+    """
+    Fingerprint a data file, and provide its chunks as they are parsed (see parse_data_file_chunks()), in preparation
+    for writing it.  If skip_if_unchanged is True, raise AlreadyIngestedException rather than parsing a file which is
+    unchanged since it was last ingested.
+    """
+    fingerprint = _fingerprint_data_file(product, src_filepath, skip_if_unchanged=skip_if_unchanged, session=session)
+    return parse_data_file_chunks(product, src_filepath, max_rows), fingerprint
+
+
+def _fingerprint_data_file(product: TimeSeriesDataProduct, src_filepath: DataFileSource, skip_if_unchanged: bool,
+                           session: Optional[IngestSession]) -> DataFileFingerprint:
+    src_filename = get_data_file_name(src_filepath)
     if log.isEnabledFor(logging.DEBUG):
-        log.debug(f'ingested file: {src_filepath}')
+        log.debug(f'ingesting file: {src_filename}')
     else:
-        log.info(f'ingested file: {os.path.split(src_filepath)[-1]}')
+        log.info(f'ingesting file: {os.path.split(src_filename)[-1]}')
+
+    if skip_if_unchanged:
+        return fingerprint_changed_data_file(product, src_filepath, session=session)
+
+    fingerprint = DataFileFingerprint.from_data_file(src_filepath)
+    fingerprint.compute_sha256(src_filepath)
+    return fingerprint
+
+
+def write_and_record_parsed_data_files(parsed_files: Sequence[ParsedDataFile],
+                                       fingerprints: Sequence[DataFileFingerprint],
+                                       refresher: Optional[DeferredRefresher] = None,
+                                       session: Optional[IngestSession] = None) -> None:
+    """
+    Write parsed data files belonging to the same dataset (see write_parsed_data_files()), refresh their aggregates, and
+    record them in the ingest manifest.  If a refresher is provided, the refresh (and recording) is deferred to it, and
+    is excluded from the recorded ingest stats.
+    """
+    stats = write_parsed_data_files(parsed_files, refresher=refresher, session=session)
+    _refresh_and_record_parsed_data_files(parsed_files, fingerprints, stats, refresher=refresher, session=session)
+
+
+def write_and_record_parsed_data_file_chunks(chunks: Iterable[ParsedDataFile], fingerprint: DataFileFingerprint,
+                                             refresher: Optional[DeferredRefresher] = None,
+                                             session: Optional[IngestSession] = None) -> None:
+    """
+    Write the chunks of a single parsed data file (see write_parsed_data_file_chunks()), refresh its aggregates, and
+    record it in the ingest manifest.  If a refresher is provided, the refresh (and recording) is deferred to it.
+    """
+    parsed = write_parsed_data_file_chunks(chunks, refresher=refresher, session=session)
+    _refresh_and_record_parsed_data_files([parsed], [fingerprint], parsed.stats, refresher=refresher, session=session)
+
+
+def _refresh_and_record_parsed_data_files(parsed_files: Sequence[ParsedDataFile],
+                                          fingerprints: Sequence[DataFileFingerprint], stats: IngestStats,
+                                          refresher: Optional[DeferredRefresher] = None,
+                                          session: Optional[IngestSession] = None) -> None:
+    if refresher is None:
+        dataset = parsed_files[0].dataset
+        with stats.time_stage('refresh'):
+            if len(parsed_files) == 1:
+                refresh_dataset(dataset, parsed_files[0].data_temporal_span, session=session)
+            else:
+                refresh_continuous_aggregates_over_spans(dataset,
+                                                         [parsed.data_temporal_span for parsed in parsed_files],
+                                                         session=session)
+    record_ingest_stats(stats, session=session)
+
+    for parsed, fingerprint in zip(parsed_files, fingerprints):
+        record_ingested_file(parsed, fingerprint, refresher=refresher, session=session)
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug(f'ingested file: {parsed.src_filename}')
+        else:
+            log.info(f'ingested file: {os.path.split(parsed.src_filename)[-1]}')
+
+
+def ingest_file_to_db(product: TimeSeriesDataProduct, src_filepath: DataFileSource, skip_if_unchanged: bool = False,
+                      refresher: Optional[DeferredRefresher] = None, session: Optional[IngestSession] = None,
+                      max_chunk_rows: Optional[int] = None):
+    """
+    Ingest a data file, recording it in the ingest manifest once its data, aggregates and metadata are fully written, so
+    that an interrupted run may be resumed by re-running it.  If skip_if_unchanged is True, raise AlreadyIngestedException
+    rather than ingesting a file which is unchanged since it was last ingested.
+
+    If a refresher is provided, refresh of continuous aggregates (and recording in the manifest) is deferred
+    to the refresher, so that it may be performed once for many files.
+
+    If a session is provided, its pooled connections, ensured datasets and prepared statements are used.
+
+    The duration of each stage of ingestion, with row and byte counts and the peak RSS, is recorded in the ingest stats
+    table (see record_ingest_stats()).
+
+    If max_chunk_rows is provided, the file is parsed and written in chunks of at most that many data rows (see
+    write_parsed_data_file_chunks()), so that arbitrarily large files are ingested within bounded memory.
+    """
+    if max_chunk_rows is not None:
+        chunks, fingerprint = load_changed_data_file_chunks(product, src_filepath, max_chunk_rows,
+                                                            skip_if_unchanged=skip_if_unchanged, session=session)
+        write_and_record_parsed_data_file_chunks(chunks, fingerprint, refresher=refresher, session=session)
+        return
+
+    parsed, fingerprint = load_changed_data_file(product, src_filepath, skip_if_unchanged=skip_if_unchanged,
+                                                 session=session)
+    write_and_record_parsed_data_files([parsed], [fingerprint], refresher=refresher, session=session)
 
 
 def get_args() -> argparse.Namespace:
@@ -155,15 +1227,120 @@ def get_args() -> argparse.Namespace:
         prog='MassChange Data Ingester',
         description='Given product data in a local directory, process that data and store it in database'
     )
-    ap.add_argument('--dataset', required=True, dest='dataset', type=resolve_dataset,
-                    help='the id of the dataset to ingest <TO-DO: print out enumerated list of available ids>')
+    ap.add_argument('--dataset', required=True, dest='datasets', nargs='+',
+                    help='the id(s) of the dataset(s) to ingest, or "all" to ingest every available dataset '
+                         '<TO-DO: print out enumerated list of available ids>')
 
     ap.add_argument('--src', required=True, dest='src', help='the root directory containing input data files')
 
     ap.add_argument('--zipped', '-z', dest='target_zipped_data', action='store_true',
                     help='look in tarballs for source data')
 
-    return ap.parse_args()
+    ap.add_argument('--workers', dest='workers', type=int, default=1,
+                    help='the number of processes used to ingest files concurrently.  Files targeting the same '
+                         'dataset table are always ingested sequentially, in temporal order')
+
+    ap.add_argument('--force', dest='force', action='store_true',
+                    help='ingest all matching files, including those which are unchanged since they were last ingested')
+
+    ap.add_argument('--defer-refresh', dest='defer_refresh', action='store_true',
+                    help='defer continuous aggregate refreshes until all files are ingested, refreshing each dataset '
+                         'once over the merged spans of its ingested files')
+
+    ap.add_argument('--refresh-every', dest='refresh_every', type=int, default=None,
+                    help='when deferring refreshes, additionally refresh once this many files have been ingested '
+                         '(implies --defer-refresh)')
+
+    ap.add_argument('--backfill', dest='backfill', action='store_true',
+                    help='bulk-load mode for historical data: ensure each dataset once, skip deletion of existing data '
+                         'where none can exist, and defer all aggregate refreshes until all files are ingested, then '
+                         'rebuild each dataset\'s aggregates in full (implies --defer-refresh)')
+
+    ap.add_argument('--parse-workers', dest='parse_workers', type=int, default=1,
+                    help='the number of processes used to parse each large ASCII data file, as concurrently-parsed '
+                         'byte ranges of its data section (default: 1)')
+
+    ap.add_argument('--parse-engine', dest='parse_engine', choices=parse_engines, default='loadtxt',
+                    help='the engine with which the data sections of ASCII data files are parsed into typed columns '
+                         '(default: loadtxt).  All engines produce identical data.  The pyarrow engine requires '
+                         'pyarrow')
+
+    ap.add_argument('--copy-batch-rows', dest='copy_batch_rows', type=int, default=DEFAULT_COPY_BATCH_ROWS,
+                    help=f'write parsed files of the same dataset with a single COPY until their total row count '
+                         f'reaches this threshold (default: {DEFAULT_COPY_BATCH_ROWS}).  0 writes each file individually')
+
+    ap.add_argument('--copy-batch-mb', dest='copy_batch_mb', type=int, default=DEFAULT_COPY_BATCH_BYTES // 1024 ** 2,
+                    help=f'write all batched files once their total in-memory size reaches this many MiB '
+                         f'(default: {DEFAULT_COPY_BATCH_BYTES // 1024 ** 2})')
+
+    ap.add_argument('--chunk-rows', dest='chunk_rows', type=int, default=None,
+                    help='parse each file in chunks of at most this many data rows, writing files larger than a single '
+                         'chunk chunk by chunk as they are parsed, so that arbitrarily large files are ingested within '
+                         'bounded memory.  May not be combined with --pipeline')
+
+    ap.add_argument('--pipeline', dest='pipeline', action='store_true',
+                    help='overlap extraction, parsing, database writes and aggregate refreshes of consecutive files '
+                         'using a staged pipeline.  May not be combined with --workers')
+
+    ap.add_argument('--queue-size', dest='queue_size', type=int, default=2,
+                    help='the maximum number of files held between consecutive pipeline stages (default: 2)')
+
+    ap.add_argument('--stats-jsonl', dest='stats_jsonl_filepath', default=None,
+                    help='additionally append the per-stage durations, row and byte counts and peak RSS of each write '
+                         '(which are always recorded in the _meta_ingest_stats table) to this file as JSON lines')
+
+    ap.add_argument('--crawler-index', dest='crawler_index_path', default=None,
+                    help='enumerate input files using a persistent index of the source tree at this path, re-listing '
+                         'only those directories modified since the previous run')
+
+    ap.add_argument('--plan', dest='plan', action='store_true',
+                    help='print the estimated rows, bytes and per-stage durations of the ingest for each dataset, '
+                         'without touching the database or ingesting anything')
+
+    ap.add_argument('--plan-samples', dest='plan_samples', type=int, default=3,
+                    help='when planning, the number of files of each dataset to parse when estimating row counts and '
+                         'parse throughput (default: 3)')
+
+    ap.add_argument('--throughput-file', dest='throughput_filepath', default=None,
+                    help='when planning, a JSON file of database throughput figures measured from previous runs, '
+                         'having keys "copy_rows_per_second" and "refresh_rows_per_second", or a .jsonl file of ingest '
+                         'stats written by --stats-jsonl, from which the figures are derived')
+
+    args = ap.parse_args()
+    if args.parse_workers < 1:
+        ap.error('--parse-workers must be at least 1')
+    if args.plan_samples < 1:
+        ap.error('--plan-samples must be at least 1')
+    if args.pipeline and args.workers > 1:
+        ap.error('--pipeline may not be combined with --workers')
+    if args.chunk_rows is not None and args.chunk_rows < 1:
+        ap.error('--chunk-rows must be at least 1')
+    if args.pipeline and args.chunk_rows is not None:
+        ap.error('--pipeline may not be combined with --chunk-rows')
+    if args.queue_size < 1:
+        ap.error('--queue-size must be at least 1')
+    if args.refresh_every is not None and args.refresh_every < 1:
+        ap.error('--refresh-every must be at least 1')
+    if args.copy_batch_rows < 0:
+        ap.error('--copy-batch-rows must not be negative')
+    if args.copy_batch_mb < 1:
+        ap.error('--copy-batch-mb must be at least 1')
+    if args.backfill and args.refresh_every is not None:
+        ap.error('--backfill may not be combined with --refresh-every')
+    try:
+        args.datasets = resolve_datasets(args.datasets)
+    except ValueError as e:
+        ap.error(str(e))
+
+    return args
+
+
+def resolve_datasets(dataset_ids: Collection[str]) -> Collection[TimeSeriesDataProduct]:
+    """Resolve a collection of dataset ids to products, where the special id "all" resolves to every product"""
+    if 'all' in dataset_ids:
+        return get_time_series_dataproducts()
+
+    return [resolve_dataset(dataset_id) for dataset_id in dataset_ids]
 
 
 if __name__ == '__main__':
@@ -172,15 +1349,46 @@ if __name__ == '__main__':
     logs_root = os.environ.get('MASSCHANGE_INGEST_LOGS_ROOT') or tempfile.mkdtemp()
     log_filepath = os.path.join(logs_root, f'ingest_{datetime.now().isoformat()}.log')
     configure_root_logger(log_filepath=log_filepath)
+    set_parse_workers(args.parse_workers)
+    set_parse_engine(args.parse_engine)
+    set_ingest_stats_jsonl_path(args.stats_jsonl_filepath)
+    set_crawler_index_path(args.crawler_index_path)
+
+    if args.plan:
+        # deferred, as plan imports this module
+        from masschange.ingest.executor.plan import ThroughputFigures, plan_ingest, format_plan
+        if args.throughput_filepath is None:
+            throughput = None
+        elif args.throughput_filepath.endswith('.jsonl'):
+            throughput = ThroughputFigures.from_ingest_stats_file(args.throughput_filepath)
+        else:
+            throughput = ThroughputFigures.from_file(args.throughput_filepath)
+        plans = plan_ingest(args.datasets, args.src, data_is_zipped=args.target_zipped_data,
+                            samples_per_product=args.plan_samples, throughput=throughput)
+        print(format_plan(plans, workers=args.workers))
+        exit(0)
 
     database_name = os.environ['TSDB_DATABASE']
     ensure_database_exists(database_name)
     ensure_metadata_tables_exist(database_name)
 
     start = datetime.now()
-    log.info(f'starting ingest of {args.dataset.get_full_id()} from {args.src} begin')
-    run(args.dataset, args.src, data_is_zipped=args.target_zipped_data)
+    dataset_ids = ', '.join(product.get_full_id() for product in args.datasets)
+    log.info(f'starting ingest of {dataset_ids} from {args.src} begin')
+    pipeline_queue_size = args.queue_size if args.pipeline else None
+    refresh_every = args.refresh_every if args.refresh_every is not None else (0 if args.defer_refresh else None)
+    if len(args.datasets) == 1:
+        results = run(args.datasets[0], args.src, data_is_zipped=args.target_zipped_data, workers=args.workers,
+                      pipeline_queue_size=pipeline_queue_size, force=args.force, refresh_every=refresh_every,
+                      backfill=args.backfill, copy_batch_rows=args.copy_batch_rows,
+                      copy_batch_bytes=args.copy_batch_mb * 1024 ** 2, max_chunk_rows=args.chunk_rows)
+    else:
+        results = run_multiproduct(args.datasets, args.src, data_is_zipped=args.target_zipped_data,
+                                   workers=args.workers, pipeline_queue_size=pipeline_queue_size, force=args.force,
+                                   refresh_every=refresh_every, backfill=args.backfill,
+                                   copy_batch_rows=args.copy_batch_rows,
+                                   copy_batch_bytes=args.copy_batch_mb * 1024 ** 2, max_chunk_rows=args.chunk_rows)
     log.info(
-        f'ingest of {args.dataset.get_full_id()} from {args.src} completed in {get_human_readable_elapsed_since(start)}')
+        f'ingest of {dataset_ids} from {args.src} completed in {get_human_readable_elapsed_since(start)}')
 
-    exit(0)
+    exit(1 if any(result.status == IngestResult.FAILED for result in results) else 0)
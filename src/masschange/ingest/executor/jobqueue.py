@@ -0,0 +1,280 @@
+import argparse
+import itertools
+import logging
+import os
+import signal
+import socket
+import tarfile
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Collection, Dict, Iterable, List, Optional, Tuple
+
+from masschange.dataproducts.timeseriesdataproduct import TimeSeriesDataProduct
+from masschange.dataproducts.utils import resolve_dataset
+from masschange.db.ensure import ensure_database_exists, ensure_metadata_tables_exist
+from masschange.db.ingest.jobs import IngestJob, enqueue_jobs, claim_jobs, renew_lease, complete_job, release_jobs, \
+    get_job_status_counts
+from masschange.db.session import IngestSession
+from masschange.ingest.crawler.enumeration import set_crawler_index_path
+from masschange.ingest.executor.datafilereaders.base import DataFileSource
+from masschange.ingest.executor.errors import EmptyProductException, AlreadyIngestedException
+from masschange.ingest.executor.ingest import IngestResult, ingest_file_to_db, get_multiproduct_zipped_input_members, \
+    get_multiproduct_unzipped_input_batches, log_ingest_report, resolve_datasets, read_tar_member
+from masschange.utils.logging import configure_root_logger
+from masschange.utils.misc import get_human_readable_elapsed_since
+
+log = logging.getLogger()
+
+
+def enqueue(products: Collection[TimeSeriesDataProduct], src: str, data_is_zipped: bool = True,
+            requeue: bool = False) -> int:
+    """
+    Crawl src for input files, enqueueing a job for each (file, product) pair.
+
+    Parameters
+    ----------
+    products - the products to ingest
+    src - the directory containing input files or tarballs
+    data_is_zipped - whether to look in tarballs for source data
+    requeue - whether to reset existing jobs (other than those currently running) to pending, for re-ingestion
+
+    Returns
+    -------
+    the number of jobs enqueued
+
+    """
+    log.info(f'enqueueing ingest jobs for {len(products)} products from {"zipped" if data_is_zipped else "non-zipped"} '
+             f'data in {src}')
+    if data_is_zipped:
+        jobs = ((tar_fp, member_name, product.get_full_id()) for product, tar_fp, member_name in
+                get_multiproduct_zipped_input_members(src, products))
+    else:
+        jobs = ((fp, '', product.get_full_id()) for batch in get_multiproduct_unzipped_input_batches(src, products)
+                for product, fp in batch)
+
+    enqueued_count = enqueue_jobs(jobs, requeue=requeue)
+    log.info(f'enqueued {enqueued_count} ingest jobs')
+    return enqueued_count
+
+
+class IngestWorker:
+    """
+    Claims jobs from the shared ingest job queue and executes them, recording the result and timing of each.
+
+    Any number of workers, on any number of hosts, may run concurrently against the same database.  Jobs are claimed
+    with FOR UPDATE SKIP LOCKED, so no two workers claim the same job, and writes to the same dataset table are
+    serialized across all workers by the per-table advisory lock held by each write transaction (see
+    write_parsed_data_file()).  Workers may be started and stopped
+    at any time - a stopped worker returns its unfinished jobs to the queue, and the jobs of a worker which dies without
+    doing so are reclaimed once their lease expires.  As ingestion of a file replaces any existing data in its span,
+    re-executing a partially-completed job is safe.
+
+    Attributes
+        worker_id (str): a unique identifier for this worker, recorded against its jobs
+
+        batch_size (int): the number of jobs claimed at once.  Jobs are claimed in path order, so larger batches allow
+            more files to be read from each tarball in a single pass
+
+        lease (timedelta): the duration after which a claimed job is considered abandoned, if not completed or renewed
+
+        max_attempts (int): the number of times an abandoned job is reclaimed before it is marked as failed
+
+        poll_interval (timedelta): the interval between claim attempts while the queue is empty
+
+        force (bool): whether to re-ingest files which are unchanged since they were last ingested
+    """
+
+    def __init__(self, batch_size: int = 10, lease: timedelta = timedelta(hours=1), max_attempts: int = 3,
+                 poll_interval: timedelta = timedelta(seconds=30), force: bool = False):
+        self.worker_id = f'{socket.gethostname()}:{os.getpid()}'
+        self.batch_size = batch_size
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self.force = force
+        self._products_by_id: Dict[str, TimeSeriesDataProduct] = {}
+
+    def run(self, exit_when_empty: bool = False) -> List[IngestResult]:
+        """
+        Claim and execute jobs until stopped, or until the queue is empty if exit_when_empty is True, returning a result
+        for each job executed.
+        """
+        log.info(f'ingest worker {self.worker_id} starting')
+        results = []
+        session = IngestSession()
+        try:
+            while True:
+                jobs = claim_jobs(self.worker_id, self.batch_size, self.lease, self.max_attempts)
+                if len(jobs) == 0:
+                    if exit_when_empty:
+                        break
+                    time.sleep(self.poll_interval.total_seconds())
+                    continue
+
+                log.info(f'claimed {len(jobs)} ingest jobs')
+                results.extend(self._execute_jobs(jobs, session))
+        finally:
+            session.close()
+
+        log.info(f'ingest worker {self.worker_id} stopping - no pending jobs remain')
+        return results
+
+    def _execute_jobs(self, jobs: List[IngestJob], session: IngestSession) -> List[IngestResult]:
+        results = []
+        unfinished_jobs = list(jobs)
+        try:
+            for job, data_file, open_error in _get_job_data_files(jobs):
+                results.append(self._execute_job(job, data_file, open_error, session))
+                unfinished_jobs.remove(job)
+                if len(unfinished_jobs) > 0:
+                    renew_lease(unfinished_jobs, self.worker_id, self.lease)
+        finally:
+            if len(unfinished_jobs) > 0:
+                log.info(f'returning {len(unfinished_jobs)} unfinished jobs to the queue')
+                release_jobs(unfinished_jobs, self.worker_id)
+
+        return results
+
+    def _execute_job(self, job: IngestJob, data_file: Optional[DataFileSource], open_error: Optional[str],
+                     session: IngestSession) -> IngestResult:
+        filepath = os.path.join(job.source_path, job.member_name) if job.is_zipped else job.source_path
+        start = datetime.now()
+        error = None
+        try:
+            if open_error is not None:
+                raise FileNotFoundError(open_error)
+
+            product = self._resolve_product(job.product_id)
+            ingest_file_to_db(product, data_file, skip_if_unchanged=not self.force, session=session)
+            status = IngestResult.SUCCEEDED
+        except (EmptyProductException, AlreadyIngestedException) as e:
+            log.info(f'{e} Skipping ingestion of the file...')
+            status = IngestResult.SKIPPED
+            error = str(e)
+        except Exception as e:
+            log.error(f'failed to ingest {filepath} for {job.product_id}: {e}')
+            status = IngestResult.FAILED
+            error = f'{type(e).__name__}: {e}'
+
+        elapsed = datetime.now() - start
+        complete_job(job, self.worker_id, status, elapsed, error=error)
+        return IngestResult(job.product_id, filepath, status, error=error, elapsed=elapsed)
+
+    def _resolve_product(self, product_id: str) -> TimeSeriesDataProduct:
+        if product_id not in self._products_by_id:
+            self._products_by_id[product_id] = resolve_dataset(product_id)
+        return self._products_by_id[product_id]
+
+
+def _get_job_data_files(jobs: List[IngestJob]) -> Iterable[
+    Tuple[IngestJob, Optional[DataFileSource], Optional[str]]]:
+    """
+    Provide a (job, data file, error) triple for each job, where error describes why the data file could not be read, if
+    it could not.  Jobs sharing a tarball are provided from a single streaming pass over that tarball.
+    """
+    for source_path, source_jobs in itertools.groupby(jobs, key=lambda job: job.source_path):
+        source_jobs = list(source_jobs)
+        if not source_jobs[0].is_zipped:
+            for job in source_jobs:
+                yield job, job.source_path, None
+            continue
+
+        jobs_by_member_name = {}
+        for job in source_jobs:
+            jobs_by_member_name.setdefault(job.member_name, []).append(job)
+
+        try:
+            with tarfile.open(source_path, mode='r|*') as tf:
+                for member in tf:
+                    member_jobs = jobs_by_member_name.pop(member.name, [])
+                    if len(member_jobs) > 0:
+                        data_file = read_tar_member(tf, source_path, member)
+                        for job in member_jobs:
+                            yield job, data_file, None
+                    if len(jobs_by_member_name) == 0:
+                        break
+        except (OSError, tarfile.TarError) as e:
+            log.error(f'failed to read {source_path}: {e}')
+
+        for job in itertools.chain.from_iterable(jobs_by_member_name.values()):
+            yield job, None, f'{job.member_name} could not be read from {source_path}'
+
+
+def get_args() -> argparse.Namespace:
+    ap = argparse.ArgumentParser(
+        prog='MassChange Distributed Ingester',
+        description='Enqueue ingest jobs in the database, or execute them with any number of workers'
+    )
+    subparsers = ap.add_subparsers(dest='command', required=True)
+
+    enqueue_ap = subparsers.add_parser('enqueue', help='crawl a directory, enqueueing a job for each input file')
+    enqueue_ap.add_argument('--dataset', required=True, dest='datasets', nargs='+',
+                            help='the id(s) of the dataset(s) to ingest, or "all" to ingest every available dataset')
+    enqueue_ap.add_argument('--src', required=True, dest='src', help='the root directory containing input data files')
+    enqueue_ap.add_argument('--zipped', '-z', dest='target_zipped_data', action='store_true',
+                            help='look in tarballs for source data')
+    enqueue_ap.add_argument('--requeue', dest='requeue', action='store_true',
+                            help='reset existing jobs for the crawled files (other than running jobs) to pending')
+    enqueue_ap.add_argument('--crawler-index', dest='crawler_index_path', default=None,
+                            help='enumerate input files using a persistent index of the source tree at this path, '
+                                 're-listing only those directories modified since the previous run')
+
+    worker_ap = subparsers.add_parser('worker', help='claim and execute jobs until stopped')
+    worker_ap.add_argument('--batch-size', dest='batch_size', type=int, default=10,
+                           help='the number of jobs to claim at once (default: 10)')
+    worker_ap.add_argument('--lease-minutes', dest='lease_minutes', type=float, default=60,
+                           help='the duration after which an unfinished job is considered abandoned (default: 60)')
+    worker_ap.add_argument('--max-attempts', dest='max_attempts', type=int, default=3,
+                           help='the number of times an abandoned job is retried before it is failed (default: 3)')
+    worker_ap.add_argument('--poll-seconds', dest='poll_seconds', type=float, default=30,
+                           help='the interval between claim attempts while the queue is empty (default: 30)')
+    worker_ap.add_argument('--exit-when-empty', dest='exit_when_empty', action='store_true',
+                           help='exit once no pending jobs remain, rather than polling for new jobs')
+    worker_ap.add_argument('--force', dest='force', action='store_true',
+                           help='ingest files which are unchanged since they were last ingested')
+
+    subparsers.add_parser('status', help='print the number of jobs in each status')
+
+    args = ap.parse_args()
+    if args.command == 'enqueue':
+        try:
+            args.datasets = resolve_datasets(args.datasets)
+        except ValueError as e:
+            enqueue_ap.error(str(e))
+
+    return args
+
+
+def _raise_system_exit(signum, frame):
+    raise SystemExit(f'received signal {signum}')
+
+
+if __name__ == '__main__':
+    args = get_args()
+
+    logs_root = os.environ.get('MASSCHANGE_INGEST_LOGS_ROOT') or tempfile.mkdtemp()
+    log_filepath = os.path.join(logs_root, f'ingest_{args.command}_{datetime.now().isoformat()}.log')
+    configure_root_logger(log_filepath=log_filepath)
+
+    database_name = os.environ['TSDB_DATABASE']
+    ensure_database_exists(database_name)
+    ensure_metadata_tables_exist(database_name)
+
+    if args.command == 'enqueue':
+        set_crawler_index_path(args.crawler_index_path)
+        enqueue(args.datasets, args.src, data_is_zipped=args.target_zipped_data, requeue=args.requeue)
+    elif args.command == 'worker':
+        # stop cleanly on termination, returning unfinished jobs to the queue
+        signal.signal(signal.SIGTERM, _raise_system_exit)
+
+        start = datetime.now()
+        worker = IngestWorker(batch_size=args.batch_size, lease=timedelta(minutes=args.lease_minutes),
+                              max_attempts=args.max_attempts, poll_interval=timedelta(seconds=args.poll_seconds),
+                              force=args.force)
+        results = worker.run(exit_when_empty=args.exit_when_empty)
+        log_ingest_report(results)
+        log.info(f'ingest worker completed in {get_human_readable_elapsed_since(start)}')
+    elif args.command == 'status':
+        for status, count in sorted(get_job_status_counts().items()):
+            print(f'{status}: {count}')
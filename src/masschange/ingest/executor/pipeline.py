@@ -0,0 +1,265 @@
+import logging
+import queue
+import threading
+from datetime import datetime, timedelta
+from typing import Iterable, Tuple, List, Optional
+
+from masschange.dataproducts.timeseriesdataproduct import TimeSeriesDataProduct
+from masschange.ingest.executor.datafilereaders.base import DataFileSource, get_data_file_name
+from masschange.db.ingest.manifest import DataFileFingerprint
+from masschange.db.ingest.stats import IngestStats, record_ingest_stats
+from masschange.db.session import IngestSession
+from masschange.ingest.executor.errors import EmptyProductException, AlreadyIngestedException
+from masschange.ingest.executor.refresh import DeferredRefresher
+from masschange.ingest.executor.ingest import IngestResult, ParsedDataFile, parse_data_file, write_parsed_data_file, \
+    refresh_dataset, fingerprint_changed_data_file, record_ingested_file
+from masschange.utils.misc import get_human_readable_timedelta
+
+log = logging.getLogger()
+
+# passed downstream by each stage once its input is exhausted
+_END_OF_STREAM = object()
+
+
+class MonitoredQueue:
+    """
+    A bounded FIFO queue between two pipeline stages, which records statistics on its depth.  A queue which is usually
+    full indicates that its consumer is a bottleneck, while one which is usually empty indicates that its producer is.
+    """
+
+    def __init__(self, name: str, maxsize: int):
+        self.name = name
+        self.maxsize = maxsize
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._stats_lock = threading.Lock()
+        self._depth_sample_count = 0
+        self._depth_sample_sum = 0
+        self.max_depth = 0
+
+    def put(self, item) -> None:
+        self._queue.put(item)
+        self._sample_depth()
+
+    def get(self):
+        item = self._queue.get()
+        self._sample_depth()
+        return item
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    @property
+    def mean_depth(self) -> float:
+        with self._stats_lock:
+            return self._depth_sample_sum / self._depth_sample_count if self._depth_sample_count > 0 else 0.0
+
+    def _sample_depth(self) -> None:
+        depth = self._queue.qsize()
+        with self._stats_lock:
+            self._depth_sample_count += 1
+            self._depth_sample_sum += depth
+            self.max_depth = max(self.max_depth, depth)
+
+
+class PipelineStage:
+    """
+    Tracks the activity of a single pipeline stage, which runs in its own thread
+
+    Attributes
+        name (str): the stage name
+
+        item_count (int): the number of items processed by the stage
+
+        busy (timedelta): time spent processing items
+
+        waiting_for_input (timedelta): time spent waiting for the upstream stage to provide items
+
+        blocked_on_output (timedelta): time spent waiting for space in the downstream queue
+    """
+
+    def __init__(self, name: str, input_queue: Optional[MonitoredQueue], output_queue: Optional[MonitoredQueue]):
+        self.name = name
+        self.input_queue = input_queue
+        self.output_queue = output_queue
+        self.item_count = 0
+        self.busy = timedelta(0)
+        self.waiting_for_input = timedelta(0)
+        self.blocked_on_output = timedelta(0)
+
+    def receive(self):
+        start = datetime.now()
+        item = self.input_queue.get()
+        self.waiting_for_input += datetime.now() - start
+        return item
+
+    def emit(self, item) -> None:
+        start = datetime.now()
+        self.output_queue.put(item)
+        self.blocked_on_output += datetime.now() - start
+
+    def describe(self) -> str:
+        return (f'{self.name} stage: {self.item_count} items, busy {get_human_readable_timedelta(self.busy)}, '
+                f'waiting for input {get_human_readable_timedelta(self.waiting_for_input)}, '
+                f'blocked on output {get_human_readable_timedelta(self.blocked_on_output)}')
+
+
+class _PipelineItem:
+    """A single data file in flight through the pipeline"""
+
+    def __init__(self, product: TimeSeriesDataProduct, data_file: DataFileSource):
+        self.product = product
+        self.data_file = data_file
+        self.src_filename = get_data_file_name(data_file)
+        self.fingerprint: Optional[DataFileFingerprint] = None
+        self.parsed: Optional[ParsedDataFile] = None
+        self.stats: Optional[IngestStats] = None
+        self.elapsed = timedelta(0)
+
+
+class IngestPipeline:
+    """
+    Ingests data files through four concurrent stages connected by bounded queues, so that throughput is limited by
+    the slowest stage rather than the sum of all stages:
+      - extract: enumerates input files, reading (and decompressing) tarball members ahead of the parse stage
+      - parse: parses files into dataframes
+      - write: ensures dataset tables exist, then purges overlapping data, writes new data and updates metadata
+      - refresh: refreshes continuous aggregates
+
+    Each stage processes items in input order, so files targeting the same dataset table are written and refreshed in
+    temporal order.  The bounded queues provide backpressure, limiting the number of files held in memory at once.
+    Failures are recorded and do not abort ingestion of the remaining files.  Files which are unchanged since they were
+    last ingested are skipped by the parse stage, unless force is True.  If a refresher is provided, the refresh stage
+    defers refreshes to it, and the caller is responsible for its final flush.  If a session is provided, all stages draw
+    their database connections from it.
+    """
+
+    stage_names = ['extract', 'parse', 'write', 'refresh']
+
+    def __init__(self, queue_size: int = 2, force: bool = False, refresher: Optional[DeferredRefresher] = None,
+                 session: Optional[IngestSession] = None):
+        self.force = force
+        self.refresher = refresher
+        self.session = session
+        self.queues = [MonitoredQueue(f'{upstream}->{downstream}', queue_size) for upstream, downstream in
+                       zip(self.stage_names[:-1], self.stage_names[1:])]
+        input_queues = [None] + self.queues
+        output_queues = self.queues + [None]
+        self.stages = [PipelineStage(name, input_queue, output_queue) for name, input_queue, output_queue in
+                       zip(self.stage_names, input_queues, output_queues)]
+
+        self._results: List[IngestResult] = []
+        self._results_lock = threading.Lock()
+
+    def run(self, batches: Iterable[Iterable[Tuple[TimeSeriesDataProduct, DataFileSource]]]) -> List[IngestResult]:
+        """Ingest batches of (product, data file) pairs, returning a result for each file once all are complete"""
+        extract_stage, parse_stage, write_stage, refresh_stage = self.stages
+        threads = [
+            threading.Thread(target=self._run_extract_stage, args=(extract_stage, batches), daemon=True),
+            threading.Thread(target=self._run_processing_stage, args=(parse_stage, self._parse), daemon=True),
+            threading.Thread(target=self._run_processing_stage, args=(write_stage, self._write), daemon=True),
+            threading.Thread(target=self._run_processing_stage, args=(refresh_stage, self._refresh), daemon=True)
+        ]
+
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.log_metrics()
+        return self._results
+
+    def log_metrics(self) -> None:
+        """Log per-stage activity and queue depths, to aid identification of the pipeline bottleneck"""
+        for stage in self.stages:
+            log.info(f'pipeline {stage.describe()}')
+        for q in self.queues:
+            log.info(f'pipeline queue {q.name}: mean depth {q.mean_depth:.2f}, max depth {q.max_depth} '
+                     f'(capacity {q.maxsize})')
+
+        bottleneck = max(self.stages, key=lambda stage: stage.busy)
+        log.info(f'pipeline bottleneck: {bottleneck.name} stage')
+
+    def _record_result(self, result: IngestResult) -> None:
+        with self._results_lock:
+            self._results.append(result)
+
+    def _record_failure(self, item: _PipelineItem, stage: PipelineStage, err: Exception) -> None:
+        if isinstance(err, (EmptyProductException, AlreadyIngestedException)):
+            log.log(logging.WARNING if isinstance(err, EmptyProductException) else logging.INFO,
+                    f'{err} Skipping ingestion of the file...')
+            status = IngestResult.SKIPPED
+            error = str(err)
+        else:
+            log.error(f'{stage.name} stage failed for {item.src_filename} ({item.product.get_full_id()}): {err}')
+            status = IngestResult.FAILED
+            error = f'{type(err).__name__}: {err}'
+
+        self._record_result(IngestResult(item.product.get_full_id(), item.src_filename, status, error=error,
+                                         elapsed=item.elapsed))
+
+    def _run_extract_stage(self, stage: PipelineStage,
+                           batches: Iterable[Iterable[Tuple[TimeSeriesDataProduct, DataFileSource]]]) -> None:
+        try:
+            # time spent advancing the iterators is time spent enumerating and reading input files
+            start = datetime.now()
+            for batch in batches:
+                for product, data_file in batch:
+                    stage.busy += datetime.now() - start
+                    stage.item_count += 1
+                    stage.emit(_PipelineItem(product, data_file))
+                    start = datetime.now()
+        except Exception as err:
+            log.error(f'extract stage failed - no further input files will be ingested: {err}')
+            self._record_result(IngestResult('', '', IngestResult.FAILED,
+                                             error=f'input enumeration failed with {type(err).__name__}: {err}'))
+        finally:
+            stage.emit(_END_OF_STREAM)
+
+    def _run_processing_stage(self, stage: PipelineStage, process) -> None:
+        while (item := stage.receive()) is not _END_OF_STREAM:
+            start = datetime.now()
+            try:
+                process(item)
+                err = None
+            except Exception as caught_err:
+                err = caught_err
+
+            elapsed = datetime.now() - start
+            stage.item_count += 1
+            stage.busy += elapsed
+            item.elapsed += elapsed
+
+            if err is not None:
+                self._record_failure(item, stage, err)
+            elif stage.output_queue is not None:
+                stage.emit(item)
+            else:
+                self._record_result(IngestResult(item.product.get_full_id(), item.src_filename,
+                                                 IngestResult.SUCCEEDED, elapsed=item.elapsed))
+
+        if stage.output_queue is not None:
+            stage.emit(_END_OF_STREAM)
+
+    def _parse(self, item: _PipelineItem) -> None:
+        if self.force:
+            item.fingerprint = DataFileFingerprint.from_data_file(item.data_file)
+            item.fingerprint.compute_sha256(item.data_file)
+        else:
+            item.fingerprint = fingerprint_changed_data_file(item.product, item.data_file, session=self.session)
+
+        log.info(f'parsing file: {item.src_filename}')
+        item.parsed = parse_data_file(item.product, item.data_file)
+        item.data_file = None  # release the raw file contents, which are no longer needed
+
+    def _write(self, item: _PipelineItem) -> None:
+        item.stats = write_parsed_data_file(item.parsed, refresher=self.refresher, session=self.session)
+
+    def _refresh(self, item: _PipelineItem) -> None:
+        if self.refresher is None:
+            with item.stats.time_stage('refresh'):
+                refresh_dataset(item.parsed.dataset, item.parsed.data_temporal_span, session=self.session)
+        record_ingested_file(item.parsed, item.fingerprint, refresher=self.refresher, session=self.session)
+        record_ingest_stats(item.stats, session=self.session)
+        item.parsed.df = None  # release the parsed data, which is no longer needed
+        log.info(f'ingested file: {item.src_filename}')
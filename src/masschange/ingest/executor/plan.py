@@ -0,0 +1,278 @@
+import json
+import logging
+import os
+import tarfile
+from datetime import datetime, timedelta
+from typing import Callable, Collection, Dict, Iterable, List, Optional, Tuple
+
+from masschange.dataproducts.timeseriesdataproduct import TimeSeriesDataProduct
+from masschange.dataproducts.timeseriesdataset import TimeSeriesDataset
+from masschange.ingest.executor.datafilereaders.base import DataFileSource
+from masschange.ingest.executor.errors import EmptyProductException
+from masschange.ingest.executor.ingest import get_multiproduct_unzipped_input_batches, get_multiproduct_tarballs, \
+    get_tar_member_products, read_tar_member
+from masschange.utils.misc import get_human_readable_timedelta, get_human_readable_size
+
+log = logging.getLogger()
+
+
+class ThroughputFigures:
+    """
+    Per-stage database throughput figures, used to estimate the duration of an ingest.  Parse throughput is not
+    included, as it is measured from the sampled files when planning.
+
+    Attributes
+        copy_rows_per_second (float): the rate at which rows are written (including purge of overlapping data)
+
+        refresh_rows_per_second (float): the rate at which written rows are aggregated by continuous aggregate refreshes
+    """
+
+    # conservative figures for a single writer against a modest TimescaleDB instance, used in the absence of measurements
+    default_copy_rows_per_second = 100_000.0
+    default_refresh_rows_per_second = 500_000.0
+
+    def __init__(self, copy_rows_per_second: float = default_copy_rows_per_second,
+                 refresh_rows_per_second: float = default_refresh_rows_per_second):
+        self.copy_rows_per_second = copy_rows_per_second
+        self.refresh_rows_per_second = refresh_rows_per_second
+
+    @classmethod
+    def from_file(cls, filepath: str) -> 'ThroughputFigures':
+        """
+        Load figures from a JSON object having keys "copy_rows_per_second" and/or "refresh_rows_per_second", as
+        measured from previous runs.  Absent figures take their default values.
+        """
+        with open(filepath) as f:
+            figures = json.load(f)
+
+        return cls(copy_rows_per_second=float(figures.get('copy_rows_per_second', cls.default_copy_rows_per_second)),
+                   refresh_rows_per_second=float(
+                       figures.get('refresh_rows_per_second', cls.default_refresh_rows_per_second)))
+
+    @classmethod
+    def from_ingest_stats_file(cls, filepath: str) -> 'ThroughputFigures':
+        """
+        Derive figures from a JSON lines file of ingest stats, as written by ingest --stats-jsonl.  The copy figure
+        includes time spent deleting overlapping data and updating metadata, and the refresh figure only considers
+        writes which were refreshed immediately (rather than deferred).  Figures which cannot be derived take their
+        default values.
+        """
+        copy_rows = copy_seconds = refresh_rows = refresh_seconds = 0.0
+        with open(filepath) as f:
+            for line in f:
+                if line.strip() == '':
+                    continue
+                stats = json.loads(line)
+                stage_seconds = stats['stage_seconds']
+                copy_rows += stats['row_count']
+                copy_seconds += stage_seconds['delete'] + stage_seconds['copy'] + stage_seconds['metadata']
+                if stage_seconds['refresh'] > 0:
+                    refresh_rows += stats['row_count']
+                    refresh_seconds += stage_seconds['refresh']
+
+        copy_rows_per_second = copy_rows / copy_seconds if copy_seconds > 0 else cls.default_copy_rows_per_second
+        refresh_rows_per_second = refresh_rows / refresh_seconds if refresh_seconds > 0 \
+            else cls.default_refresh_rows_per_second
+        return cls(copy_rows_per_second=copy_rows_per_second, refresh_rows_per_second=refresh_rows_per_second)
+
+
+class ProductSample:
+    """
+    Measurements from parsing a sample of a product's data files
+
+    Attributes
+        file_count (int): the number of files sampled
+
+        byte_count (int): the total size of the sampled files
+
+        row_count (int): the total number of rows parsed from the sampled files
+
+        parse_elapsed (timedelta): the total time taken to parse the sampled files
+    """
+
+    def __init__(self):
+        self.file_count = 0
+        self.byte_count = 0
+        self.row_count = 0
+        self.parse_elapsed = timedelta(0)
+
+    def add(self, product: TimeSeriesDataProduct, data_file: DataFileSource, byte_count: int) -> None:
+        start = datetime.now()
+        try:
+            row_count = len(product.get_reader().load_data_from_file(data_file))
+        except EmptyProductException:
+            row_count = 0
+        self.parse_elapsed += datetime.now() - start
+        self.file_count += 1
+        self.byte_count += byte_count
+        self.row_count += row_count
+
+    @property
+    def bytes_per_row(self) -> Optional[float]:
+        return self.byte_count / self.row_count if self.row_count > 0 else None
+
+    @property
+    def parse_bytes_per_second(self) -> Optional[float]:
+        seconds = self.parse_elapsed.total_seconds()
+        return self.byte_count / seconds if seconds > 0 else None
+
+
+class DatasetPlan:
+    """
+    The estimated cost of ingesting the input files targeting a single dataset table
+
+    Attributes
+        table_name (str): the dataset table
+
+        product (TimeSeriesDataProduct): the product to which the dataset belongs
+
+        file_count (int): the number of input files
+
+        byte_count (int): the total (uncompressed) size of the input files
+
+        estimated_row_count (int | None): the estimated number of rows, or None if no sampled file contained data
+
+        parse_time (timedelta | None): the estimated time to parse the input files
+
+        copy_time (timedelta | None): the estimated time to write the rows
+
+        refresh_time (timedelta | None): the estimated time to refresh continuous aggregates over the rows
+    """
+
+    def __init__(self, table_name: str, product: TimeSeriesDataProduct):
+        self.table_name = table_name
+        self.product = product
+        self.file_count = 0
+        self.byte_count = 0
+        self.estimated_row_count: Optional[int] = None
+        self.parse_time: Optional[timedelta] = None
+        self.copy_time: Optional[timedelta] = None
+        self.refresh_time: Optional[timedelta] = None
+
+    @property
+    def total_time(self) -> timedelta:
+        return sum((t for t in [self.parse_time, self.copy_time, self.refresh_time] if t is not None), timedelta(0))
+
+    def estimate(self, sample: ProductSample, throughput: ThroughputFigures) -> None:
+        """Populate estimates from a sample of the product's files and the database throughput figures"""
+        if sample.parse_bytes_per_second is not None:
+            self.parse_time = timedelta(seconds=self.byte_count / sample.parse_bytes_per_second)
+        if sample.bytes_per_row is None:
+            return
+
+        self.estimated_row_count = round(self.byte_count / sample.bytes_per_row)
+        self.copy_time = timedelta(seconds=self.estimated_row_count / throughput.copy_rows_per_second)
+        self.refresh_time = timedelta(seconds=self.estimated_row_count / throughput.refresh_rows_per_second)
+
+
+def plan_ingest(products: Collection[TimeSeriesDataProduct], src: str, data_is_zipped: bool = True,
+                samples_per_product: int = 3, throughput: Optional[ThroughputFigures] = None) -> List[DatasetPlan]:
+    """
+    Estimate the cost of ingesting the input files under src for each dataset table, without touching the database.
+
+    Input files are enumerated as they would be by an ingest (inside tarballs, if data_is_zipped).  The first
+    samples_per_product files of each product are parsed to measure the product's bytes per row and parse throughput,
+    from which each dataset's row count and parse time are extrapolated by file size.  Write and refresh times are then
+    estimated from the throughput figures.
+
+    Parameters
+    ----------
+    products - the products to plan ingestion of
+    src - the directory containing input files or tarballs
+    data_is_zipped - whether to look in tarballs for source data
+    samples_per_product - the number of files of each product to parse
+    throughput - database throughput figures, or None to use the defaults
+
+    Returns
+    -------
+    a plan for each targeted dataset table, in order of first appearance
+
+    """
+    throughput = throughput or ThroughputFigures()
+    samples: Dict[str, ProductSample] = {product.get_full_id(): ProductSample() for product in products}
+    plans: Dict[str, DatasetPlan] = {}
+
+    for product, data_file_name, byte_count, read_data_file in _enumerate_input_files(products, src, data_is_zipped):
+        reader = product.get_reader()
+        dataset = TimeSeriesDataset(product, reader.extract_dataset_version(data_file_name),
+                                    reader.extract_instrument_id(data_file_name))
+        plan = plans.setdefault(dataset.get_table_name(), DatasetPlan(dataset.get_table_name(), product))
+        plan.file_count += 1
+        plan.byte_count += byte_count
+
+        sample = samples[product.get_full_id()]
+        if sample.file_count < samples_per_product:
+            log.debug(f'sampling {data_file_name}')
+            sample.add(product, read_data_file(), byte_count)
+
+    for plan in plans.values():
+        plan.estimate(samples[plan.product.get_full_id()], throughput)
+
+    return list(plans.values())
+
+
+def _enumerate_input_files(products: Collection[TimeSeriesDataProduct], src: str, data_is_zipped: bool) -> Iterable[
+    Tuple[TimeSeriesDataProduct, str, int, Callable[[], DataFileSource]]]:
+    """
+    Provide a (product, data file name, size, reader) tuple for each input file, where reader is a function returning
+    the file as a DataFileSource.  Tarball members must be read before the next tuple is requested, as tarballs are
+    streamed.
+    """
+    if not data_is_zipped:
+        for batch in get_multiproduct_unzipped_input_batches(src, products):
+            for product, fp in batch:
+                yield product, fp, os.path.getsize(fp), lambda fp=fp: fp
+        return
+
+    for tar_fp, member_dispatch_table in get_multiproduct_tarballs(src, products):
+        log.debug(f'listing contents of {tar_fp}')
+        with tarfile.open(tar_fp, mode='r|*') as tf:
+            for member in tf:
+                # a member may be matched by several products, but may only be read once
+                member_contents = []
+
+                def read_member(member=member, member_contents=member_contents):
+                    if len(member_contents) == 0:
+                        member_contents.append(read_tar_member(tf, tar_fp, member))
+                    return member_contents[0]
+
+                for product in get_tar_member_products(member, member_dispatch_table):
+                    yield product, os.path.join(tar_fp, member.name), member.size, read_member
+
+
+def format_plan(plans: Collection[DatasetPlan], workers: int = 1) -> str:
+    """
+    Format plans as a table, followed by totals and an estimate of the elapsed time with the given number of workers.
+    As files targeting the same table are ingested sequentially, the elapsed time is bounded below by the time taken by
+    the largest dataset.
+    """
+    def format_time(td: Optional[timedelta]) -> str:
+        return get_human_readable_timedelta(td) if td is not None else '?'
+
+    header = ['dataset table', 'files', 'bytes', 'est. rows', 'parse', 'COPY', 'cagg refresh']
+    rows = [[plan.table_name, str(plan.file_count), get_human_readable_size(plan.byte_count),
+             str(plan.estimated_row_count) if plan.estimated_row_count is not None else '?',
+             format_time(plan.parse_time), format_time(plan.copy_time), format_time(plan.refresh_time)]
+            for plan in plans]
+
+    total_time = sum((plan.total_time for plan in plans), timedelta(0))
+    rows.append(['TOTAL', str(sum(plan.file_count for plan in plans)),
+                 get_human_readable_size(sum(plan.byte_count for plan in plans)),
+                 str(sum(plan.estimated_row_count or 0 for plan in plans)),
+                 format_time(sum((plan.parse_time or timedelta(0) for plan in plans), timedelta(0))),
+                 format_time(sum((plan.copy_time or timedelta(0) for plan in plans), timedelta(0))),
+                 format_time(sum((plan.refresh_time or timedelta(0) for plan in plans), timedelta(0)))])
+
+    column_widths = [max(len(row[i]) for row in [header] + rows) for i in range(len(header))]
+    lines = ['  '.join(value.ljust(width) if i == 0 else value.rjust(width)
+                       for i, (value, width) in enumerate(zip(row, column_widths)))
+             for row in [header] + rows]
+    lines.insert(1, '-' * len(lines[0]))
+    lines.insert(-1, '-' * len(lines[0]))
+
+    largest_dataset_time = max((plan.total_time for plan in plans), default=timedelta(0))
+    elapsed = max(total_time / max(workers, 1), largest_dataset_time)
+    lines.append('')
+    lines.append(f'estimated elapsed time with {workers} worker(s): {format_time(elapsed)} '
+                 f'(the largest dataset alone takes {format_time(largest_dataset_time)})')
+    return '\n'.join(lines)
@@ -0,0 +1,139 @@
+import logging
+from datetime import datetime, timezone
+from typing import Collection, Dict, List, Optional
+
+from masschange.dataproducts.timeseriesdataset import TimeSeriesDataset
+from masschange.db.data.caggs import refresh_continuous_aggregates, refresh_continuous_aggregates_over_spans
+from masschange.db.ingest.manifest import IngestedFileRecord, put_ingested_file_record
+from masschange.db.metadata.update import update_metadata
+from masschange.utils.timespan import TimeSpan, merge_timespans
+
+log = logging.getLogger()
+
+
+class DeferredRefresher:
+    """
+    Accumulates the spans of data written to each dataset, so that continuous aggregates may be refreshed once over the
+    merged spans of many files rather than once per file.  Manifest records for the files are held until their dataset
+    has been refreshed, so that a file is only considered ingested once its aggregates are up to date.
+
+    Attributes
+        flush_every (int | None): the number of pending files at which to automatically flush, or None to flush only
+            when flush() is called
+
+        pending_file_count (int): the number of files written since the last flush
+    """
+
+    def __init__(self, flush_every: Optional[int] = None):
+        self.flush_every = flush_every
+        self.pending_file_count = 0
+        self._datasets: Dict[str, TimeSeriesDataset] = {}
+        self._spans: Dict[str, List[TimeSpan]] = {}
+        self._manifest_records: Dict[str, List[IngestedFileRecord]] = {}
+
+    def add(self, dataset: TimeSeriesDataset, data_span: TimeSpan,
+            manifest_record: Optional[IngestedFileRecord] = None) -> None:
+        """Register a file's data as written to a dataset, flushing if flush_every files are now pending"""
+        table_name = dataset.get_table_name()
+        self._datasets.setdefault(table_name, dataset)
+        self._spans.setdefault(table_name, []).append(data_span)
+        if manifest_record is not None:
+            self._manifest_records.setdefault(table_name, []).append(manifest_record)
+        self.pending_file_count += 1
+
+        self._flush_if_due()
+
+    def merge(self, other: 'DeferredRefresher') -> None:
+        """Take over the pending work of another refresher (for example, one populated in a worker process)"""
+        for table_name, dataset in other._datasets.items():
+            self._datasets.setdefault(table_name, dataset)
+            self._spans.setdefault(table_name, []).extend(other._spans.get(table_name, []))
+            self._manifest_records.setdefault(table_name, []).extend(other._manifest_records.get(table_name, []))
+        self.pending_file_count += other.pending_file_count
+
+        self._flush_if_due()
+
+    @property
+    def pending_table_names(self) -> List[str]:
+        """The tables of datasets having data pending refresh"""
+        return list(self._datasets.keys())
+
+    def flush(self, table_names: Optional[Collection[str]] = None) -> None:
+        """
+        Refresh the continuous aggregates of each dataset with pending data, then record its files.  If table_names is
+        provided, only those datasets are refreshed.
+        """
+        table_names = [table_name for table_name in self.pending_table_names
+                       if table_names is None or table_name in table_names]
+        if len(table_names) == 0:
+            return
+
+        file_count = sum(len(self._spans[table_name]) for table_name in table_names)
+        log.info(f'refreshing {len(table_names)} datasets following ingestion of {file_count} files')
+        for table_name in table_names:
+            dataset = self._datasets[table_name]
+            self._refresh(dataset, self._spans[table_name])
+            for record in self._manifest_records.get(table_name, []):
+                put_ingested_file_record(record)
+
+            self.pending_file_count -= len(self._spans[table_name])
+            del self._datasets[table_name]
+            del self._spans[table_name]
+            self._manifest_records.pop(table_name, None)
+
+    def _refresh(self, dataset: TimeSeriesDataset, data_spans: Collection[TimeSpan]) -> None:
+        refresh_continuous_aggregates_over_spans(dataset, data_spans)
+
+    def _flush_if_due(self) -> None:
+        if self.flush_every is not None and self.pending_file_count >= self.flush_every:
+            self.flush()
+
+
+class BackfillRefresher(DeferredRefresher):
+    """
+    A DeferredRefresher for bulk loading of historical data, which additionally suspends per-file database maintenance.
+
+    The spans occupied by each dataset's data (its extant data at first write, plus all data written since) are tracked,
+    so that deletion of overlapping data may be skipped for files whose span is known to be empty.  On flush, each
+    dataset's continuous aggregates are rebuilt in full, in chunks, rather than being refreshed over the written spans.
+    """
+
+    def __init__(self, flush_every: Optional[int] = None):
+        super().__init__(flush_every=flush_every)
+        self._occupied_spans: Dict[str, List[TimeSpan]] = {}
+
+    def track_dataset(self, dataset: TimeSeriesDataset) -> None:
+        """Begin tracking the spans occupied by an existing dataset's data, if not already tracked"""
+        table_name = dataset.get_table_name()
+        if table_name in self._occupied_spans:
+            return
+
+        extant_span = dataset.get_data_span()
+        if extant_span is None:
+            self._occupied_spans[table_name] = []
+        else:
+            # stored timestamps are timezone-aware, while parsed timestamps are naive UTC
+            self._occupied_spans[table_name] = [TimeSpan(begin=_to_naive_utc(extant_span.begin),
+                                                         end=_to_naive_utc(extant_span.end))]
+
+    def may_contain_data(self, dataset: TimeSeriesDataset, data_span: TimeSpan) -> bool:
+        """Return whether a tracked dataset may already contain data within data_span"""
+        return any(span.intersects(data_span) for span in self._occupied_spans[dataset.get_table_name()])
+
+    def mark_written(self, dataset: TimeSeriesDataset, data_span: TimeSpan) -> None:
+        """Register data as written to a tracked dataset within data_span"""
+        table_name = dataset.get_table_name()
+        self._occupied_spans[table_name] = merge_timespans(self._occupied_spans[table_name] + [data_span])
+
+    def merge(self, other: 'BackfillRefresher') -> None:
+        for table_name, spans in other._occupied_spans.items():
+            self._occupied_spans[table_name] = merge_timespans(self._occupied_spans.get(table_name, []) + spans)
+        super().merge(other)
+
+    def _refresh(self, dataset: TimeSeriesDataset, data_spans: Collection[TimeSpan]) -> None:
+        refresh_continuous_aggregates(dataset, enable_chunking=True)
+        update_metadata(dataset, dataset.get_data_span())
+
+
+def _to_naive_utc(dt: datetime) -> datetime:
+    return dt.astimezone(timezone.utc).replace(tzinfo=None) if dt.tzinfo is not None else dt
@@ -1,8 +1,12 @@
 import functools
 import logging
+import queue
 import random
+import threading
 from datetime import timedelta, datetime
-from typing import Callable
+from typing import Callable, Iterable, Iterator, TypeVar
+
+T = TypeVar('T')
 
 
 def get_human_readable_timedelta(td: timedelta) -> str:
@@ -24,6 +28,16 @@ def get_human_readable_timedelta(td: timedelta) -> str:
         f"{str(m).rjust(2, '0')}m" if show_m else "") + f"{str(s).rjust(2, '0')}s"
 
 
+def get_human_readable_size(byte_count: int) -> str:
+    size = float(byte_count)
+    for unit in ['B', 'KiB', 'MiB', 'GiB', 'TiB']:
+        if size < 1024 or unit == 'TiB':
+            break
+        size /= 1024
+
+    return f'{size:.1f}{unit}' if unit != 'B' else f'{int(size)}B'
+
+
 def get_random_hex_id(id_len: int = 6) -> str:
     val = random.randint(0, 16 ** id_len)
     return hex(val)[2:]
@@ -47,3 +61,44 @@ def log_elapsed_time(label: str = None, log_f: Callable = logging.getLogger().in
 
 def get_human_readable_elapsed_since(begin: datetime) -> str:
     return get_human_readable_timedelta(datetime.now() - begin)
+
+
+def iterate_ahead(iterable: Iterable[T], depth: int = 1) -> Iterator[T]:
+    """
+    Iterate over iterable, advancing it in a background thread up to depth items ahead of the consumer, so that
+    production of the next item overlaps consumption of the current one.  Exceptions raised by iterable are re-raised to
+    the consumer.  If the consumer stops iterating early, the background thread stops once its current item is produced.
+    """
+    items = queue.Queue(maxsize=depth)
+    stopped = threading.Event()
+    end_of_items = object()
+
+    def put(item, err=None) -> bool:
+        while not stopped.is_set():
+            try:
+                items.put((item, err), timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put(item):
+                    return
+            put(end_of_items)
+        except Exception as err:
+            put(None, err)
+
+    threading.Thread(target=produce, daemon=True).start()
+    try:
+        while True:
+            item, err = items.get()
+            if err is not None:
+                raise err
+            if item is end_of_items:
+                return
+            yield item
+    finally:
+        stopped.set()
@@ -1,5 +1,5 @@
 from datetime import datetime, timedelta, date
-from typing import Iterable
+from typing import Iterable, List
 
 
 class TimeSpan:
@@ -34,6 +34,10 @@ class TimeSpan:
     def contains(self, dt: datetime) -> bool:
         return self.begin <= dt <= self.end
 
+    def intersects(self, other: 'TimeSpan') -> bool:
+        """Return whether any instant falls within both this TimeSpan and other"""
+        return self.begin <= other.end and other.begin <= self.end
+
     def overlaps(self, d: date) -> bool:
         """
         :param d:
@@ -53,4 +57,43 @@ class TimeSpan:
             date_iter += timedelta(days=1)
 
     def __str__(self):
-        return f'TimeSpan(begin={self.begin.isoformat()}, end={self.end.isoformat()})'
\ No newline at end of file
+        return f'TimeSpan(begin={self.begin.isoformat()}, end={self.end.isoformat()})'
+
+
+def merge_timespans(spans: Iterable[TimeSpan]) -> List[TimeSpan]:
+    """
+    Merge a collection of spans into the minimal sorted list of disjoint spans covering the same instants.  Spans which
+    overlap or abut are merged.
+    """
+    merged = []
+    for span in sorted(spans, key=lambda span: span.begin):
+        if len(merged) > 0 and span.begin <= merged[-1].end:
+            merged[-1] = TimeSpan(begin=merged[-1].begin, end=max(merged[-1].end, span.end))
+        else:
+            merged.append(span)
+
+    return merged
+
+
+def subtract_timespans(span: TimeSpan, subtrahends: Iterable[TimeSpan],
+                       resolution: timedelta = timedelta(microseconds=1)) -> List[TimeSpan]:
+    """
+    Return the minimal sorted list of disjoint spans covering the instants of span which are not covered by any of
+    subtrahends.  As spans are inclusive of their bounds, the returned spans are separated from the subtrahends by the
+    given resolution (that of the stored timestamps).
+    """
+    remainders = []
+    begin = span.begin
+    for subtrahend in merge_timespans(subtrahends):
+        if subtrahend.end < begin:
+            continue
+        if subtrahend.begin > span.end:
+            break
+        if subtrahend.begin > begin:
+            remainders.append(TimeSpan(begin=begin, end=subtrahend.begin - resolution))
+        begin = subtrahend.end + resolution
+
+    if begin <= span.end:
+        remainders.append(TimeSpan(begin=begin, end=span.end))
+
+    return remainders
@@ -1,11 +1,27 @@
+import io
 import logging
+import tempfile
+import time
 import unittest
 from datetime import datetime
-from typing import List
+from typing import List, Optional
+
+import os
+import re
+from unittest import mock
 
 import numpy as np
+import pandas as pd
 
-from masschange.ingest.executor.datafilereaders.base import AsciiDataFileReader, AsciiDataFileReaderColumn
+from masschange.dataproducts.implementations.gracefo.primary.acc1a import GraceFOAcc1ADataProduct
+from masschange.dataproducts.implementations.gracefo.primary.gnv1a import GraceFOGnv1ADataProduct
+from masschange.dataproducts.implementations.gracefo.primary.gnv1a_prn import GraceFOGnv1APrnDataProduct
+from masschange.dataproducts.implementations.gracefo.primary.ilg1a import GraceFOIlg1ADataProduct
+from masschange.dataproducts.implementations.gracefo.primary.kbr1a import GraceFOKbr1ADataProduct
+from masschange.dataproducts.utils import get_time_series_dataproducts
+from masschange.ingest.executor.datafilereaders.base import AsciiDataFileReader, AsciiDataFileReaderColumn, \
+    InMemoryDataFile, TimestampColumns, open_data_file, parse_engines, set_parse_engine, set_parse_workers
+from masschange.ingest.executor.ingest import get_zipped_input_iterable
 
 log = logging.getLogger()
 
@@ -63,3 +79,311 @@ class AsciiDataFileReaderTestCase(unittest.TestCase):
         for column in const_columns:
             with self.assertRaises(ValueError):
                 reader._ensure_constant_column_value(column.name, column.const_value, raw_data)
+
+
+class ParallelParseTestCase(unittest.TestCase):
+    """Test that parsing a data section as concurrently-parsed byte ranges matches parsing it whole"""
+
+    def tearDown(self):
+        set_parse_workers(1)
+
+    def assertParallelParseMatches(self, reader, data_file):
+        expected = reader._load_raw_data_from_file(data_file)
+        set_parse_workers(3)
+        with mock.patch.object(AsciiDataFileReader, 'parallel_parse_min_bytes', 0):
+            actual = reader._load_raw_data_from_file(data_file)
+        set_parse_workers(1)
+
+        self.assertEqual(expected.dtype, actual.dtype)
+        np.testing.assert_array_equal(expected, actual)
+
+    def test_parallel_parse_of_filepath(self):
+        self.assertParallelParseMatches(GraceFOAcc1ADataProduct().get_reader(),
+                                        './tests/input_data/ACC1A_2023-06-03_C_04.txt')
+
+    def test_parallel_parse_of_in_memory_prod_flag_file(self):
+        reader = GraceFOKbr1ADataProduct().get_reader()
+        data_file = next(iter(get_zipped_input_iterable(os.path.abspath('./tests/input_data'),
+                                                        reader.get_zipped_input_file_default_regex(),
+                                                        reader.get_input_file_default_regex())))
+        self.assertParallelParseMatches(reader, data_file)
+
+
+class ChunkedReadTestCase(unittest.TestCase):
+    """Test that the chunks of a data file, concatenated, match the data file read whole"""
+
+    def get_zipped_data_file(self, reader):
+        return next(iter(get_zipped_input_iterable(os.path.abspath('./tests/input_data'),
+                                                   reader.get_zipped_input_file_default_regex(),
+                                                   reader.get_input_file_default_regex())))
+
+    def assertChunksMatch(self, reader, data_file, max_rows: int) -> List[pd.DataFrame]:
+        expected = reader.load_data_from_file(data_file)
+        chunks = list(reader.load_data_chunks(data_file, max_rows))
+
+        pd.testing.assert_frame_equal(expected, pd.concat(chunks, ignore_index=True), check_exact=True)
+        return chunks
+
+    def test_chunked_read_of_filepath(self):
+        chunks = self.assertChunksMatch(GraceFOAcc1ADataProduct().get_reader(),
+                                        './tests/input_data/ACC1A_2023-06-03_C_04.txt', 100)
+        self.assertTrue(len(chunks) > 1)
+        self.assertTrue(all(len(chunk) <= 100 for chunk in chunks))
+
+    def test_chunked_read_of_prod_flag_file(self):
+        reader = GraceFOKbr1ADataProduct().get_reader()
+        self.assertChunksMatch(reader, self.get_zipped_data_file(reader), 7)
+
+    def test_chunked_read_preserves_derived_fields_depending_on_following_rows(self):
+        reader = GraceFOGnv1ADataProduct().get_reader()
+        for max_rows in [1, 3]:
+            self.assertChunksMatch(reader, self.get_zipped_data_file(reader), max_rows)
+
+    def test_chunked_read_of_variable_clusters_file(self):
+        reader = GraceFOGnv1APrnDataProduct().get_reader()
+        self.assertChunksMatch(reader, self.get_zipped_data_file(reader), 5)
+
+    def test_unchunkable_file_is_read_whole(self):
+        reader = GraceFOIlg1ADataProduct().get_reader()
+        chunks = self.assertChunksMatch(reader, self.get_zipped_data_file(reader), 1)
+        self.assertEqual(1, len(chunks))
+
+
+class TimestampColumnsTestCase(unittest.TestCase):
+    """Test that vectorized timestamps are rounded exactly as timestamps derived row by row with timedelta"""
+    epoch = datetime(2000, 1, 1, 12)
+
+    def assertDerivedAsRowByRow(self, columns: TimestampColumns, df: pd.DataFrame):
+        class Reader(GraceFOAcc1ADataProduct().get_reader().__class__):
+            timestamp_columns = columns
+
+        self.assertTrue(columns.can_derive(df))
+        pd.testing.assert_series_equal(df.apply(Reader.populate_timestamp, axis=1),
+                                       columns.derive(df, Reader.get_reference_epoch()), check_exact=True)
+
+    def test_integer_seconds_and_fraction(self):
+        rng = np.random.default_rng(0)
+        intg = rng.integers(7 * 10 ** 8, 8 * 10 ** 8, 1000, dtype=np.uint64)
+        # as in parsed data, the rows passed to populate_timestamp() are of mixed type
+        qualflg = ['00000000'] * 1000
+        self.assertDerivedAsRowByRow(TimestampColumns('intg', 'frac'), pd.DataFrame(
+            {'intg': intg, 'frac': rng.integers(0, 10 ** 6, 1000, dtype=np.uint64), 'qualflg': qualflg}))
+        # nanosecond fractions include exact half-microsecond ties, which are rounded to even
+        self.assertDerivedAsRowByRow(TimestampColumns('intg', 'frac', fraction_unit='ns'), pd.DataFrame(
+            {'intg': intg, 'frac': np.concatenate([rng.integers(0, 10 ** 9, 990, dtype=np.uint64),
+                                                   np.arange(500, 10500, 1000, dtype=np.uint64)]),
+             'qualflg': qualflg}))
+
+    def test_fractional_seconds(self):
+        rng = np.random.default_rng(0)
+        seconds = np.concatenate([rng.uniform(7 * 10 ** 8, 8 * 10 ** 8, 990), 7.5e8 + np.arange(10) + 0.0000005,
+                                  [-0.5e-6, 0.0]])
+        self.assertDerivedAsRowByRow(TimestampColumns('seconds'), pd.DataFrame({'seconds': seconds}))
+
+    def test_non_finite_offsets_are_left_to_timedelta(self):
+        self.assertFalse(TimestampColumns('seconds').can_derive(pd.DataFrame({'seconds': [1.0, np.nan]})))
+
+
+class ProdFlagDecodingTestCase(unittest.TestCase):
+    """Test that the data fields of each row are assigned to the columns of the bits set in its prod_flag"""
+    reader = GraceFOKbr1ADataProduct().get_reader()
+
+    def prepare_data_section(self, data_section: str) -> pd.DataFrame:
+        raw_data = self.reader._parse_data_section(io.StringIO(data_section))
+        return self.reader._prepare_data(raw_data, 'KBR1A_2023-06-01_C_04.txt')
+
+    def test_fields_are_assigned_to_set_bits(self):
+        df = self.prepare_data_section('738849600 50000 C 51 9 0011000000000000 00000000 1.5 2.5\n'
+                                       '738849600 150000 C 51 9 1100000000000001 00000000 3.5 7 8\n')
+
+        np.testing.assert_array_equal([np.nan, 3.5], df['ca_range'])
+        np.testing.assert_array_equal([1.5, np.nan], df['k_phase'])
+        np.testing.assert_array_equal([2.5, np.nan], df['ka_phase'])
+        self.assertEqual(pd.Int32Dtype(), df['k_snr'].dtype)
+        self.assertEqual([pd.NA, 7], df['k_snr'].tolist())
+        self.assertEqual([pd.NA, 8], df['ka_snr'].tolist())
+        self.assertTrue(df['ca_chan'].isna().all())
+
+    def test_field_count_mismatch_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.prepare_data_section('738849600 50000 C 51 9 0011000000000000 00000000 1.5\n')
+
+    def test_non_binary_prod_flag_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.prepare_data_section('738849600 50000 C 51 9 0021000000000000 00000000 1.5 2.5\n')
+
+
+class VariableDataClustersTestCase(unittest.TestCase):
+    """Test that rows with a variable number of data clusters are reformatted to one cluster per row"""
+    reader = GraceFOGnv1APrnDataProduct().get_reader()
+
+    def format_row(self, rcv_time: int, clusters: List[str]) -> str:
+        return ' '.join([str(rcv_time), str(len(clusters)), 'C'] + ['0'] * 19 + ['', '00000000', ''] + clusters) + '\n'
+
+    def test_clusters_are_reformatted_to_rows(self):
+        data = self.reader._parse_data_section(io.StringIO(
+            self.format_row(738849600, ['3 19.5 20.5', '6 36.5 307.5']) +
+            self.format_row(738849602, []) +
+            self.format_row(738849604, ['11 33.5 251.5'])))
+
+        self.assertEqual([738849600, 738849600, 738849604], data['rcv_time'].tolist())
+        self.assertEqual([2, 2, 1], data['n_prns'].tolist())
+        self.assertEqual([3, 6, 11], data['prn_id'].tolist())
+        self.assertEqual([19.5, 36.5, 33.5], data['el_prn'].tolist())
+        self.assertEqual([20.5, 307.5, 251.5], data['az_prn'].tolist())
+
+
+class LogFileTestCase(unittest.TestCase):
+    """Test that the fixed columns and free-format messages of log files are split in a single pass"""
+    reader = GraceFOIlg1ADataProduct().get_reader()
+
+    def load_raw_data(self, data_section: bytes) -> np.ndarray:
+        content = b'PRODUCER AGENCY : NASA\r\nEND OF HEADER\r\n' + data_section
+        return self.reader._load_raw_data_from_file(InMemoryDataFile('ILG1A_2023-06-01_C_04.txt', content))
+
+    def test_messages_are_split_from_fixed_columns(self):
+        data = self.load_raw_data(b'738849660 1 C >OL: 1\t13696, 19 > 2\r\n'
+                                  b'738849661 2 C >\r\n'
+                                  b'738849662 3 C >Caf\xe9 # state=\xb0  \r\n')
+
+        self.assertEqual([738849660, 738849662], data['rcv_time'].tolist())
+        self.assertEqual([1, 3], data['pkt_count'].tolist())
+        self.assertEqual(['C', 'C'], data['gracefo_id'].tolist())
+        self.assertEqual(['OL: 1\t13696; 19 > 2', 'Caf\xe9 # state=\xb0'], data['logpacket'].tolist())
+
+    def test_long_messages_are_truncated(self):
+        data = self.load_raw_data(b'738849660 1 C >' + b'x' * 1500 + b'\n')
+
+        self.assertEqual('x' * self.reader.log_msg_max_size(), data['logpacket'][0])
+
+    def test_missing_end_of_header_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.reader._load_raw_data_from_file(InMemoryDataFile('ILG1A_2023-06-01_C_04.txt', b'738849660 1 C >x\n'))
+
+
+def get_available_parse_engines() -> List[str]:
+    """Return the parse engines whose dependencies are installed"""
+    try:
+        import pyarrow.csv
+        return list(parse_engines)
+    except ImportError:
+        return [engine for engine in parse_engines if engine != 'pyarrow']
+
+
+class ParseEngineTestCase(unittest.TestCase):
+    """Test that every parse engine produces the same typed columns as loadtxt"""
+
+    def tearDown(self):
+        set_parse_engine('loadtxt')
+
+    def assertEnginesMatch(self, reader, data_file):
+        expected = reader._load_raw_data_from_file(data_file)
+        for engine in get_available_parse_engines():
+            set_parse_engine(engine)
+            actual = reader._load_raw_data_from_file(data_file)
+            set_parse_engine('loadtxt')
+
+            self.assertEqual(expected.dtype, actual.dtype, msg=engine)
+            np.testing.assert_array_equal(expected, actual, err_msg=engine)
+
+    def test_engines_match_for_filepath(self):
+        self.assertEnginesMatch(GraceFOAcc1ADataProduct().get_reader(), './tests/input_data/ACC1A_2023-06-03_C_04.txt')
+
+    def test_engines_match_for_variable_field_count_file(self):
+        reader = GraceFOGnv1ADataProduct().get_reader()
+        data_file = next(iter(get_zipped_input_iterable(os.path.abspath('./tests/input_data'),
+                                                        reader.get_zipped_input_file_default_regex(),
+                                                        reader.get_input_file_default_regex())))
+        self.assertEnginesMatch(reader, data_file)
+
+    def test_reader_engine_overrides_process_engine(self):
+        class Reader(GraceFOAcc1ADataProduct().get_reader().__class__):
+            parse_engine = 'pandas'
+
+        set_parse_engine('loadtxt')
+        with mock.patch.object(Reader, '_parse_data_section_with_pandas',
+                               wraps=Reader._parse_data_section_with_pandas) as parse:
+            Reader._load_raw_data_from_file('./tests/input_data/ACC1A_2023-06-03_C_04.txt')
+        parse.assert_called_once()
+
+    def test_unrecognised_engine_is_rejected(self):
+        with self.assertRaises(ValueError):
+            set_parse_engine('unrecognised')
+
+
+class ParseEngineBenchmarkTestCase(unittest.TestCase):
+    """
+    Measure the throughput of each parse engine for each product parsed by AsciiDataFileReader._parse_data_section(),
+    over the sample data files scaled up to scaled_row_count rows
+    """
+    input_dir = './tests/input_data'
+    scaled_row_count = 20000
+
+    def tearDown(self):
+        set_parse_engine('loadtxt')
+
+    @staticmethod
+    def parses_with_engine(reader: AsciiDataFileReader) -> bool:
+        """Return whether the reader loads its raw data with AsciiDataFileReader._parse_data_section()"""
+        return all(getattr(type(reader), method).__func__ is getattr(AsciiDataFileReader, method).__func__
+                   for method in ['_load_raw_data_from_file', '_parse_data_section'])
+
+    def get_sample_data_file(self, reader):
+        unzipped_data_files = sorted(os.path.join(path, fn) for path, _, filenames in os.walk(self.input_dir)
+                                     for fn in filenames if re.match(reader.get_input_file_default_regex(), fn))
+        if len(unzipped_data_files) > 0:
+            return unzipped_data_files[0]
+
+        return next(iter(get_zipped_input_iterable(os.path.abspath(self.input_dir),
+                                                   reader.get_zipped_input_file_default_regex(),
+                                                   reader.get_input_file_default_regex())), None)
+
+    def write_scaled_data_file(self, reader, data_file, dir_path: str) -> Optional[str]:
+        """Write the data file, with its data rows repeated to scaled_row_count rows, or return None if it has none"""
+        header_line_count = reader.get_header_line_count(data_file)
+        with open_data_file(data_file, 'rb') as f:
+            header_lines = [f.readline() for _ in range(header_line_count)]
+            data_lines = [line if line.endswith(b'\n') else line + b'\n' for line in f if line.strip() != b'']
+        if len(data_lines) == 0:
+            return None
+
+        scaled_fp = os.path.join(dir_path, os.path.basename(str(data_file)))
+        with open(scaled_fp, 'wb') as f:
+            f.writelines(header_lines)
+            for _ in range(self.scaled_row_count // len(data_lines)):
+                f.writelines(data_lines)
+            f.writelines(data_lines[:self.scaled_row_count % len(data_lines)])
+        return scaled_fp
+
+    def test_parse_engine_throughput(self):
+        engines = get_available_parse_engines()
+        rows_per_second_by_engine = {engine: [] for engine in engines}
+        with tempfile.TemporaryDirectory() as dir_path:
+            for product in sorted(get_time_series_dataproducts(), key=lambda p: p.get_full_id()):
+                reader = product.get_reader()
+                if not isinstance(reader, AsciiDataFileReader) or not self.parses_with_engine(reader):
+                    continue
+
+                data_file = self.get_sample_data_file(reader)
+                scaled_fp = self.write_scaled_data_file(reader, data_file, dir_path) if data_file is not None else None
+                if scaled_fp is None:
+                    continue
+
+                expected = None
+                throughputs = []
+                for engine in engines:
+                    set_parse_engine(engine)
+                    start = time.perf_counter()
+                    data = reader._load_raw_data_from_file(scaled_fp)
+                    rows_per_second = len(data) / (time.perf_counter() - start)
+                    rows_per_second_by_engine[engine].append(rows_per_second)
+                    throughputs.append(f'{engine}={rows_per_second:.0f}')
+
+                    if expected is None:
+                        expected = data
+                    np.testing.assert_array_equal(expected, data, err_msg=f'{product.get_full_id()} ({engine})')
+
+                log.info(f'{product.get_full_id()} rows/s: {" ".join(throughputs)}')
+
+        for engine, rows_per_second in rows_per_second_by_engine.items():
+            log.info(f'{engine} median rows/s over {len(rows_per_second)} products: {np.median(rows_per_second):.0f}')
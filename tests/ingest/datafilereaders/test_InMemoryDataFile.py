@@ -0,0 +1,34 @@
+import os
+import unittest
+
+import pandas as pd
+
+from masschange.ingest.executor.datafilereaders.base import InMemoryDataFile
+from masschange.ingest.executor.datafilereaders.gracefo.primary.acc1a import GraceFOAcc1ADataFileReader
+from masschange.ingest.executor.datafilereaders.gracefo.primary.hrt1a import GraceFOHrt1ADataFileReader
+
+
+class InMemoryDataFileTestCase(unittest.TestCase):
+    """Test that readers produce identical data from filepaths and from in-memory file-like objects"""
+
+    def assert_in_memory_load_matches(self, reader, filepath: str):
+        with open(filepath, 'rb') as f:
+            data_file = InMemoryDataFile(os.path.join('some.tgz', os.path.split(filepath)[-1]), f.read())
+
+        self.assertEqual(reader.extract_instrument_id(filepath), reader.extract_instrument_id(data_file))
+        self.assertEqual(str(reader.extract_dataset_version(filepath)), str(reader.extract_dataset_version(data_file)))
+        pd.testing.assert_frame_equal(reader.load_data_from_file(filepath), reader.load_data_from_file(data_file))
+
+        # data files may be read repeatedly
+        pd.testing.assert_frame_equal(reader.load_data_from_file(filepath), reader.load_data_from_file(data_file))
+
+    def test_acc1a(self):
+        self.assert_in_memory_load_matches(GraceFOAcc1ADataFileReader(), './tests/input_data/ACC1A_2023-06-03_C_04.txt')
+
+    def test_hrt1a(self):
+        self.assert_in_memory_load_matches(GraceFOHrt1ADataFileReader(),
+                                           './tests/input_data/test_unzipped/HRT1A_2023-06-01_C_04.txt')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from masschange.ingest.crawler import enumeration
+from masschange.ingest.crawler.enumeration import enumerate_files_in_dir_tree
+from masschange.ingest.crawler.index import CrawlerIndex
+
+
+class CrawlerIndexTestCase(unittest.TestCase):
+    def setUp(self):
+        self.root_dir = tempfile.mkdtemp()
+        self.index_dir = tempfile.mkdtemp()
+        self.index = CrawlerIndex(os.path.join(self.index_dir, 'index.sqlite'))
+
+    def tearDown(self):
+        self.index.close()
+        shutil.rmtree(self.root_dir)
+        shutil.rmtree(self.index_dir)
+
+    def write_file(self, *path_components: str) -> str:
+        os.makedirs(os.path.join(self.root_dir, *path_components[:-1]), exist_ok=True)
+        fp = os.path.join(self.root_dir, *path_components)
+        with open(fp, 'w') as f:
+            f.write('some content\n')
+        return fp
+
+    def age_dirs(self) -> None:
+        """Backdate the mtimes of all directories in the tree, so that they are trusted by the next scan"""
+        past = time.time() - 60
+        for dir_path, _, _ in os.walk(self.root_dir):
+            os.utime(dir_path, (past, past))
+
+    def walk(self):
+        return sorted(os.path.join(path, fn) for path, _, filenames in os.walk(self.root_dir) for fn in filenames)
+
+    def test_scan_matches_walk(self):
+        for fn in ['ACC1A_2023-06-01_C_04.txt', 'ACC1A_2023-06-02_C_04.txt']:
+            self.write_file('2023', '06', fn)
+        self.write_file('KBR1A_2023-06-01_Y_04.txt')
+
+        self.assertEqual(self.walk(), sorted(self.index.scan(self.root_dir)))
+        self.assertEqual(self.walk(), self.index.get_new_files(self.root_dir))
+
+        self.age_dirs()
+        self.assertEqual(self.walk(), sorted(self.index.scan(self.root_dir)))
+        self.assertEqual([], self.index.get_new_files(self.root_dir))
+
+    def test_relists_only_modified_directories(self):
+        self.write_file('2023', '05', 'ACC1A_2023-05-31_C_04.txt')
+        self.write_file('2023', '06', 'ACC1A_2023-06-01_C_04.txt')
+        self.age_dirs()
+        self.index.scan(self.root_dir)
+
+        new_fp = self.write_file('2023', '06', 'ACC1A_2023-06-02_C_04.txt')
+        with mock.patch('masschange.ingest.crawler.index.os.scandir', wraps=os.scandir) as scandir:
+            filepaths = self.index.scan(self.root_dir)
+
+        self.assertEqual(self.walk(), sorted(filepaths))
+
+        self.assertEqual([os.path.join(self.root_dir, '2023', '06')], [c.args[0] for c in scandir.call_args_list])
+        self.assertEqual([new_fp], self.index.get_new_files(self.root_dir))
+
+    def test_forgets_removed_files_and_directories(self):
+        self.write_file('2023', '05', 'ACC1A_2023-05-31_C_04.txt')
+        removed_fp = self.write_file('2023', '06', 'ACC1A_2023-06-01_C_04.txt')
+        self.index.scan(self.root_dir)
+        self.age_dirs()
+
+        os.remove(removed_fp)
+        self.assertEqual(self.walk(), sorted(self.index.scan(self.root_dir)))
+        shutil.rmtree(os.path.join(self.root_dir, '2023', '05'))
+        self.assertEqual(self.walk(), sorted(self.index.scan(self.root_dir)))
+
+    def test_enumeration_uses_index_when_set(self):
+        self.write_file('2023', 'ACC1A_2023-06-01_C_04.txt')
+        self.write_file('2023', 'KBR1A_2023-06-01_Y_04.txt')
+
+        with mock.patch.object(enumeration, '_crawler_index_path', self.index.index_path):
+            indexed_filepaths = list(enumerate_files_in_dir_tree(self.root_dir, r'ACC1A_.*', match_filename_only=True))
+        walked_filepaths = list(enumerate_files_in_dir_tree(self.root_dir, r'ACC1A_.*', match_filename_only=True))
+
+        self.assertEqual(walked_filepaths, indexed_filepaths)
+        self.assertEqual(1, len(indexed_filepaths))
@@ -0,0 +1,44 @@
+import re
+import unittest
+
+from masschange.dataproducts.utils import get_time_series_dataproducts
+from masschange.ingest.crawler.dispatch import FilenameDispatchTable, get_literal_prefix
+from masschange.ingest.executor.ingest import get_input_file_dispatch_table, get_zipped_input_file_dispatch_table
+
+
+class LiteralPrefixTestCase(unittest.TestCase):
+    def test_extracts_conservative_literal_prefixes(self):
+        self.assertEqual('ACC1A_', get_literal_prefix(r'^ACC1A_\d{4}-\d{2}-\d{2}_(?P<instrument_id>[CD])\.txt$'))
+        self.assertEqual('gracefo_1A_', get_literal_prefix(r'gracefo_1A_\d{4}\.tgz'))
+        self.assertEqual('AC', get_literal_prefix(r'ACC?1A'))
+        self.assertEqual('', get_literal_prefix(r'ACC1A|KBR1A'))
+        self.assertEqual('ACC', get_literal_prefix(r'ACC(1A|1B)'))
+        self.assertEqual('A', get_literal_prefix(r'A[|]'))
+        self.assertEqual('', get_literal_prefix(r'$^'))
+        self.assertEqual('', get_literal_prefix(r'(?i)acc1a'))
+
+
+class FilenameDispatchTableTestCase(unittest.TestCase):
+    filenames = ['ACC1A_2023-06-01_C_04.txt', 'ACC1A_2023-06-01_C_04.rpt', 'ACC1A_C_04.pass', 'GNV1A_2023-06-01_D_04.txt',
+                 'KBR1B_2023-06-01_Y_04.txt', 'KBR1B_2023-06-01_C_04.txt', 'gracefo_1A_2023-06-01_RL04.ascii.LRI.tgz',
+                 'gracefo_1B_2023-06-01_RL04.ascii.noLRI.tgz', 'gracefo_1B_2023-06-01_RL04.ascii.LRI.tgz', 'A', '',
+                 'README.md']
+
+    def test_matches_same_products_as_each_reader(self):
+        products = get_time_series_dataproducts()
+        input_table = get_input_file_dispatch_table(products)
+        zipped_table = get_zipped_input_file_dispatch_table(products)
+
+        for filename in self.filenames:
+            expected_input_products = [product for product in products
+                                       if re.match(product.get_reader().get_input_file_default_regex(), filename)]
+            expected_zipped_products = [product for product in products if
+                                        re.match(product.get_reader().get_zipped_input_file_default_regex(), filename)]
+            self.assertEqual(expected_input_products, input_table.match(filename), filename)
+            self.assertEqual(expected_zipped_products, zipped_table.match(filename), filename)
+
+    def test_preserves_entry_order_across_patterns(self):
+        table = FilenameDispatchTable([(r'ACC1A_.*', 'first'), (r'.*\.txt', 'second'), (r'ACC1A_.*', 'third')])
+        self.assertEqual(['first', 'second', 'third'], table.match('ACC1A_2023-06-01_C_04.txt'))
+        self.assertEqual(['second'], table.match('KBR1B_2023-06-01_Y_04.txt'))
+        self.assertEqual([], table.match('ACC'))
@@ -1,11 +1,19 @@
 import os
 import unittest
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+import psycopg2
 
 from masschange.dataproducts.implementations.gracefo.primary.acc1a import GraceFOAcc1ADataProduct
 from masschange.dataproducts.timeseriesdataset import TimeSeriesDataset
 from masschange.dataproducts.timeseriesdatasetversion import TimeSeriesDatasetVersion
-from masschange.ingest.executor.ingest import ingest_file_to_db
+from masschange.db.ingest.manifest import DataFileFingerprint
+from masschange.db.session import open_connection
+from masschange.ingest.executor.ingest import ingest_file_to_db, parse_data_file, write_parsed_data_file, \
+    delete_overlapping_data, ParsedDataFile, ParsedDataFileBatcher, IngestResult, write_parsed_data_files, \
+    parse_data_file_chunks, write_parsed_data_file_chunks, get_timespans_condition
+from masschange.utils.timespan import TimeSpan
 from tests.ingest.datasets.base import IngestTestCaseBase
 
 
@@ -57,5 +65,297 @@ class DataOverwriteIngestTestCase(IngestTestCaseBase):
             self.assertEqual(self.expected_record_count, record_count)
 
 
+class ChunkReplacementIngestTestCase(IngestTestCaseBase):
+    """Test that whole chunks are replaced only where doing so is equivalent to deleting the overlapping rows"""
+    input_dir = './tests/input_data/ingest/test_ingest/'
+
+    product = GraceFOAcc1ADataProduct()
+    version = TimeSeriesDatasetVersion('04')
+    instrument_id = 'C'
+
+    def get_record_count(self, dataset: TimeSeriesDataset) -> int:
+        return len(dataset.select(datetime(2000, 1, 1, tzinfo=timezone.utc), datetime(2999, 1, 1, tzinfo=timezone.utc),
+                                  aggregation_level=0, limit_data_span=False))
+
+    def test_partial_reingestion_preserves_data_outside_span(self):
+        fp = os.path.join(self.input_dir, sorted(os.listdir(self.input_dir))[0])
+        ingest_file_to_db(self.product, fp)
+        parsed = parse_data_file(self.product, fp)
+        record_count = self.get_record_count(parsed.dataset)
+        self.assertEqual(len(parsed.df), record_count)
+
+        partial_df = parsed.df.iloc[:len(parsed.df) // 2]
+        timestamps = partial_df[self.product.TIMESTAMP_COLUMN_NAME]
+        with mock.patch('masschange.ingest.executor.ingest.delete_overlapping_data',
+                        wraps=delete_overlapping_data) as delete_mock:
+            write_parsed_data_file(ParsedDataFile(parsed.product, parsed.dataset, parsed.src_filename, partial_df,
+                                                  TimeSpan(begin=min(timestamps), end=max(timestamps))))
+            delete_mock.assert_called_once()
+
+        self.assertEqual(record_count, self.get_record_count(parsed.dataset))
+
+    def test_whole_file_reingestion_drops_chunks(self):
+        fp = os.path.join(self.input_dir, sorted(os.listdir(self.input_dir))[0])
+        ingest_file_to_db(self.product, fp)
+        parsed = parse_data_file(self.product, fp)
+
+        with mock.patch('masschange.ingest.executor.ingest.delete_overlapping_data') as delete_mock:
+            write_parsed_data_file(parsed)
+            delete_mock.assert_not_called()
+
+        self.assertEqual(len(parsed.df), self.get_record_count(parsed.dataset))
+
+    def test_purge_only_scans_overlapping_chunks(self):
+        filepaths = [os.path.join(self.input_dir, fn) for fn in sorted(os.listdir(self.input_dir))]
+        for fp in filepaths:
+            ingest_file_to_db(self.product, fp)
+        parsed = parse_data_file(self.product, filepaths[0])
+        table_name = parsed.dataset.get_table_name()
+
+        timestamps = parsed.df[self.product.TIMESTAMP_COLUMN_NAME]
+        condition, params = get_timespans_condition(self.product.TIMESTAMP_COLUMN_NAME,
+                                                    [TimeSpan(begin=min(timestamps), end=max(timestamps))])
+        with open_connection() as conn, conn.cursor() as cur:
+            cur.execute('SELECT chunk_name FROM timescaledb_information.chunks WHERE hypertable_name = %s;',
+                        [table_name])
+            chunk_names = [chunk_name for chunk_name, in cur.fetchall()]
+            cur.execute(f'EXPLAIN DELETE FROM {table_name} WHERE {condition}', params)
+            plan = '\n'.join(line for line, in cur.fetchall())
+            conn.rollback()
+
+        self.assertTrue(len(chunk_names) > 1)
+        self.assertEqual(1, len([chunk_name for chunk_name in chunk_names if chunk_name in plan]))
+
+
+class TimespansConditionTestCase(unittest.TestCase):
+    """Test that span conditions are built from constant bounds, so that non-overlapping chunks may be excluded"""
+
+    def test_single_span_is_single_range(self):
+        span = TimeSpan(begin=datetime(2023, 6, 1, 6), end=datetime(2023, 6, 1, 18))
+        self.assertEqual(('timestamp >= %s AND timestamp <= %s', [span.begin, span.end]),
+                         get_timespans_condition('timestamp', [span]))
+
+    def test_one_range_per_merged_span(self):
+        spans = [TimeSpan(begin=datetime(2023, 6, 3), end=datetime(2023, 6, 3, 12)),
+                 TimeSpan(begin=datetime(2023, 6, 1), end=datetime(2023, 6, 1, 12)),
+                 TimeSpan(begin=datetime(2023, 6, 1, 6), end=datetime(2023, 6, 1, 18))]
+        condition, params = get_timespans_condition('timestamp', spans)
+
+        self.assertEqual('(timestamp >= %s AND timestamp <= %s) OR (timestamp >= %s AND timestamp <= %s)', condition)
+        self.assertEqual([datetime(2023, 6, 1), datetime(2023, 6, 1, 18), datetime(2023, 6, 3),
+                          datetime(2023, 6, 3, 12)], params)
+
+
+class AtomicWriteIngestTestCase(IngestTestCaseBase):
+    """Test that a failed write of a file leaves the data it would have replaced intact"""
+    input_dir = './tests/input_data/ingest/test_ingest/'
+
+    product = GraceFOAcc1ADataProduct()
+    version = TimeSeriesDatasetVersion('04')
+    instrument_id = 'C'
+
+    def get_record_count(self, dataset: TimeSeriesDataset) -> int:
+        return len(dataset.select(datetime(2000, 1, 1, tzinfo=timezone.utc), datetime(2999, 1, 1, tzinfo=timezone.utc),
+                                  aggregation_level=0, limit_data_span=False))
+
+    def test_failed_write_does_not_purge_data(self):
+        fp = os.path.join(self.input_dir, sorted(os.listdir(self.input_dir))[0])
+        ingest_file_to_db(self.product, fp)
+        parsed = parse_data_file(self.product, fp)
+        record_count = self.get_record_count(parsed.dataset)
+        self.assertTrue(record_count > 0)
+
+        parsed.df = parsed.df.assign(unexpected_column=0)
+        with self.assertRaises(psycopg2.Error):
+            write_parsed_data_file(parsed)
+
+        self.assertEqual(record_count, self.get_record_count(parsed.dataset))
+
+
+class ChunkedIngestTestCase(IngestTestCaseBase):
+    """Test that ingesting files in chunks is equivalent to ingesting them whole"""
+    input_dir = './tests/input_data/ingest/test_ingest/'
+
+    product = GraceFOAcc1ADataProduct()
+    dataset = TimeSeriesDataset(product, TimeSeriesDatasetVersion('04'), 'C')
+
+    def select_records(self, aggregation_level: int):
+        return self.dataset.select(datetime(2000, 1, 1, tzinfo=timezone.utc), datetime(2999, 1, 1, tzinfo=timezone.utc),
+                                   aggregation_level=aggregation_level, limit_data_span=False)
+
+    def test_chunked_ingest_matches_whole_ingest(self):
+        filepaths = [os.path.join(self.input_dir, fn) for fn in sorted(os.listdir(self.input_dir))]
+        for fp in filepaths:
+            ingest_file_to_db(self.product, fp)
+        expected_records = self.select_records(aggregation_level=0)
+        expected_aggregated_records = self.select_records(aggregation_level=1)
+
+        # re-ingesting in chunks replaces the data written whole
+        for fp in filepaths:
+            ingest_file_to_db(self.product, fp, max_chunk_rows=50)
+
+        self.assertEqual(expected_records, self.select_records(aggregation_level=0))
+        self.assertEqual(expected_aggregated_records, self.select_records(aggregation_level=1))
+
+
+class ChunkedWriteTestCase(unittest.TestCase):
+    """Test purging and writing of a file's chunks, with database operations stubbed"""
+    filepath = './tests/input_data/ACC1A_2023-06-03_C_04.txt'
+
+    product = GraceFOAcc1ADataProduct()
+
+    def write_chunks(self, chunks):
+        with mock.patch.multiple('masschange.ingest.executor.ingest', ensure_table_exists=mock.DEFAULT,
+                                 ensure_continuous_aggregates=mock.DEFAULT, open_connection=mock.DEFAULT,
+                                 lock_dataset_table=mock.DEFAULT, purge_overlapping_data=mock.DEFAULT,
+                                 ingest_df=mock.DEFAULT, update_metadata=mock.DEFAULT) as mocks:
+            parsed = write_parsed_data_file_chunks(chunks)
+        return parsed, mocks
+
+    def test_writes_every_chunk_and_purges_whole_span_once(self):
+        whole = parse_data_file(self.product, self.filepath)
+        parsed, mocks = self.write_chunks(parse_data_file_chunks(self.product, self.filepath, 100))
+
+        copied_row_counts = [len(call.args[0]) for call in mocks['ingest_df'].call_args_list]
+        self.assertTrue(len(copied_row_counts) > 1)
+        self.assertEqual(len(whole.df), sum(copied_row_counts))
+        self.assertEqual(len(whole.df), parsed.stats.row_count)
+        self.assertEqual(whole.data_temporal_span.begin, parsed.data_temporal_span.begin)
+        self.assertEqual(whole.data_temporal_span.end, parsed.data_temporal_span.end)
+
+        # the purged spans are contiguous and cover the whole file's span without overlapping
+        purged_spans = [span for call in mocks['purge_overlapping_data'].call_args_list for span in call.args[1]]
+        self.assertEqual(whole.data_temporal_span.begin, purged_spans[0].begin)
+        self.assertEqual(whole.data_temporal_span.end, purged_spans[-1].end)
+        for previous_span, span in zip(purged_spans[:-1], purged_spans[1:]):
+            self.assertEqual(previous_span.end + timedelta(microseconds=1), span.begin)
+
+        updated_span = mocks['update_metadata'].call_args.args[1]
+        self.assertEqual((whole.data_temporal_span.begin, whole.data_temporal_span.end),
+                         (updated_span.begin, updated_span.end))
+
+    def test_data_written_from_earlier_chunks_is_not_purged(self):
+        chunk = next(parse_data_file_chunks(self.product, self.filepath, 100))
+        repeated_chunk = ParsedDataFile(chunk.product, chunk.dataset, chunk.src_filename, chunk.df.copy(),
+                                        chunk.data_temporal_span)
+        _, mocks = self.write_chunks(iter([chunk, repeated_chunk]))
+
+        mocks['purge_overlapping_data'].assert_called_once()
+        self.assertEqual(2, mocks['ingest_df'].call_count)
+
+    def test_batcher_writes_pending_files_of_dataset_before_chunked_file(self):
+        calls = []
+        batcher = ParsedDataFileBatcher()
+        with mock.patch('masschange.ingest.executor.ingest.write_and_record_parsed_data_files',
+                        side_effect=lambda parsed_files, *args, **kwargs: calls.append('batch')), \
+                mock.patch('masschange.ingest.executor.ingest.write_and_record_parsed_data_file_chunks',
+                           side_effect=lambda chunks, *args, **kwargs: calls.append(f'{len(list(chunks))} chunks')):
+            fingerprint = DataFileFingerprint.from_data_file(self.filepath)
+            batcher.add(parse_data_file(self.product, self.filepath), fingerprint)
+            results = batcher.add_chunks(parse_data_file_chunks(self.product, self.filepath, 100), fingerprint)
+
+        self.assertEqual(['batch', '7 chunks'], calls)
+        self.assertEqual([IngestResult.SUCCEEDED] * 2, [result.status for result in results])
+        self.assertEqual([], batcher.flush())
+
+
+class AtomicWriteTestCase(unittest.TestCase):
+    """Test that each step of a write is performed within a single transaction, with database operations stubbed"""
+    input_dir = './tests/input_data/ingest/test_ingest/'
+
+    def test_write_steps_share_locked_transaction(self):
+        fp = os.path.join(self.input_dir, sorted(os.listdir(self.input_dir))[0])
+        parsed = parse_data_file(GraceFOAcc1ADataProduct(), fp)
+
+        with mock.patch.multiple('masschange.ingest.executor.ingest', ensure_table_exists=mock.DEFAULT,
+                                 ensure_continuous_aggregates=mock.DEFAULT, open_connection=mock.DEFAULT,
+                                 lock_dataset_table=mock.DEFAULT, purge_overlapping_data=mock.DEFAULT,
+                                 ingest_df=mock.DEFAULT, update_metadata=mock.DEFAULT) as mocks:
+            step_calls = mock.Mock()
+            for step in ['lock_dataset_table', 'purge_overlapping_data', 'ingest_df', 'update_metadata']:
+                step_calls.attach_mock(mocks[step], step)
+
+            write_parsed_data_file(parsed)
+
+            conn = mocks['open_connection'].return_value.__enter__.return_value
+            self.assertEqual(['lock_dataset_table', 'purge_overlapping_data', 'ingest_df', 'update_metadata'],
+                             [call[0] for call in step_calls.mock_calls])
+            mocks['lock_dataset_table'].assert_called_once_with(conn, parsed.dataset.get_table_name(), session=None)
+            for step in ['purge_overlapping_data', 'ingest_df', 'update_metadata']:
+                self.assertIs(conn, mocks[step].call_args.kwargs['conn'])
+
+
+class CopyBatchingTestCase(unittest.TestCase):
+    """Test accumulation of parsed files into batched writes, with database operations stubbed"""
+    input_dir = './tests/input_data/ingest/test_ingest/'
+
+    def setUp(self):
+        self.filepaths = [os.path.join(self.input_dir, fn) for fn in sorted(os.listdir(self.input_dir))]
+        self.parsed_files = [parse_data_file(GraceFOAcc1ADataProduct(), fp) for fp in self.filepaths]
+        self.fingerprints = [DataFileFingerprint.from_data_file(fp) for fp in self.filepaths]
+
+    def get_written_filenames(self, write_mock: mock.Mock):
+        return [[parsed.src_filename for parsed in call.args[0]] for call in write_mock.call_args_list]
+
+    def test_writes_files_of_same_dataset_together(self):
+        batcher = ParsedDataFileBatcher()
+        with mock.patch('masschange.ingest.executor.ingest.write_and_record_parsed_data_files') as write_mock:
+            for parsed, fingerprint in zip(self.parsed_files, self.fingerprints):
+                self.assertEqual([], batcher.add(parsed, fingerprint))
+            write_mock.assert_not_called()
+
+            results = batcher.flush()
+
+        self.assertEqual([self.filepaths], self.get_written_filenames(write_mock))
+        self.assertEqual([IngestResult.SUCCEEDED] * len(self.filepaths), [result.status for result in results])
+
+    def test_writes_once_row_threshold_reached(self):
+        batcher = ParsedDataFileBatcher(max_rows=0)
+        with mock.patch('masschange.ingest.executor.ingest.write_and_record_parsed_data_files') as write_mock:
+            for parsed, fingerprint in zip(self.parsed_files, self.fingerprints):
+                self.assertEqual(1, len(batcher.add(parsed, fingerprint)))
+            self.assertEqual([], batcher.flush())
+
+        self.assertEqual([[fp] for fp in self.filepaths], self.get_written_filenames(write_mock))
+
+    def test_overlapping_file_is_not_batched_with_pending_file(self):
+        batcher = ParsedDataFileBatcher()
+        with mock.patch('masschange.ingest.executor.ingest.write_and_record_parsed_data_files') as write_mock:
+            batcher.add(self.parsed_files[0], self.fingerprints[0])
+            self.assertEqual(1, len(batcher.add(self.parsed_files[0], self.fingerprints[0])))
+            batcher.flush()
+
+        self.assertEqual([self.filepaths[:1], self.filepaths[:1]], self.get_written_filenames(write_mock))
+
+    def test_failed_batch_is_retried_per_file(self):
+        def fail_batches(parsed_files, fingerprints, **kwargs):
+            if len(parsed_files) > 1:
+                raise RuntimeError('simulated batch failure')
+
+        batcher = ParsedDataFileBatcher()
+        with mock.patch('masschange.ingest.executor.ingest.write_and_record_parsed_data_files',
+                        side_effect=fail_batches) as write_mock:
+            for parsed, fingerprint in zip(self.parsed_files, self.fingerprints):
+                batcher.add(parsed, fingerprint)
+            results = batcher.flush()
+
+        self.assertEqual([self.filepaths] + [[fp] for fp in self.filepaths], self.get_written_filenames(write_mock))
+        self.assertEqual([IngestResult.SUCCEEDED] * len(self.filepaths), [result.status for result in results])
+
+    def test_batched_write_is_single_copy(self):
+        with mock.patch.multiple('masschange.ingest.executor.ingest', ensure_table_exists=mock.DEFAULT,
+                                 ensure_continuous_aggregates=mock.DEFAULT, open_connection=mock.DEFAULT,
+                                 lock_dataset_table=mock.DEFAULT, purge_overlapping_data=mock.DEFAULT,
+                                 ingest_df=mock.DEFAULT, update_metadata=mock.DEFAULT) as mocks:
+            write_parsed_data_files(self.parsed_files)
+
+        mocks['ingest_df'].assert_called_once()
+        self.assertEqual(sum(len(parsed.df) for parsed in self.parsed_files),
+                         len(mocks['ingest_df'].call_args.args[0]))
+        purged_spans = mocks['purge_overlapping_data'].call_args.args[1]
+        self.assertEqual([(parsed.data_temporal_span.begin, parsed.data_temporal_span.end)
+                          for parsed in self.parsed_files], [(span.begin, span.end) for span in purged_spans])
+
+
 if __name__ == '__main__':
     unittest.main()
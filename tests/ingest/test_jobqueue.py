@@ -0,0 +1,81 @@
+import multiprocessing
+import os
+from datetime import timedelta
+
+from masschange.dataproducts.db.utils import get_db_connection
+from masschange.dataproducts.implementations.gracefo.primary.acc1a import GraceFOAcc1ADataProduct
+from masschange.dataproducts.implementations.gracefo.primary.kbr1b import GraceFOKbr1BDataProduct
+from masschange.dataproducts.implementations.gracefo.rpt.acc1a_rpt import GraceFOAcc1ARptDataProduct
+from masschange.db.ingest.jobs import IngestJob, claim_jobs, release_jobs, get_job_status_counts
+from masschange.ingest.executor.ingest import IngestResult
+from masschange.ingest.executor.jobqueue import IngestWorker, enqueue
+from tests.ingest.base import IngestTestCaseBase
+
+
+def run_worker() -> None:
+    IngestWorker(batch_size=2, poll_interval=timedelta(seconds=1)).run(exit_when_empty=True)
+
+
+class IngestJobQueueTestCase(IngestTestCaseBase):
+    """Test distributed ingestion by several concurrent worker processes sharing one job queue"""
+    input_dir = './tests/input_data'
+    worker_count = 3
+
+    products = [GraceFOAcc1ADataProduct(), GraceFOAcc1ARptDataProduct(), GraceFOKbr1BDataProduct()]
+
+    def setUp(self):
+        with get_db_connection() as conn, conn.cursor() as cur:
+            cur.execute('DELETE FROM _meta_ingest_jobs;')
+            conn.commit()
+
+    def get_job_attempts(self):
+        with get_db_connection() as conn, conn.cursor() as cur:
+            cur.execute('SELECT attempts FROM _meta_ingest_jobs;')
+            return [row[0] for row in cur.fetchall()]
+
+    def test_enqueue_is_idempotent(self):
+        enqueued_count = enqueue(self.products, os.path.abspath(self.input_dir), data_is_zipped=True)
+        self.assertTrue(enqueued_count > 0)
+        self.assertEqual(0, enqueue(self.products, os.path.abspath(self.input_dir), data_is_zipped=True))
+        self.assertEqual({IngestJob.PENDING: enqueued_count}, get_job_status_counts())
+
+    def test_concurrent_workers_execute_each_job_once(self):
+        enqueued_count = enqueue(self.products, os.path.abspath(self.input_dir), data_is_zipped=True)
+
+        workers = [multiprocessing.Process(target=run_worker) for _ in range(self.worker_count)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(timeout=600)
+            self.assertEqual(0, worker.exitcode)
+
+        status_counts = get_job_status_counts()
+        self.assertEqual(enqueued_count, sum(status_counts.values()))
+        self.assertEqual(enqueued_count,
+                         status_counts.get(IngestResult.SUCCEEDED, 0) + status_counts.get(IngestResult.SKIPPED, 0))
+        self.assertTrue(all(attempts == 1 for attempts in self.get_job_attempts()))
+
+    def test_released_jobs_are_reclaimed(self):
+        enqueue(self.products, os.path.abspath(self.input_dir), data_is_zipped=True)
+
+        jobs = claim_jobs('stopped-worker', limit=2, lease=timedelta(hours=1), max_attempts=3)
+        self.assertEqual(2, len(jobs))
+        release_jobs(jobs, 'stopped-worker')
+
+        reclaimed_jobs = claim_jobs('next-worker', limit=2, lease=timedelta(hours=1), max_attempts=3)
+        self.assertEqual([job.id for job in jobs], [job.id for job in reclaimed_jobs])
+        self.assertTrue(all(job.attempts == 1 for job in reclaimed_jobs))
+
+    def test_abandoned_jobs_are_reclaimed_after_lease_expiry(self):
+        enqueue(self.products, os.path.abspath(self.input_dir), data_is_zipped=True)
+
+        abandoned_jobs = claim_jobs('dead-worker', limit=1, lease=timedelta(0), max_attempts=2)
+        reclaimed_jobs = claim_jobs('live-worker', limit=1, lease=timedelta(0), max_attempts=2)
+        self.assertEqual([job.id for job in abandoned_jobs], [job.id for job in reclaimed_jobs])
+        self.assertEqual(2, reclaimed_jobs[0].attempts)
+
+        # having exhausted its attempts, the job is failed rather than being reclaimed a third time
+        self.assertNotIn(reclaimed_jobs[0].id, [job.id for job in claim_jobs('another-worker', limit=1,
+                                                                             lease=timedelta(hours=1),
+                                                                             max_attempts=2)])
+        self.assertEqual(1, get_job_status_counts().get(IngestJob.FAILED))
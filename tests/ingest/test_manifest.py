@@ -0,0 +1,90 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from masschange.dataproducts.implementations.gracefo.primary.acc1a import GraceFOAcc1ADataProduct
+from masschange.db.ingest.manifest import DataFileFingerprint, get_ingested_file_record
+from masschange.ingest.executor.datafilereaders.base import InMemoryDataFile
+from masschange.ingest.executor.ingest import IngestResult, run
+from tests.ingest.base import IngestTestCaseBase
+
+
+class DataFileFingerprintTestCase(unittest.TestCase):
+    """Test that on-disk and in-memory data files are fingerprinted consistently"""
+    input_fp = './tests/input_data/ingest/test_ingest/ACC1A_2023-06-03_C_04.txt'
+
+    def test_in_memory_fingerprint_matches_path_fingerprint(self):
+        with open(self.input_fp, 'rb') as f:
+            in_memory_file = InMemoryDataFile(self.input_fp, f.read(), mtime=os.stat(self.input_fp).st_mtime)
+
+        path_fingerprint = DataFileFingerprint.from_data_file(self.input_fp)
+        in_memory_fingerprint = DataFileFingerprint.from_data_file(in_memory_file)
+
+        self.assertEqual(path_fingerprint.size, in_memory_fingerprint.size)
+        self.assertEqual(path_fingerprint.mtime, in_memory_fingerprint.mtime)
+        self.assertEqual(path_fingerprint.compute_sha256(self.input_fp),
+                         in_memory_fingerprint.compute_sha256(in_memory_file))
+
+
+class IngestManifestTestCase(IngestTestCaseBase):
+    """Test that files are skipped by subsequent runs unless changed or forced"""
+    input_dir = './tests/input_data/ingest/test_ingest/'
+
+    product = GraceFOAcc1ADataProduct()
+
+    def setUp(self):
+        self.src_dir = tempfile.mkdtemp()
+        for fn in os.listdir(self.input_dir):
+            shutil.copy2(os.path.join(self.input_dir, fn), self.src_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.src_dir)
+
+    def get_statuses(self, results):
+        return {os.path.split(result.filepath)[-1]: result.status for result in results}
+
+    def test_skips_unchanged_files(self):
+        first_results = run(self.product, self.src_dir, data_is_zipped=False)
+        self.assertTrue(all(status == IngestResult.SUCCEEDED for status in self.get_statuses(first_results).values()))
+
+        for result in first_results:
+            record = get_ingested_file_record(self.product.get_full_id(), result.filepath)
+            self.assertIsNotNone(record)
+            self.assertEqual(10, record.row_count)
+
+        second_results = run(self.product, self.src_dir, data_is_zipped=False)
+        self.assertTrue(all(status == IngestResult.SKIPPED for status in self.get_statuses(second_results).values()))
+
+        forced_results = run(self.product, self.src_dir, data_is_zipped=False, force=True)
+        self.assertTrue(all(status == IngestResult.SUCCEEDED for status in self.get_statuses(forced_results).values()))
+
+    def test_skips_touched_files_with_unchanged_content(self):
+        run(self.product, self.src_dir, data_is_zipped=False)
+
+        touched_filename = sorted(os.listdir(self.src_dir))[0]
+        touched_fp = os.path.join(self.src_dir, touched_filename)
+        os.utime(touched_fp, (0, 0))
+
+        statuses = self.get_statuses(run(self.product, self.src_dir, data_is_zipped=False))
+        self.assertEqual(IngestResult.SKIPPED, statuses[touched_filename])
+
+        # the manifest mtime is updated, so subsequent checks need not hash the file
+        record = get_ingested_file_record(self.product.get_full_id(), touched_fp)
+        self.assertEqual(0, record.fingerprint.mtime.timestamp())
+
+    def test_reingests_modified_files(self):
+        run(self.product, self.src_dir, data_is_zipped=False)
+
+        modified_filename = sorted(os.listdir(self.src_dir))[0]
+        with open(os.path.join(self.src_dir, modified_filename), 'a') as f:
+            f.write('\n')
+
+        statuses = self.get_statuses(run(self.product, self.src_dir, data_is_zipped=False))
+        self.assertEqual(IngestResult.SUCCEEDED, statuses[modified_filename])
+        self.assertTrue(all(status == IngestResult.SKIPPED for filename, status in statuses.items()
+                            if filename != modified_filename))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+import os
+import contextlib
+import io
+import shutil
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from unittest import mock
+
+from masschange.dataproducts.implementations.gracefo.primary.acc1a import GraceFOAcc1ADataProduct
+from masschange.dataproducts.implementations.gracefo.primary.gnv1a import GraceFOGnv1ADataProduct
+from masschange.dataproducts.implementations.gracefo.primary.gnv1a_prn import GraceFOGnv1APrnDataProduct
+from masschange.dataproducts.implementations.gracefo.primary.kbr1b import GraceFOKbr1BDataProduct
+from masschange.dataproducts.implementations.gracefo.rpt.acc1a_rpt import GraceFOAcc1ARptDataProduct
+from masschange.ingest.executor.datafilereaders.base import get_data_file_name
+from masschange.dataproducts.utils import get_time_series_dataproducts
+from masschange.ingest.crawler.enumeration import enumerate_files_in_dir_tree, order_filepaths_by_filename
+from masschange.ingest.executor import ingest
+from masschange.ingest.executor.ingest import IngestResult, get_multiproduct_zipped_input_iterable, get_zipped_input_iterable, \
+    get_multiproduct_zipped_input_batches, get_multiproduct_unzipped_input_batches, group_by_dataset_table
+
+
+class MultiproductZippedInputTestCase(unittest.TestCase):
+    """Test routing of tarball contents to products when extracting each tarball once for all products"""
+    input_dir = './tests/input_data'
+
+    products = [GraceFOAcc1ADataProduct(), GraceFOAcc1ARptDataProduct(), GraceFOGnv1ADataProduct(),
+                GraceFOGnv1APrnDataProduct(), GraceFOKbr1BDataProduct()]
+
+    def test_routes_same_files_as_single_product_ingest(self):
+        routed_filenames = {product.get_full_id(): [] for product in self.products}
+        for product, fp in get_multiproduct_zipped_input_iterable(os.path.abspath(self.input_dir), self.products):
+            routed_filenames[product.get_full_id()].append(os.path.split(get_data_file_name(fp))[-1])
+
+        for product in self.products:
+            reader = product.get_reader()
+            expected_filenames = [os.path.split(get_data_file_name(fp))[-1] for fp in
+                                  get_zipped_input_iterable(os.path.abspath(self.input_dir),
+                                                            reader.get_zipped_input_file_default_regex(),
+                                                            reader.get_input_file_default_regex())]
+            self.assertTrue(len(expected_filenames) > 0)
+            self.assertEqual(sorted(expected_filenames), sorted(routed_filenames[product.get_full_id()]))
+
+
+    def test_groups_by_dataset_table_in_order(self):
+        for batch in get_multiproduct_zipped_input_batches(os.path.abspath(self.input_dir), self.products):
+            batch = list(batch)
+            groups = group_by_dataset_table(batch)
+            self.assertEqual(len(batch), sum(len(group) for group in groups))
+
+            # GNV1A and GNV1A_PRN share input files but target distinct tables
+            self.assertEqual(len(groups), len({(product.get_full_id(), product.get_reader().extract_instrument_id(fp))
+                                               for product, fp in batch}))
+            for group in groups:
+                self.assertEqual([pair for pair in batch if pair in group], group)
+
+
+class MultiproductUnzippedInputTestCase(unittest.TestCase):
+    """Test routing of input files to products when crawling the source directory once for all products"""
+    input_dir = './tests/input_data'
+
+    def test_routes_same_files_as_single_product_crawl(self):
+        products = get_time_series_dataproducts()
+        batches = get_multiproduct_unzipped_input_batches(self.input_dir, products)
+
+        self.assertEqual(1, len(batches))
+        self.assertTrue(len(batches[0]) > 0)
+        for product in products:
+            expected_filepaths = order_filepaths_by_filename(enumerate_files_in_dir_tree(
+                self.input_dir, product.get_reader().get_input_file_default_regex(), match_filename_only=True))
+            self.assertEqual([(product, fp) for fp in expected_filepaths],
+                             [(p, fp) for p, fp in batches[0] if p is product])
+
+    def test_products_share_pool_submission_round(self):
+        products = [GraceFOAcc1ADataProduct(), GraceFOGnv1ADataProduct()]
+        input_dir = tempfile.mkdtemp()
+        try:
+            for filename in ['ACC1A_2023-06-01_C_04.txt', 'ACC1A_2023-06-02_C_04.txt', 'GNV1A_2023-06-01_C_04.txt']:
+                open(os.path.join(input_dir, filename), 'w').close()
+            batches = get_multiproduct_unzipped_input_batches(input_dir, products)
+        finally:
+            shutil.rmtree(input_dir)
+
+        submitted_groups = []
+        submission_round_sizes = []
+
+        class RecordingExecutor(ThreadPoolExecutor):
+            def submit(self, fn, group, *args):
+                submitted_groups.append(group)
+                return super().submit(lambda: ([], None))
+
+        def recording_as_completed(futures):
+            submission_round_sizes.append(len(futures))
+            return as_completed(futures)
+
+        with mock.patch.object(ingest, 'ProcessPoolExecutor', RecordingExecutor), \
+                mock.patch.object(ingest, 'as_completed', recording_as_completed):
+            ingest.ingest_batches(batches, workers=2)
+
+        # both products' tables are submitted before the results of either are awaited
+        self.assertEqual([2], submission_round_sizes)
+        self.assertEqual({product.get_full_id() for product in products},
+                         {group[0][0].get_full_id() for group in submitted_groups})
+
+
+class PoolGroupFailureTestCase(unittest.TestCase):
+    """Test that the failure of a group as a whole does not abort ingestion of the other groups"""
+    product = GraceFOAcc1ADataProduct()
+
+    def ingest_file_group_in_worker(self, product_filepaths, *args):
+        if any('_C_' in fp for _, fp in product_filepaths):
+            raise RuntimeError('worker process died')
+        return [IngestResult(product.get_full_id(), fp, IngestResult.SUCCEEDED)
+                for product, fp in product_filepaths], None
+
+    def test_failed_group_is_recorded_and_others_are_ingested(self):
+        filepaths = ['ACC1A_2023-06-01_C_04.txt', 'ACC1A_2023-06-01_D_04.txt', 'ACC1A_2023-06-02_C_04.txt',
+                     'ACC1A_2023-06-02_D_04.txt', 'ACC1A_2023-06-02_D.txt']
+
+        with mock.patch.object(ingest, 'ProcessPoolExecutor', ThreadPoolExecutor), \
+                mock.patch.object(ingest, '_ingest_file_group_in_worker', self.ingest_file_group_in_worker):
+            results = ingest.ingest_batches([[(self.product, fp) for fp in filepaths]], workers=2)
+
+        statuses = {r.filepath: r.status for r in results}
+        self.assertEqual({'ACC1A_2023-06-01_C_04.txt': IngestResult.FAILED,
+                          'ACC1A_2023-06-02_C_04.txt': IngestResult.FAILED,
+                          'ACC1A_2023-06-01_D_04.txt': IngestResult.SUCCEEDED,
+                          'ACC1A_2023-06-02_D_04.txt': IngestResult.SUCCEEDED,
+                          'ACC1A_2023-06-02_D.txt': IngestResult.FAILED}, statuses)
+
+class DatasetArgumentsTestCase(unittest.TestCase):
+    """Test that dataset ids are resolved when command-line arguments are parsed"""
+
+    def parse_args(self, *argv: str):
+        with mock.patch('sys.argv', ['ingest.py', *argv]):
+            return ingest.get_args()
+
+    def test_resolves_dataset_ids(self):
+        args = self.parse_args('--dataset', 'all', '--src', self.id())
+        self.assertEqual(len(get_time_series_dataproducts()), len(args.datasets))
+
+    def test_unrecognised_dataset_id_is_usage_error(self):
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr), self.assertRaises(SystemExit) as raised:
+            self.parse_args('--dataset', 'GRACEFO_NOT1A', '--src', self.id())
+
+        self.assertEqual(2, raised.exception.code)
+        self.assertIn('GRACEFO_NOT1A', stderr.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import os
+import unittest
+from unittest import mock
+
+from masschange.dataproducts.implementations.gracefo.primary.acc1a import GraceFOAcc1ADataProduct
+from masschange.dataproducts.implementations.gracefo.primary.kbr1b import GraceFOKbr1BDataProduct
+from masschange.ingest.executor.ingest import IngestResult, get_multiproduct_zipped_input_batches
+from masschange.ingest.executor.pipeline import IngestPipeline
+
+
+class IngestPipelineTestCase(unittest.TestCase):
+    """Test ordering and failure handling of the staged ingest pipeline, with database stages replaced by stubs"""
+    input_dir = './tests/input_data'
+
+    products = [GraceFOAcc1ADataProduct(), GraceFOKbr1BDataProduct()]
+
+    def get_batches(self):
+        return get_multiproduct_zipped_input_batches(os.path.abspath(self.input_dir), self.products)
+
+    def test_writes_and_refreshes_every_file_in_input_order(self):
+        expected_filenames = [fp.name for batch in self.get_batches() for _, fp in batch]
+        self.assertTrue(len(expected_filenames) > 0)
+
+        written_filenames = []
+        refreshed_filenames = []
+        with mock.patch('masschange.ingest.executor.pipeline.write_parsed_data_file',
+                        side_effect=lambda parsed, **kwargs: written_filenames.append(parsed.src_filename) or parsed.stats), \
+                mock.patch('masschange.ingest.executor.pipeline.refresh_dataset',
+                           side_effect=lambda dataset, span, **kwargs: refreshed_filenames.append(dataset.get_table_name())), \
+                mock.patch('masschange.ingest.executor.pipeline.record_ingested_file'), \
+                mock.patch('masschange.ingest.executor.pipeline.record_ingest_stats') as record_ingest_stats:
+            results = IngestPipeline(queue_size=1, force=True).run(self.get_batches())
+
+        self.assertEqual(expected_filenames, written_filenames)
+        self.assertEqual(len(expected_filenames), len(refreshed_filenames))
+        recorded_stats = [call.args[0] for call in record_ingest_stats.call_args_list]
+        self.assertEqual(expected_filenames, [stats.source_path for stats in recorded_stats])
+        self.assertTrue(all(stats.row_count > 0 and stats.stage_seconds['parse'] > 0 for stats in recorded_stats))
+        self.assertEqual(expected_filenames, [result.filepath for result in results])
+        self.assertTrue(all(result.status == IngestResult.SUCCEEDED for result in results))
+
+    def test_records_failures_without_aborting(self):
+        def fail_kbr1b_writes(parsed, **kwargs):
+            if parsed.product.get_full_id() == GraceFOKbr1BDataProduct().get_full_id():
+                raise RuntimeError('simulated write failure')
+            return parsed.stats
+
+        with mock.patch('masschange.ingest.executor.pipeline.write_parsed_data_file', side_effect=fail_kbr1b_writes), \
+                mock.patch('masschange.ingest.executor.pipeline.refresh_dataset'), \
+                mock.patch('masschange.ingest.executor.pipeline.record_ingested_file'), \
+                mock.patch('masschange.ingest.executor.pipeline.record_ingest_stats'):
+            results = IngestPipeline(queue_size=2, force=True).run(self.get_batches())
+
+        results_by_status = {status: [result for result in results if result.status == status] for status in
+                             [IngestResult.SUCCEEDED, IngestResult.FAILED]}
+        self.assertTrue(len(results_by_status[IngestResult.SUCCEEDED]) > 0)
+        self.assertTrue(len(results_by_status[IngestResult.FAILED]) > 0)
+        for result in results_by_status[IngestResult.FAILED]:
+            self.assertEqual(GraceFOKbr1BDataProduct().get_full_id(), result.product_id)
+            self.assertIn('simulated write failure', result.error)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import json
+import os
+import tempfile
+import unittest
+from datetime import timedelta
+
+from masschange.dataproducts.implementations.gracefo.primary.acc1a import GraceFOAcc1ADataProduct
+from masschange.dataproducts.implementations.gracefo.primary.gnv1a import GraceFOGnv1ADataProduct
+from masschange.dataproducts.implementations.gracefo.primary.gnv1a_prn import GraceFOGnv1APrnDataProduct
+from masschange.dataproducts.implementations.gracefo.rpt.acc1a_rpt import GraceFOAcc1ARptDataProduct
+from masschange.ingest.executor.ingest import get_multiproduct_zipped_input_iterable, parse_data_file
+from masschange.ingest.executor.plan import ThroughputFigures, format_plan, plan_ingest
+
+
+class IngestPlanTestCase(unittest.TestCase):
+    """Test estimation of ingest costs, which requires no database"""
+    zipped_input_dir = './tests/input_data'
+    unzipped_input_dir = './tests/input_data/ingest/test_ingest/'
+
+    def test_estimates_sampled_dataset_exactly(self):
+        product = GraceFOAcc1ADataProduct()
+        filepaths = [os.path.join(self.unzipped_input_dir, fn) for fn in os.listdir(self.unzipped_input_dir)]
+        throughput = ThroughputFigures(copy_rows_per_second=10.0, refresh_rows_per_second=20.0)
+
+        plans = plan_ingest([product], self.unzipped_input_dir, data_is_zipped=False,
+                            samples_per_product=len(filepaths), throughput=throughput)
+
+        self.assertEqual(1, len(plans))
+        plan = plans[0]
+        expected_row_count = sum(len(parse_data_file(product, fp).df) for fp in filepaths)
+        self.assertEqual(len(filepaths), plan.file_count)
+        self.assertEqual(sum(os.path.getsize(fp) for fp in filepaths), plan.byte_count)
+        self.assertEqual(expected_row_count, plan.estimated_row_count)
+        self.assertEqual(timedelta(seconds=expected_row_count / 10.0), plan.copy_time)
+        self.assertEqual(timedelta(seconds=expected_row_count / 20.0), plan.refresh_time)
+
+    def test_enumerates_tarball_members_of_all_products(self):
+        products = [GraceFOAcc1ADataProduct(), GraceFOAcc1ARptDataProduct(), GraceFOGnv1ADataProduct(),
+                    GraceFOGnv1APrnDataProduct()]
+
+        plans = plan_ingest(products, os.path.abspath(self.zipped_input_dir), samples_per_product=1)
+
+        expected_file_count = len(list(get_multiproduct_zipped_input_iterable(os.path.abspath(self.zipped_input_dir),
+                                                                              products)))
+        self.assertEqual(expected_file_count, sum(plan.file_count for plan in plans))
+        self.assertTrue(all(plan.estimated_row_count > 0 for plan in plans))
+        self.assertIn('TOTAL', format_plan(plans, workers=2))
+
+    def test_loads_throughput_figures(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as f:
+            json.dump({'copy_rows_per_second': 1234}, f)
+        try:
+            throughput = ThroughputFigures.from_file(f.name)
+        finally:
+            os.remove(f.name)
+
+        self.assertEqual(1234.0, throughput.copy_rows_per_second)
+        self.assertEqual(ThroughputFigures.default_refresh_rows_per_second, throughput.refresh_rows_per_second)
+
+    def test_derives_throughput_figures_from_ingest_stats(self):
+        immediately_refreshed = {'row_count': 300, 'stage_seconds': {'delete': 1.0, 'copy': 1.0, 'metadata': 1.0,
+                                                                     'refresh': 2.0}}
+        deferred_refresh = {'row_count': 300, 'stage_seconds': {'delete': 0.0, 'copy': 3.0, 'metadata': 0.0,
+                                                                'refresh': 0.0}}
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl', delete=False) as f:
+            f.writelines(json.dumps(stats) + '\n' for stats in [immediately_refreshed, deferred_refresh])
+        try:
+            throughput = ThroughputFigures.from_ingest_stats_file(f.name)
+        finally:
+            os.remove(f.name)
+
+        self.assertEqual(100.0, throughput.copy_rows_per_second)
+        self.assertEqual(150.0, throughput.refresh_rows_per_second)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,202 @@
+import os
+import pickle
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+from masschange.dataproducts.implementations.gracefo.primary.acc1a import GraceFOAcc1ADataProduct
+from masschange.dataproducts.implementations.gracefo.primary.kbr1b import GraceFOKbr1BDataProduct
+from masschange.dataproducts.timeseriesdataset import TimeSeriesDataset
+from masschange.dataproducts.timeseriesdatasetversion import TimeSeriesDatasetVersion
+from masschange.dataproducts.db.utils import get_db_connection
+from masschange.db.data.caggs import refresh_continuous_aggregates
+from masschange.db.ensure import ensure_dataset
+from masschange.ingest.executor.ingest import IngestResult, run, parse_data_file, write_parsed_data_file
+from masschange.ingest.executor.refresh import BackfillRefresher, DeferredRefresher
+from masschange.utils.timespan import TimeSpan
+from tests.ingest.base import IngestTestCaseBase
+
+
+class DeferredRefresherTestCase(unittest.TestCase):
+    """Test coalescing of deferred refreshes, with database operations replaced by stubs"""
+    origin = datetime(2023, 6, 3, tzinfo=timezone.utc)
+    acc1a_dataset = TimeSeriesDataset(GraceFOAcc1ADataProduct(), TimeSeriesDatasetVersion('04'), 'C')
+    kbr1b_dataset = TimeSeriesDataset(GraceFOKbr1BDataProduct(), TimeSeriesDatasetVersion('04'), 'Y')
+
+    def get_daily_span(self, day: int) -> TimeSpan:
+        return TimeSpan(begin=self.origin + timedelta(days=day), end=self.origin + timedelta(days=day + 1, seconds=-1))
+
+    def patch_db(self):
+        return mock.patch.multiple('masschange.ingest.executor.refresh', refresh_continuous_aggregates_over_spans=mock.DEFAULT,
+                                   put_ingested_file_record=mock.DEFAULT)
+
+    def test_refreshes_each_dataset_once_per_flush(self):
+        with self.patch_db() as mocks, \
+                mock.patch.object(TimeSeriesDataset, 'get_data_span', return_value=None):
+            refresher = DeferredRefresher()
+            for day in range(30):
+                refresher.add(self.acc1a_dataset, self.get_daily_span(day))
+                refresher.add(self.kbr1b_dataset, self.get_daily_span(day))
+            mocks['refresh_continuous_aggregates_over_spans'].assert_not_called()
+
+            refresher.flush()
+
+            refresh_calls = mocks['refresh_continuous_aggregates_over_spans'].call_args_list
+            self.assertEqual(2, len(refresh_calls))
+            self.assertEqual({self.acc1a_dataset.get_table_name(), self.kbr1b_dataset.get_table_name()},
+                             {call.args[0].get_table_name() for call in refresh_calls})
+            self.assertTrue(all(len(call.args[1]) == 30 for call in refresh_calls))
+            self.assertEqual(0, refresher.pending_file_count)
+
+    def test_flushes_every_n_files(self):
+        with self.patch_db() as mocks, \
+                mock.patch.object(TimeSeriesDataset, 'get_data_span', return_value=None):
+            refresher = DeferredRefresher(flush_every=10)
+            for day in range(25):
+                refresher.add(self.acc1a_dataset, self.get_daily_span(day))
+
+            self.assertEqual(2, mocks['refresh_continuous_aggregates_over_spans'].call_count)
+            self.assertEqual(5, refresher.pending_file_count)
+
+    def test_merges_pickled_worker_refresher(self):
+        worker_refresher = DeferredRefresher()
+        worker_refresher.add(self.acc1a_dataset, self.get_daily_span(0))
+        worker_refresher = pickle.loads(pickle.dumps(worker_refresher))
+
+        with self.patch_db() as mocks, \
+                mock.patch.object(TimeSeriesDataset, 'get_data_span', return_value=None):
+            refresher = DeferredRefresher()
+            refresher.add(self.acc1a_dataset, self.get_daily_span(1))
+            refresher.merge(worker_refresher)
+            self.assertEqual(2, refresher.pending_file_count)
+
+            refresher.flush()
+            refresh_calls = mocks['refresh_continuous_aggregates_over_spans'].call_args_list
+            self.assertEqual(1, len(refresh_calls))
+            self.assertEqual(2, len(refresh_calls[0].args[1]))
+
+
+class BackfillRefresherTestCase(unittest.TestCase):
+    """Test suspension of per-file maintenance during backfill, with database operations replaced by stubs"""
+    origin = datetime(2023, 6, 3)
+    acc1a_dataset = TimeSeriesDataset(GraceFOAcc1ADataProduct(), TimeSeriesDatasetVersion('04'), 'C')
+
+    def get_daily_span(self, day: int) -> TimeSpan:
+        return TimeSpan(begin=self.origin + timedelta(days=day), end=self.origin + timedelta(days=day + 1, seconds=-1))
+
+    def patch_db(self):
+        return mock.patch.multiple('masschange.ingest.executor.refresh', refresh_continuous_aggregates=mock.DEFAULT,
+                                   update_metadata=mock.DEFAULT, put_ingested_file_record=mock.DEFAULT)
+
+    def test_tracks_occupied_spans(self):
+        # stored data spans are timezone-aware
+        extant_span = TimeSpan(begin=datetime(2023, 6, 3, tzinfo=timezone.utc),
+                               end=datetime(2023, 6, 3, 23, 59, 59, tzinfo=timezone.utc))
+        with self.patch_db(), mock.patch.object(TimeSeriesDataset, 'get_data_span', return_value=extant_span):
+            refresher = BackfillRefresher()
+            refresher.track_dataset(self.acc1a_dataset)
+
+            self.assertTrue(refresher.may_contain_data(self.acc1a_dataset, self.get_daily_span(0)))
+            self.assertFalse(refresher.may_contain_data(self.acc1a_dataset, self.get_daily_span(1)))
+
+            refresher.mark_written(self.acc1a_dataset, self.get_daily_span(1))
+            self.assertTrue(refresher.may_contain_data(self.acc1a_dataset, self.get_daily_span(1)))
+            self.assertFalse(refresher.may_contain_data(self.acc1a_dataset, self.get_daily_span(2)))
+
+    def test_rebuilds_aggregates_once_on_flush(self):
+        with self.patch_db() as mocks, \
+                mock.patch.object(TimeSeriesDataset, 'get_data_span', return_value=None):
+            refresher = BackfillRefresher()
+            for day in range(30):
+                refresher.add(self.acc1a_dataset, self.get_daily_span(day))
+            mocks['refresh_continuous_aggregates'].assert_not_called()
+
+            refresher.flush()
+
+            mocks['refresh_continuous_aggregates'].assert_called_once_with(self.acc1a_dataset, enable_chunking=True)
+            self.assertEqual(1, mocks['update_metadata'].call_count)
+            self.assertEqual(0, refresher.pending_file_count)
+
+
+class DeferredRefreshIngestTestCase(IngestTestCaseBase):
+    """Test that deferred refresh produces the same aggregates as per-file refresh"""
+    input_dir = './tests/input_data/ingest/test_ingest/'
+
+    product = GraceFOAcc1ADataProduct()
+    dataset = TimeSeriesDataset(product, TimeSeriesDatasetVersion('04'), 'C')
+
+    def select_aggregated_records(self):
+        return self.dataset.select(datetime(2000, 1, 1, tzinfo=timezone.utc), datetime(2999, 1, 1, tzinfo=timezone.utc),
+                                   aggregation_level=1, limit_data_span=False)
+
+    def test_deferred_refresh_matches_per_file_refresh(self):
+        results = run(self.product, os.path.abspath(self.input_dir), data_is_zipped=False, force=True)
+        self.assertTrue(all(result.status == IngestResult.SUCCEEDED for result in results))
+        per_file_records = self.select_aggregated_records()
+        self.assertTrue(len(per_file_records) > 0)
+
+        results = run(self.product, os.path.abspath(self.input_dir), data_is_zipped=False, force=True, refresh_every=0)
+        self.assertTrue(all(result.status == IngestResult.SUCCEEDED for result in results))
+        self.assertEqual(per_file_records, self.select_aggregated_records())
+
+    def test_backfill_matches_per_file_refresh(self):
+        results = run(self.product, os.path.abspath(self.input_dir), data_is_zipped=False, force=True)
+        self.assertTrue(all(result.status == IngestResult.SUCCEEDED for result in results))
+        per_file_records = self.select_aggregated_records()
+        self.assertTrue(len(per_file_records) > 0)
+
+        # re-ingestion over extant data must still replace it, rather than duplicating it
+        results = run(self.product, os.path.abspath(self.input_dir), data_is_zipped=False, force=True, backfill=True)
+        self.assertTrue(all(result.status == IngestResult.SUCCEEDED for result in results))
+        self.assertEqual(per_file_records, self.select_aggregated_records())
+
+
+class SpanLimitedRefreshBenchmarkTestCase(IngestTestCaseBase):
+    """Test that the cost of refreshing aggregates following ingestion of a file does not grow with the extant data"""
+    input_dir = './tests/input_data/ingest/test_ingest/'
+    max_slowdown_factor = 3
+    max_slowdown_tolerance = timedelta(seconds=1)
+
+    product = GraceFOAcc1ADataProduct()
+    dataset = TimeSeriesDataset(product, TimeSeriesDatasetVersion('04'), 'C')
+
+    def populate_synthetic_data(self, span: TimeSpan, interval: timedelta) -> None:
+        with get_db_connection() as conn, conn.cursor() as cur:
+            sql = f"""
+                INSERT INTO {self.dataset.get_table_name()}
+                (rcvtime_intg, rcvtime_frac, GRACEFO_id, qualflg, lin_accl_x, lin_accl_y, lin_accl_z, ang_accl_x,
+                 ang_accl_y, ang_accl_z, timestamp)
+                SELECT 0, 0, 'C', '00000000', random(), random(), random(), random(), random(), random(), ts
+                FROM generate_series(%(begin)s::timestamptz, %(end)s::timestamptz,
+                                     INTERVAL '{interval.total_seconds()} SECONDS') AS ts;
+            """
+            cur.execute(sql, {'begin': span.begin, 'end': span.end})
+            conn.commit()
+
+    def time_file_refresh(self, filepath: str) -> timedelta:
+        parsed = parse_data_file(self.product, filepath)
+        write_parsed_data_file(parsed)
+
+        start = datetime.now()
+        refresh_continuous_aggregates(self.dataset, data_span=parsed.data_temporal_span)
+        return datetime.now() - start
+
+    def test_refresh_time_is_independent_of_extant_data(self):
+        first_fp, second_fp = [os.path.join(self.input_dir, fn) for fn in sorted(os.listdir(self.input_dir))]
+        ensure_dataset(self.dataset)
+
+        empty_table_refresh_time = self.time_file_refresh(first_fp)
+
+        # a year of minutely data preceding the input files, fully materialized
+        self.populate_synthetic_data(TimeSpan(begin=datetime(2022, 6, 1, tzinfo=timezone.utc),
+                                              end=datetime(2023, 6, 1, tzinfo=timezone.utc)), timedelta(minutes=1))
+        refresh_continuous_aggregates(self.dataset, enable_chunking=True)
+
+        populated_table_refresh_time = self.time_file_refresh(second_fp)
+
+        self.assertLess(populated_table_refresh_time,
+                        empty_table_refresh_time * self.max_slowdown_factor + self.max_slowdown_tolerance)
+
+
+if __name__ == '__main__':
+    unittest.main()
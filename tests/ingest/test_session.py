@@ -0,0 +1,107 @@
+import gc
+import os
+import unittest
+from datetime import datetime, timezone
+from unittest import mock
+
+from masschange.dataproducts.implementations.gracefo.primary.acc1a import GraceFOAcc1ADataProduct
+from masschange.dataproducts.timeseriesdataset import TimeSeriesDataset
+from masschange.dataproducts.timeseriesdatasetversion import TimeSeriesDatasetVersion
+from masschange.db.session import IngestSession
+from masschange.ingest.executor.ingest import ingest_file_to_db, parse_data_file, write_parsed_data_file
+from tests.ingest.base import IngestTestCaseBase
+
+
+class StubConnection:
+    pass
+
+
+class IngestSessionTestCase(unittest.TestCase):
+    """Test session bookkeeping, with database operations replaced by stubs"""
+    input_dir = './tests/input_data/ingest/test_ingest/'
+
+    def test_prepares_statements_once_per_connection(self):
+        session = IngestSession(database='unused')
+        first_cursor, second_cursor = mock.MagicMock(), mock.MagicMock()
+        sql = 'DELETE FROM some_table WHERE timestamp >= %s AND timestamp <= %s'
+
+        for cursor in [first_cursor, first_cursor, second_cursor]:
+            session.execute_prepared(cursor, 'purge_some_table', sql, [1, 2])
+
+        self.assertEqual([mock.call('PREPARE purge_some_table AS DELETE FROM some_table WHERE timestamp >= $1 AND timestamp <= $2'),
+                          mock.call('EXECUTE purge_some_table (%s, %s)', [1, 2]),
+                          mock.call('EXECUTE purge_some_table (%s, %s)', [1, 2])],
+                         first_cursor.execute.call_args_list)
+        self.assertEqual(2, second_cursor.execute.call_count)
+
+    def test_prepared_statements_are_forgotten_with_their_connection(self):
+        session = IngestSession(database='unused')
+        sql = 'SELECT %s::int'
+
+        cursor = mock.MagicMock()
+        cursor.connection = StubConnection()
+        session.execute_prepared(cursor, 'select_one', sql, [1])
+        cursor.connection = None
+        gc.collect()
+
+        # a new connection (which is likely to be allocated the id of the dropped one) must prepare statements afresh
+        cursor.connection = StubConnection()
+        session.execute_prepared(cursor, 'select_one', sql, [1])
+        self.assertEqual(mock.call('PREPARE select_one AS SELECT $1::int'), cursor.execute.call_args_list[2])
+        self.assertEqual(1, len(session._prepared_statement_names))
+
+    def test_ensures_each_dataset_once_per_session(self):
+        session = IngestSession(database='unused')
+        filepaths = [os.path.join(self.input_dir, fn) for fn in sorted(os.listdir(self.input_dir))]
+        parsed_files = [parse_data_file(GraceFOAcc1ADataProduct(), fp) for fp in filepaths]
+        self.assertEqual(1, len({parsed.dataset.get_table_name() for parsed in parsed_files}))
+
+        with mock.patch.multiple('masschange.ingest.executor.ingest', ensure_table_exists=mock.DEFAULT,
+                                 ensure_continuous_aggregates=mock.DEFAULT, open_connection=mock.DEFAULT,
+                                 lock_dataset_table=mock.DEFAULT, purge_overlapping_data=mock.DEFAULT,
+                                 ingest_df=mock.DEFAULT, update_metadata=mock.DEFAULT) as mocks:
+            for parsed in parsed_files:
+                write_parsed_data_file(parsed, session=session)
+
+            self.assertEqual(1, mocks['ensure_table_exists'].call_count)
+            self.assertEqual(1, mocks['ensure_continuous_aggregates'].call_count)
+            self.assertEqual(len(parsed_files), mocks['ingest_df'].call_count)
+
+
+class IngestSessionDatabaseTestCase(IngestTestCaseBase):
+    input_dir = './tests/input_data/ingest/test_ingest/'
+
+    product = GraceFOAcc1ADataProduct()
+    dataset = TimeSeriesDataset(product, TimeSeriesDatasetVersion('04'), 'C')
+
+    def select_aggregated_records(self):
+        return self.dataset.select(datetime(2000, 1, 1, tzinfo=timezone.utc), datetime(2999, 1, 1, tzinfo=timezone.utc),
+                                   aggregation_level=1, limit_data_span=False)
+
+    def test_session_ingest_matches_sessionless_ingest(self):
+        filepaths = [os.path.join(self.input_dir, fn) for fn in sorted(os.listdir(self.input_dir))]
+        for fp in filepaths:
+            ingest_file_to_db(self.product, fp)
+        sessionless_records = self.select_aggregated_records()
+        self.assertTrue(len(sessionless_records) > 0)
+
+        # ingesting each file twice exercises re-use of the pooled connections and prepared statements
+        with IngestSession() as session:
+            for fp in filepaths + filepaths:
+                ingest_file_to_db(self.product, fp, session=session)
+
+        self.assertEqual(sessionless_records, self.select_aggregated_records())
+
+    def test_failed_transaction_discards_prepared_statements(self):
+        with IngestSession(max_connections=1) as session:
+            with session.connection() as conn, conn.cursor() as cur:
+                session.execute_prepared(cur, 'select_one', 'SELECT %s::int', [1])
+
+            with self.assertRaises(RuntimeError):
+                with session.connection() as conn, conn.cursor() as cur:
+                    session.execute_prepared(cur, 'select_one', 'SELECT %s::int', [1])
+                    raise RuntimeError('simulated failure')
+
+            with session.connection() as conn, conn.cursor() as cur:
+                session.execute_prepared(cur, 'select_one', 'SELECT %s::int', [2])
+                self.assertEqual(2, cur.fetchone()[0])
@@ -0,0 +1,91 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import psycopg2
+
+from masschange.dataproducts.implementations.gracefo.primary.acc1a import GraceFOAcc1ADataProduct
+from masschange.dataproducts.db.utils import get_db_connection
+from masschange.db.ingest import stats as ingest_stats
+from masschange.db.ingest.stats import IngestStats, record_ingest_stats
+from masschange.ingest.executor.ingest import ingest_file_to_db, parse_data_file, write_parsed_data_files
+from tests.ingest.base import IngestTestCaseBase
+
+
+class IngestStatsTestCase(unittest.TestCase):
+    """Test measurement of ingest stages, with database operations replaced by stubs"""
+    input_dir = './tests/input_data/ingest/test_ingest/'
+
+    product = GraceFOAcc1ADataProduct()
+
+    def get_filepaths(self):
+        return [os.path.join(self.input_dir, fn) for fn in sorted(os.listdir(self.input_dir))]
+
+    def test_parse_measures_rows_bytes_and_timestamp_derivation(self):
+        fp = self.get_filepaths()[0]
+        parsed = parse_data_file(self.product, fp)
+
+        self.assertEqual(len(parsed.df), parsed.stats.row_count)
+        self.assertEqual(os.path.getsize(fp), parsed.stats.input_bytes)
+        self.assertTrue(0 < parsed.stats.stage_seconds['timestamps'] <= parsed.stats.stage_seconds['parse'])
+
+    def test_write_combines_file_stats_and_measures_write_stages(self):
+        parsed_files = [parse_data_file(self.product, fp) for fp in self.get_filepaths()]
+
+        with mock.patch.multiple('masschange.ingest.executor.ingest', ensure_table_exists=mock.DEFAULT,
+                                 ensure_continuous_aggregates=mock.DEFAULT, open_connection=mock.DEFAULT,
+                                 lock_dataset_table=mock.DEFAULT, purge_overlapping_data=mock.DEFAULT,
+                                 update_metadata=mock.DEFAULT), \
+                mock.patch('masschange.ingest.executor.ingest.ingest_df',
+                           side_effect=lambda *args, **kwargs: time.sleep(0.01)):
+            stats = write_parsed_data_files(parsed_files)
+
+        self.assertEqual(len(parsed_files), stats.file_count)
+        self.assertEqual(sum(len(parsed.df) for parsed in parsed_files), stats.row_count)
+        self.assertEqual(sum(parsed.stats.stage_seconds['parse'] for parsed in parsed_files),
+                         stats.stage_seconds['parse'])
+        self.assertGreaterEqual(stats.stage_seconds['copy'], 0.01)
+        self.assertEqual(0.0, stats.stage_seconds['refresh'])
+
+    def test_records_stats_as_json_lines_despite_database_failure(self):
+        stats = parse_data_file(self.product, self.get_filepaths()[0]).stats
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            jsonl_filepath = os.path.join(tmp_dir, 'stats.jsonl')
+            with mock.patch('masschange.db.ingest.stats.put_ingest_stats',
+                            side_effect=psycopg2.OperationalError('simulated failure')), \
+                    mock.patch.object(ingest_stats, '_ingest_stats_jsonl_path', jsonl_filepath):
+                record_ingest_stats(stats)
+                record_ingest_stats(stats)
+
+            with open(jsonl_filepath) as f:
+                lines = [json.loads(line) for line in f]
+
+        self.assertEqual(2, len(lines))
+        self.assertEqual(stats.row_count, lines[0]['row_count'])
+        self.assertEqual(set(IngestStats.stages), set(lines[0]['stage_seconds'].keys()))
+        self.assertTrue(lines[0]['peak_rss_bytes'] > 0)
+
+
+class IngestStatsDatabaseTestCase(IngestTestCaseBase):
+    input_dir = './tests/input_data/ingest/test_ingest/'
+
+    def test_records_stats_for_each_ingested_file(self):
+        filepaths = [os.path.join(self.input_dir, fn) for fn in sorted(os.listdir(self.input_dir))]
+        for fp in filepaths:
+            ingest_file_to_db(GraceFOAcc1ADataProduct(), fp)
+
+        with get_db_connection() as conn, conn.cursor() as cur:
+            cur.execute('SELECT source_path, row_count, copy_seconds, refresh_seconds FROM _meta_ingest_stats '
+                        'ORDER BY id')
+            rows = cur.fetchall()
+
+        self.assertEqual(filepaths, [source_path for source_path, _, _, _ in rows])
+        self.assertTrue(all(row_count > 0 and copy_seconds > 0 and refresh_seconds > 0
+                            for _, row_count, copy_seconds, refresh_seconds in rows))
+
+
+if __name__ == '__main__':
+    unittest.main()
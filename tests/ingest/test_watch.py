@@ -0,0 +1,157 @@
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import timedelta
+from typing import List
+from unittest import mock
+
+from masschange.dataproducts.implementations.gracefo.primary.acc1a import GraceFOAcc1ADataProduct
+from masschange.dataproducts.implementations.gracefo.primary.kbr1b import GraceFOKbr1BDataProduct
+from masschange.ingest.crawler.watch import FileWatcher, InotifyFileWatcher, PollingFileWatcher
+from masschange.ingest.executor import daemon as ingest_daemon
+from masschange.ingest.executor.daemon import IngestDaemon
+from masschange.ingest.executor.datafilereaders.base import get_data_file_name
+from masschange.ingest.executor.ingest import IngestResult, get_multiproduct_zipped_input_iterable
+
+
+class FileWatcherTestCaseBase:
+    def setUp(self):
+        self.root_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.root_dir)
+
+    def write_file(self, *path_components: str) -> str:
+        fp = os.path.join(self.root_dir, *path_components)
+        with open(fp, 'w') as f:
+            f.write('some content\n')
+        return fp
+
+
+@unittest.skipUnless(InotifyFileWatcher.is_available(), 'inotify is not available on this platform')
+class InotifyFileWatcherTestCase(FileWatcherTestCaseBase, unittest.TestCase):
+    def test_reports_written_files(self):
+        watcher = InotifyFileWatcher(self.root_dir)
+        try:
+            fp = self.write_file('ACC1A_2023-06-01_C_04.txt')
+            self.assertEqual([fp], watcher.get_changed_files(timeout=timedelta(seconds=1)))
+            self.assertEqual([], watcher.get_changed_files(timeout=timedelta(seconds=0)))
+        finally:
+            watcher.close()
+
+    def test_reports_files_in_new_subdirectories(self):
+        watcher = InotifyFileWatcher(self.root_dir)
+        try:
+            os.mkdir(os.path.join(self.root_dir, '2023'))
+            fp = self.write_file('2023', 'ACC1A_2023-06-01_C_04.txt')
+
+            changed_filepaths = []
+            for _ in range(3):
+                changed_filepaths.extend(watcher.get_changed_files(timeout=timedelta(seconds=1)))
+            self.assertIn(fp, changed_filepaths)
+        finally:
+            watcher.close()
+
+
+class PollingFileWatcherTestCase(FileWatcherTestCaseBase, unittest.TestCase):
+    def test_reports_files_once_settled(self):
+        existing_fp = self.write_file('ACC1A_2023-06-01_C_04.txt')
+        watcher = PollingFileWatcher(self.root_dir, poll_interval=timedelta(0))
+
+        fp = self.write_file('ACC1A_2023-06-02_C_04.txt')
+        self.assertEqual([], watcher.get_changed_files(timeout=timedelta(0)))
+        self.assertEqual([fp], watcher.get_changed_files(timeout=timedelta(0)))
+        self.assertEqual([], watcher.get_changed_files(timeout=timedelta(0)))
+        self.assertNotIn(existing_fp, watcher.get_changed_files(timeout=timedelta(0)))
+
+
+class IngestDaemonRoutingTestCase(unittest.TestCase):
+    input_dir = './tests/input_data'
+
+    def test_routes_tarballs_as_archive_crawl(self):
+        products = [GraceFOAcc1ADataProduct(), GraceFOKbr1BDataProduct()]
+        daemon = IngestDaemon(products, PollingFileWatcher(self.input_dir))
+
+        tar_filepaths = [os.path.join(self.input_dir, filename) for filename in os.listdir(self.input_dir)
+                         if filename.endswith('.tgz')]
+        routed = [(product.get_full_id(), get_data_file_name(data_file))
+                  for product, data_file in daemon.get_product_data_files(tar_filepaths)]
+        expected = [(product.get_full_id(), get_data_file_name(data_file))
+                    for product, data_file in get_multiproduct_zipped_input_iterable(self.input_dir, products)]
+
+        self.assertTrue(len(routed) > 0)
+        self.assertCountEqual(expected, routed)
+
+    def test_routes_unzipped_files(self):
+        daemon = IngestDaemon([GraceFOAcc1ADataProduct(), GraceFOKbr1BDataProduct()],
+                              PollingFileWatcher(self.input_dir))
+        fp = os.path.join(self.input_dir, 'ACC1A_2023-06-03_C_04.txt')
+
+        routed = [(product.get_full_id(), data_file) for product, data_file in daemon.get_product_data_files([fp])]
+        self.assertEqual([(GraceFOAcc1ADataProduct().get_full_id(), fp)], routed)
+
+
+class ScriptedFileWatcher(FileWatcher):
+    """Reports each of a list of batches of changed files in turn, then stops the daemon"""
+
+    def __init__(self, root_dir: str, batches: List[List[str]]):
+        super().__init__(root_dir)
+        self.batches = list(batches)
+
+    def get_changed_files(self, timeout: timedelta) -> List[str]:
+        if len(self.batches) == 0:
+            raise KeyboardInterrupt()
+        return self.batches.pop(0)
+
+
+class IngestDaemonFailureTestCase(FileWatcherTestCaseBase, unittest.TestCase):
+    """Test that the daemon continues watching after failing to ingest a batch"""
+    products = [GraceFOAcc1ADataProduct(), GraceFOKbr1BDataProduct()]
+
+    def write_corrupt_tarball(self) -> str:
+        fp = os.path.join(self.root_dir, 'gracefo_1A_2023-06-01_RL04.ascii.noLRI.tgz')
+        with open('./tests/input_data/gracefo_1A_2023-06-01_RL04.ascii.noLRI.tgz', 'rb') as f:
+            truncated_content = f.read(5000)
+        with open(fp, 'wb') as f:
+            f.write(truncated_content)
+        return fp
+
+    def run_daemon(self, batches: List[List[str]], ingest_file_group) -> List[List[IngestResult]]:
+        daemon = IngestDaemon(self.products, ScriptedFileWatcher(self.root_dir, batches), batch_delay=timedelta(0))
+        batch_results = []
+        ingest_filepaths = daemon.ingest_filepaths
+        daemon.ingest_filepaths = lambda filepaths: batch_results.append(ingest_filepaths(filepaths))
+        with mock.patch.object(ingest_daemon, 'ingest_file_group', ingest_file_group):
+            with self.assertRaises(KeyboardInterrupt):
+                daemon.run()
+        return batch_results
+
+    def test_corrupt_tarball_is_recorded_as_failed(self):
+        tar_fp = self.write_corrupt_tarball()
+        fp = self.write_file('ACC1A_2023-06-03_C_04.txt')
+
+        ingested_filepaths = []
+
+        def ingest_file_group(group, **kwargs):
+            ingested_filepaths.extend(data_file for _, data_file in group)
+            return [IngestResult(product.get_full_id(), data_file, IngestResult.SUCCEEDED) for product, data_file in
+                    group]
+
+        batch_results = self.run_daemon([[tar_fp], [fp]], ingest_file_group)
+
+        self.assertEqual([fp], ingested_filepaths)
+        self.assertEqual(2, len(batch_results))
+        self.assertEqual({tar_fp}, {r.filepath for r in batch_results[0]})
+        self.assertTrue(all(r.status == IngestResult.FAILED for r in batch_results[0]))
+        self.assertEqual([(fp, IngestResult.SUCCEEDED)], [(r.filepath, r.status) for r in batch_results[1]])
+
+    def test_failed_batch_does_not_stop_the_daemon(self):
+        first_fp = self.write_file('ACC1A_2023-06-03_C_04.txt')
+        second_fp = self.write_file('ACC1A_2023-06-04_C_04.txt')
+
+        ingest_file_group = mock.Mock(side_effect=[RuntimeError('connection lost'), []])
+        self.run_daemon([[first_fp], [second_fp]], ingest_file_group)
+
+        self.assertEqual([[(self.products[0], first_fp)], [(self.products[0], second_fp)]],
+                         [call.args[0] for call in ingest_file_group.call_args_list])
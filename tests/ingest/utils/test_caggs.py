@@ -1,6 +1,9 @@
 import unittest
+from datetime import datetime, timedelta
 
 from masschange.db.data.aggregations import TrivialAggregation, NestedAggregation
+from masschange.db.data.caggs import get_refresh_span, get_chunked_refresh_spans
+from masschange.utils.timespan import TimeSpan
 
 
 class AggregationsTestCase(unittest.TestCase):
@@ -19,3 +22,41 @@ class AggregationsTestCase(unittest.TestCase):
         agg = NestedAggregation("do_agg", ['F'],
                                 output_name_f_override=lambda column_name: f'someFunctionOf({column_name})')
         self.assertEqual('someFunctionOf(someColumnName)', agg.get_aggregated_name('someColumnName'))
+
+
+class RefreshSpanTestCase(unittest.TestCase):
+
+    def test_refresh_span_is_aligned_to_enclosing_buckets(self):
+        data_span = TimeSpan(begin=datetime(2023, 6, 3, 0, 0, 0, 18395), end=datetime(2023, 6, 3, 23, 59, 59, 918337))
+        refresh_span = get_refresh_span(timedelta(seconds=2.5), data_span)
+        self.assertEqual(datetime(2023, 6, 3), refresh_span.begin)
+        self.assertEqual(datetime(2023, 6, 4), refresh_span.end)
+
+    def test_refresh_span_is_aligned_to_timescale_bucket_origin(self):
+        # 31250s buckets do not divide a day, so are aligned to time_bucket()'s default origin of 2000-01-03
+        bucket_interval = timedelta(seconds=31250)
+        data_span = TimeSpan(begin=datetime(2023, 6, 3, 12), end=datetime(2023, 6, 3, 12, 1))
+        refresh_span = get_refresh_span(bucket_interval, data_span)
+        self.assertEqual(timedelta(0), (refresh_span.begin - datetime(2000, 1, 3)) % bucket_interval)
+        self.assertEqual(bucket_interval, refresh_span.duration)
+        self.assertTrue(refresh_span.begin <= data_span.begin and data_span.end <= refresh_span.end)
+
+    def test_refresh_span_includes_partially_overlapped_buckets(self):
+        data_span = TimeSpan(begin=datetime(2023, 6, 3, 0, 0, 5), end=datetime(2023, 6, 3, 0, 0, 25))
+        refresh_span = get_refresh_span(timedelta(seconds=10), data_span)
+        self.assertEqual(datetime(2023, 6, 3, 0, 0, 0), refresh_span.begin)
+        self.assertEqual(datetime(2023, 6, 3, 0, 0, 30), refresh_span.end)
+
+    def test_chunked_refresh_spans_are_contiguous_and_aligned(self):
+        bucket_interval = timedelta(seconds=31250)
+        data_span = TimeSpan(begin=datetime(2019, 1, 1, 0, 0, 0, 18395), end=datetime(2023, 6, 3, 23, 59, 59, 918337))
+        chunk_spans = get_chunked_refresh_spans(bucket_interval, data_span, chunk_count=7)
+
+        refresh_span = get_refresh_span(bucket_interval, data_span)
+        self.assertEqual(7, len(chunk_spans))
+        self.assertEqual(refresh_span.begin, chunk_spans[0].begin)
+        self.assertEqual(refresh_span.end, chunk_spans[-1].end)
+        for previous_span, span in zip(chunk_spans, chunk_spans[1:]):
+            self.assertEqual(previous_span.end, span.begin)
+        for span in chunk_spans:
+            self.assertEqual(timedelta(0), (span.begin - datetime(2000, 1, 3)) % bucket_interval)
@@ -0,0 +1,46 @@
+import threading
+import unittest
+
+from masschange.utils.misc import iterate_ahead
+
+
+class IterateAheadTestCase(unittest.TestCase):
+    def test_yields_all_items_in_order(self):
+        self.assertEqual(list(range(10)), list(iterate_ahead(iter(range(10)), depth=2)))
+
+    def test_reraises_exceptions_to_consumer(self):
+        def fail_after_two_items():
+            yield 1
+            yield 2
+            raise RuntimeError('simulated failure')
+
+        consumed = []
+        with self.assertRaisesRegex(RuntimeError, 'simulated failure'):
+            for item in iterate_ahead(fail_after_two_items()):
+                consumed.append(item)
+        self.assertEqual([1, 2], consumed)
+
+    def test_stops_producing_once_consumer_stops(self):
+        produced = []
+        stopped = threading.Event()
+
+        def produce_indefinitely():
+            try:
+                i = 0
+                while True:
+                    produced.append(i)
+                    yield i
+                    i += 1
+            finally:
+                stopped.set()
+
+        items = iterate_ahead(produce_indefinitely(), depth=1)
+        self.assertEqual(0, next(items))
+        items.close()
+
+        self.assertTrue(stopped.wait(timeout=5))
+        self.assertTrue(len(produced) <= 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+from datetime import datetime, timedelta
+
+from masschange.utils.timespan import TimeSpan, merge_timespans, subtract_timespans
+
+
+class MergeTimespansTestCase(unittest.TestCase):
+    origin = datetime(2023, 6, 3)
+
+    def span(self, begin_hours: float, end_hours: float) -> TimeSpan:
+        return TimeSpan(begin=self.origin + timedelta(hours=begin_hours), end=self.origin + timedelta(hours=end_hours))
+
+    def assertSpansEqual(self, expected, actual):
+        self.assertEqual([(s.begin, s.end) for s in expected], [(s.begin, s.end) for s in actual])
+
+    def test_merges_overlapping_and_abutting_spans(self):
+        spans = [self.span(2, 4), self.span(0, 1), self.span(1, 2.5), self.span(3, 3.5)]
+        self.assertSpansEqual([self.span(0, 4)], merge_timespans(spans))
+
+    def test_preserves_disjoint_spans_in_order(self):
+        spans = [self.span(5, 6), self.span(0, 1), self.span(2, 3)]
+        self.assertSpansEqual([self.span(0, 1), self.span(2, 3), self.span(5, 6)], merge_timespans(spans))
+
+    def test_empty(self):
+        self.assertEqual([], merge_timespans([]))
+
+
+class TimeSpanIntersectsTestCase(unittest.TestCase):
+    origin = datetime(2023, 6, 3)
+
+    def span(self, begin_hours: float, end_hours: float) -> TimeSpan:
+        return TimeSpan(begin=self.origin + timedelta(hours=begin_hours), end=self.origin + timedelta(hours=end_hours))
+
+    def test_intersects(self):
+        self.assertTrue(self.span(0, 2).intersects(self.span(1, 3)))
+        self.assertTrue(self.span(1, 3).intersects(self.span(0, 2)))
+        self.assertTrue(self.span(0, 4).intersects(self.span(1, 2)))
+        self.assertTrue(self.span(0, 1).intersects(self.span(1, 2)))
+        self.assertFalse(self.span(0, 1).intersects(self.span(1.5, 2)))
+        self.assertFalse(self.span(1.5, 2).intersects(self.span(0, 1)))
+
+
+class SubtractTimespansTestCase(unittest.TestCase):
+    origin = datetime(2023, 6, 3)
+    resolution = timedelta(microseconds=1)
+
+    def span(self, begin_hours: float, end_hours: float) -> TimeSpan:
+        return TimeSpan(begin=self.origin + timedelta(hours=begin_hours), end=self.origin + timedelta(hours=end_hours))
+
+    def assertSpansEqual(self, expected, actual):
+        self.assertEqual([(s.begin, s.end) for s in expected], [(s.begin, s.end) for s in actual])
+
+    def test_returns_gaps_between_subtrahends(self):
+        remainders = subtract_timespans(self.span(0, 24), [self.span(10, 12), self.span(2, 4), self.span(3, 5)])
+        self.assertSpansEqual([TimeSpan(begin=self.origin, end=self.origin + timedelta(hours=2) - self.resolution),
+                               TimeSpan(begin=self.origin + timedelta(hours=5) + self.resolution,
+                                        end=self.origin + timedelta(hours=10) - self.resolution),
+                               TimeSpan(begin=self.origin + timedelta(hours=12) + self.resolution,
+                                        end=self.origin + timedelta(hours=24))],
+                              remainders)
+
+    def test_fully_covered_span_has_no_remainder(self):
+        self.assertEqual([], subtract_timespans(self.span(1, 2), [self.span(0, 1.5), self.span(1.5, 3)]))
+
+    def test_disjoint_subtrahends_are_ignored(self):
+        self.assertSpansEqual([self.span(1, 2)], subtract_timespans(self.span(1, 2), [self.span(0, 0.5),
+                                                                                      self.span(3, 4)]))
+
+
+if __name__ == '__main__':
+    unittest.main()